@@ -0,0 +1,255 @@
+"""asyncio variants of MetadataIngest and MetadataQuery.
+
+Same methods and Cypher as ingest_metadata.py / query_metadata.py, but built
+on the neo4j AsyncGraphDatabase driver so an asyncio service can await them
+directly instead of wrapping every call in a thread. AsyncMetadataQuery also
+offers bounded-concurrency fan-out, e.g.:
+
+    query = AsyncMetadataQuery()
+    features = await query.get_features_for_many(file_names, concurrency=32)
+    await query.close()
+"""
+import asyncio
+import copy
+import random
+import time
+
+import ingest_metadata as im
+import query_metadata as qm
+from metadata_cache import MISSING, invalidate_datafile
+from metadata_schema import (SHOW_NODE_INDEXES, build_report, constraint_statements,
+                             index_statements, online_indexes)
+from neo4j_connection import create_async_driver
+
+
+async def ensure_schema_async(driver):
+    async with driver.session() as session:
+        await session.execute_write(_run_statements, list(constraint_statements()))
+        await session.execute_write(_run_statements, list(index_statements()))
+
+
+async def _run_statements(tx, statements):
+    for statement in statements:
+        await tx.run(statement)
+
+
+async def ingest_features_bulk_tx(tx, dataset_name, datafile_name, file_type, features):
+    await tx.run(im.MERGE_DATAFILE_FEATURES_BULK, dataset=dataset_name, file=datafile_name,
+                 file_type=file_type, features=features)
+    units = [feat for feat in features if feat["unit"]]
+    if units:
+        await tx.run(im.MERGE_UNITS_BULK, units=units)
+
+
+async def ingest_metadata_tx(tx, dataset_name, datafile_name, file_type, features):
+    # Per-feature statements, as ingest_metadata.ingest_metadata_tx
+    await tx.run(im.MERGE_DATAFILE, dataset=dataset_name, file=datafile_name, file_type=file_type)
+    for column, feat in enumerate(features):
+        await tx.run(im.MERGE_FEATURE, name=feat["name"], category=feat["category"], file=datafile_name,
+                     column=column)
+        if feat["unit"]:
+            await tx.run(im.MERGE_FEATURE_UNIT, unit=feat["unit"], desc=feat["desc"], name=feat["name"])
+
+
+async def ingest_rul_metadata_tx(tx, dataset_name, datafile_name, file_type):
+    await tx.run(im.MERGE_DATAFILE, dataset=dataset_name, file=datafile_name, file_type=file_type)
+    await tx.run(im.MERGE_RUL_FEATURE, file=datafile_name)
+
+
+async def create_asset_and_link(tx, asset_name, datafile_name):
+    asset_id = random.randint(100000, 999999)
+    await tx.run(im.MERGE_ASSET, asset_name=asset_name, datafile_name=datafile_name, asset_id=asset_id)
+
+
+async def create_storage_and_link(tx, datafile_name, storage_type, storage_path, storage_url, storage_name):
+    await tx.run(im.MERGE_STORAGE, storage_type=storage_type, storage_path=storage_path,
+                 datafile_name=datafile_name, storage_url=storage_url, storage_name=storage_name)
+
+
+async def ingest_catalog_batch_tx(tx, files, features, feature_sets, assets, storages):
+    await tx.run(im.MERGE_DATAFILES_BULK, files=files)
+    await tx.run(im.MERGE_FEATURES_BULK, features=features)
+    units = [feat for feat in features if feat["unit"]]
+    if units:
+        await tx.run(im.MERGE_UNITS_BULK, units=units)
+    await tx.run(im.MERGE_HAS_FEATURE_BULK, files=files, feature_sets=feature_sets)
+    if assets:
+        await tx.run(im.MERGE_ASSETS_BULK, assets=assets)
+    if storages:
+        await tx.run(im.MERGE_STORAGES_BULK, storages=storages)
+
+
+class AsyncMetadataIngest:
+    def __init__(self, uri=None, user=None, password=None, driver=None, bootstrap_schema=True):
+        # Settings as for MetadataIngest; the async driver is owned by this object
+        self.driver = driver or create_async_driver(uri, user, password)
+        self._schema_ready = not bootstrap_schema
+        self._schema_lock = asyncio.Lock()
+
+    async def close(self):
+        await self.driver.close()
+
+    async def _ensure_schema(self):
+        async with self._schema_lock:
+            if not self._schema_ready:
+                await ensure_schema_async(self.driver)
+                self._schema_ready = True
+
+    async def ingest_metadata(self, dataset_name, datafile_name, file_type, bulk=False):
+        """Ingest train or test datafile metadata (full feature columns)"""
+        await self._ensure_schema()
+        features = im.build_feature_rows(im.index_names, im.setting_names, im.sensor_names, im.unit_info)
+        work = ingest_features_bulk_tx if bulk else ingest_metadata_tx
+        async with self.driver.session() as session:
+            await session.execute_write(work, dataset_name, datafile_name, file_type, features)
+        invalidate_datafile(datafile_name)
+
+    async def ingest_rul_metadata(self, dataset_name, datafile_name, file_type="RUL", bulk=False):
+        """Ingest RUL file metadata with only one feature 'RUL_Value'"""
+        await self._ensure_schema()
+        async with self.driver.session() as session:
+            if bulk:
+                await session.execute_write(ingest_features_bulk_tx, dataset_name, datafile_name,
+                                            file_type, im.build_rul_feature_rows())
+            else:
+                await session.execute_write(ingest_rul_metadata_tx, dataset_name, datafile_name, file_type)
+        invalidate_datafile(datafile_name)
+
+    async def create_asset_and_link_to_datafile(self, asset_name, datafile_name):
+        await self._ensure_schema()
+        async with self.driver.session() as session:
+            await session.execute_write(create_asset_and_link, asset_name, datafile_name)
+        invalidate_datafile(datafile_name)
+
+    async def create_storage_and_link_to_datafile(self, datafile_name, storage_type, storage_path, storage_url, storage_name):
+        await self._ensure_schema()
+        async with self.driver.session() as session:
+            await session.execute_write(create_storage_and_link, datafile_name, storage_type,
+                                        storage_path, storage_url, storage_name)
+        invalidate_datafile(datafile_name)
+
+    async def ingest_catalog(self, manifest, batch_size=50):
+        """See MetadataIngest.ingest_catalog."""
+        entries = im.load_manifest(manifest)
+        reports = []
+        await self._ensure_schema()
+        async with self.driver.session() as session:
+            for start in range(0, len(entries), batch_size):
+                batch = entries[start:start + batch_size]
+                params = im.build_catalog_batch(batch)
+                t0 = time.perf_counter()
+                await session.execute_write(ingest_catalog_batch_tx, **params)
+                elapsed = time.perf_counter() - t0
+                invalidate_datafile(*(row["file"] for row in params["files"]))
+                reports.append({
+                    "batch": len(reports) + 1,
+                    "files": len(batch),
+                    "seconds": round(elapsed, 6),
+                    "files_per_sec": round(len(batch) / elapsed, 2) if elapsed > 0 else None,
+                })
+        return reports
+
+
+class AsyncMetadataQuery:
+    def __init__(self, uri=None, user=None, password=None, driver=None, cache=None):
+        self.driver = driver or create_async_driver(uri, user, password)
+        # Optional metadata_cache.QueryCache, shared semantics with MetadataQuery
+        self.cache = cache
+
+    async def close(self):
+        await self.driver.close()
+
+    async def _records(self, query, **params):
+        async with self.driver.session() as session:
+            result = await session.run(query, **params)
+            return [record async for record in result]
+
+    async def _cached(self, key, loader):
+        if self.cache is None:
+            return await loader()
+        value = self.cache.get(key)
+        if value is MISSING:
+            value = await loader()
+            self.cache.put(key, value)
+        return copy.deepcopy(value)
+
+    async def get_all_datasets_and_files(self):
+        return [record.data() for record in await self._records(qm.ALL_DATASETS_AND_FILES)]
+
+    async def get_features_for_file(self, file_name):
+        async def load():
+            records = await self._records(qm.FEATURES_FOR_FILE, file_name=file_name)
+            return [record.data() for record in records]
+        return await self._cached(("features", file_name), load)
+
+    async def get_features_for_files(self, file_names):
+        """See MetadataQuery.get_features_for_files: one UNWIND query for all files."""
+        file_names = list(dict.fromkeys(file_names))
+        features = {name: [] for name in file_names}
+        missing = file_names
+        if self.cache is not None:
+            missing = []
+            for name in file_names:
+                cached = self.cache.get(("features", name))
+                if cached is MISSING:
+                    missing.append(name)
+                else:
+                    features[name] = copy.deepcopy(cached)
+        if missing:
+            async with self.driver.session() as session:
+                result = await session.run(qm.FEATURES_FOR_FILES, file_names=missing)
+                async for record in result:
+                    row = record.data()
+                    features[row.pop("file")].append(row)
+            if self.cache is not None:
+                for name in missing:
+                    self.cache.put(("features", name), copy.deepcopy(features[name]))
+        return features
+
+    async def get_files_by_type(self, file_type):
+        async def load():
+            records = await self._records(qm.FILES_BY_TYPE, file_type=file_type)
+            return [record["file"] for record in records]
+        return await self._cached(("files_by_type", file_type), load)
+
+    async def get_all_units(self):
+        async def load():
+            return [record.data() for record in await self._records(qm.ALL_UNITS)]
+        return await self._cached(("units",), load)
+
+    async def verify_schema(self):
+        return build_report(online_indexes(await self._records(SHOW_NODE_INDEXES)))
+
+    async def fan_out(self, method, args, concurrency=16):
+        """Await method(arg) for every arg with at most `concurrency` in flight.
+
+        Results come back in the order of `args`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(arg):
+            async with semaphore:
+                return await method(arg)
+
+        return await asyncio.gather(*(call(arg) for arg in args))
+
+    async def get_features_for_many(self, file_names, concurrency=16):
+        """{file: [features...]} via one concurrent get_features_for_file per file."""
+        file_names = list(file_names)
+        results = await self.fan_out(self.get_features_for_file, file_names, concurrency)
+        return dict(zip(file_names, results))
+
+
+async def main():
+    query = AsyncMetadataQuery()
+    try:
+        files = [record["file"] for record in await query.get_all_datasets_and_files()]
+        features = await query.get_features_for_many(files, concurrency=16)
+        for file_name, feats in features.items():
+            print(file_name, len(feats), "features")
+    finally:
+        await query.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
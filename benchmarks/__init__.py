@@ -0,0 +1 @@
+"""Offline benchmarks for the ingest and query paths (no Neo4j server needed)."""
@@ -0,0 +1,86 @@
+"""Benchmark: sequential sync lookups vs bounded async fan-out vs one batched query.
+
+Fetches the feature list of N files with MetadataQuery (one call after the
+other), with AsyncMetadataQuery.get_features_for_many and with the single-UNWIND
+MetadataQuery.get_features_for_files, against fake drivers that add the same
+simulated server latency per round trip.
+
+Run from the repository root:
+    python -m benchmarks.bench_async --files 200 --latency-ms 2 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from async_metadata import AsyncMetadataQuery
+from benchmarks.fake_driver import AsyncRecordingDriver, RecordingDriver
+from query_metadata import MetadataQuery
+
+
+def feature_rows(query, params):
+    rows = [{"feature": f"sensor_{i}", "category": "Sensor", "unit": "R", "unit_description": None}
+            for i in range(26)]
+    if "file_names" in params:
+        return [dict(row, file=name) for name in params["file_names"] for row in rows]
+    return rows
+
+
+def run_sync(files, latency):
+    driver = RecordingDriver(latency=latency, responder=feature_rows)
+    query = MetadataQuery(driver=driver)
+    start = time.perf_counter()
+    result = {name: query.get_features_for_file(name) for name in files}
+    elapsed = time.perf_counter() - start
+    return elapsed, result, driver.stats()
+
+
+def run_batched(files, latency):
+    driver = RecordingDriver(latency=latency, responder=feature_rows)
+    query = MetadataQuery(driver=driver)
+    start = time.perf_counter()
+    result = query.get_features_for_files(files)
+    elapsed = time.perf_counter() - start
+    return elapsed, result, driver.stats()
+
+
+async def run_async(files, latency, concurrency):
+    driver = AsyncRecordingDriver(latency=latency, responder=feature_rows)
+    query = AsyncMetadataQuery(driver=driver)
+    start = time.perf_counter()
+    result = await query.get_features_for_many(files, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    return elapsed, result, driver.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync sequential vs async fan-out feature lookups")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated latency per round trip")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    files = [f"train_FD{i:04d}" for i in range(args.files)]
+    latency = args.latency_ms / 1000.0
+    sync_s, sync_result, sync_stats = run_sync(files, latency)
+    async_s, async_result, async_stats = asyncio.run(run_async(files, latency, args.concurrency))
+    batched_s, batched_result, batched_stats = run_batched(files, latency)
+    assert sync_result == async_result == batched_result
+
+    print(json.dumps({
+        "files": args.files,
+        "latency_ms": args.latency_ms,
+        "concurrency": args.concurrency,
+        "sync_sequential_s": round(sync_s, 4),
+        "async_fan_out_s": round(async_s, 4),
+        "batched_single_query_s": round(batched_s, 4),
+        "speedup_async": round(sync_s / async_s, 2) if async_s else None,
+        "speedup_batched": round(sync_s / batched_s, 2) if batched_s else None,
+        "sync_round_trips": sync_stats["round_trips"],
+        "async_round_trips": async_stats["round_trips"],
+        "batched_round_trips": batched_stats["round_trips"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Micro-benchmark: Bolt round trips per DataFile, per-feature vs bulk (UNWIND) vs catalog ingest.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingest --files 200
+"""
+import argparse
+import json
+import time
+
+from ingest_metadata import MetadataIngest
+from benchmarks.fake_driver import RecordingDriver
+
+
+def run(files, bulk):
+    driver = RecordingDriver()
+    ingest = MetadataIngest(None, None, None, driver=driver, bootstrap_schema=False)
+    start = time.perf_counter()
+    for i in range(files):
+        ingest.ingest_metadata("N-CMAPSS", f"train_FD{i:04d}", "train", bulk=bulk)
+    elapsed = time.perf_counter() - start
+    stats = driver.stats()
+    stats["mode"] = "bulk" if bulk else "per_feature"
+    stats["files"] = files
+    stats["round_trips_per_file"] = stats["round_trips"] / files
+    stats["client_seconds"] = round(elapsed, 6)
+    return stats
+
+
+def run_catalog(files, batch_size):
+    driver = RecordingDriver()
+    ingest = MetadataIngest(None, None, None, driver=driver, bootstrap_schema=False)
+    manifest = [{"dataset": "N-CMAPSS", "file": f"train_FD{i:04d}", "type": "train"} for i in range(files)]
+    start = time.perf_counter()
+    ingest.ingest_catalog(manifest, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    stats = driver.stats()
+    stats["mode"] = f"catalog/{batch_size}"
+    stats["files"] = files
+    stats["round_trips_per_file"] = stats["round_trips"] / files
+    stats["client_seconds"] = round(elapsed, 6)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count round trips for MetadataIngest.ingest_metadata")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=50, help="files per transaction for ingest_catalog")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+    args = parser.parse_args()
+
+    results = [
+        run(args.files, bulk=False),
+        run(args.files, bulk=True),
+        run_catalog(args.files, args.batch_size),
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<12} {'tx':>6} {'statements':>11} {'round trips':>12} {'per file':>9}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['transactions']:>6} {r['statements']:>11} "
+              f"{r['round_trips']:>12} {r['round_trips_per_file']:>9.1f}")
+    before = results[0]
+    for after in results[1:]:
+        print(f"round trip reduction ({after['mode']}): {before['round_trips'] / after['round_trips']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: nas_parallel_loop.parallel_nas_loop at increasing worker counts.
+
+Runs the same seeded search through 1, 2, 4, ... evaluation workers against
+a fresh in-memory graph seeded with the synthetic Layer nodes. Candidates are
+random layer sequences over those layers, and with --no-dedup repeats are
+evaluated too, so the number of evaluations does not depend on the 3-entry
+SEARCH_SPACE. Each evaluation burns --eval-ms of CPU to stand in for training.
+Reports wall time, evaluations/s and speed-up over the first worker count
+(bounded by the CPU count, which is reported too).
+
+Run from the repository root:
+    python -m benchmarks.bench_nas_parallel --iterations 400 --eval-ms 20 --workers 1 2 4 8 --no-dedup
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+
+from benchmarks.synthetic import SEED_LAYERS, synthetic_layers
+from memory_graph import MemoryGraphBackend
+from neo4j_connection import set_driver
+
+# After synthetic (it puts nas/ on sys.path)
+from nas_kg_loop import propose_random_architecture
+from nas_parallel_loop import busy_evaluate, parallel_nas_loop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel NAS loop scaling with worker count")
+    parser.add_argument("--iterations", type=int, default=400)
+    parser.add_argument("--eval-ms", type=float, default=20.0, help="simulated training cost per candidate")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-depth", type=int, default=3, help="longest random layer sequence")
+    parser.add_argument("--no-dedup", action="store_true", help="evaluate known fingerprints again")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    layers, _ = synthetic_layers()
+    propose = functools.partial(propose_random_architecture, max_depth=args.max_depth)
+    evaluate = functools.partial(busy_evaluate, args.eval_ms)
+    results = []
+    baseline = None
+    for workers in args.workers:
+        backend = MemoryGraphBackend()
+        with backend.session() as session:
+            session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=layers).consume())
+        set_driver(backend)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = parallel_nas_loop(args.iterations, workers, args.seed, evaluate,
+                                       propose=propose, dedup=not args.no_dedup)
+        baseline = baseline or report["evaluations_per_sec"]
+        results.append({
+            "workers": workers,
+            "seconds": report["seconds"],
+            "evaluated": report["evaluated"],
+            "pruned": report["pruned"],
+            "reused": report["reused"],
+            "evaluations_per_sec": report["evaluations_per_sec"],
+            "speedup_vs_first": (round(report["evaluations_per_sec"] / baseline, 2)
+                                 if baseline and report["evaluations_per_sec"] else None),
+            "stored": report["sink"]["written"],
+        })
+
+    print(json.dumps({"cpus": os.cpu_count(), "iterations": args.iterations, "eval_ms": args.eval_ms,
+                      "max_depth": args.max_depth, "dedup": not args.no_dedup, "runs": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
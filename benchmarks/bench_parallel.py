@@ -0,0 +1,74 @@
+"""Benchmark: parallel_ingest.ingest_catalog_parallel at increasing worker counts.
+
+Runs the same synthetic catalog through 1, 2, 4, ... workers against a
+recording fake driver that adds simulated latency per round trip. It can
+also fail a fraction of statements with a DeadlockDetected-style transient
+error to exercise the retry path. Reports wall time, speed-up over one
+worker, speed-up reported by the ingest itself, and attempts/retries.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel --files 400 --latency-ms 2 --workers 1 2 4 8 --deadlock-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+
+from benchmarks.fake_driver import RecordingDriver
+from benchmarks.synthetic import synthetic_catalog
+from parallel_ingest import ingest_catalog_parallel
+
+
+class TransientError(Exception):
+    code = "Neo.TransientError.Transaction.DeadlockDetected"
+
+
+def flaky_responder(rate, seed):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def respond(query, params):
+        with lock:
+            fail = rng.random() < rate
+        if fail:
+            raise TransientError("simulated deadlock")
+        return []
+    return respond
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel catalog ingest scaling with worker count")
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--datasets", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated latency per round trip")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--files-per-tx", type=int, default=10)
+    parser.add_argument("--deadlock-rate", type=float, default=0.0, help="fraction of statements that fail")
+    args = parser.parse_args()
+
+    manifest = synthetic_catalog(datasets=args.datasets, files_per_dataset=max(1, args.files // args.datasets))
+    results = []
+    baseline = None
+    for workers in args.workers:
+        responder = flaky_responder(args.deadlock_rate, seed=workers) if args.deadlock_rate else None
+        driver = RecordingDriver(latency=args.latency_ms / 1000.0, responder=responder)
+        report = ingest_catalog_parallel(manifest, workers=workers, files_per_tx=args.files_per_tx,
+                                         driver=driver, base_delay=0.001, max_delay=0.05, max_retries=10)
+        baseline = baseline or report["seconds"]
+        results.append({
+            "workers": workers,
+            "seconds": report["seconds"],
+            "files_per_sec": report["files_per_sec"],
+            "speedup_vs_first": round(baseline / report["seconds"], 2) if report["seconds"] else None,
+            "speedup_reported": report["speedup"],
+            "attempts": report["attempts"],
+            "retries": report["retries"],
+            "round_trips": driver.stats()["round_trips"],
+        })
+
+    print(json.dumps({"files": len(manifest), "latency_ms": args.latency_ms,
+                      "deadlock_rate": args.deadlock_rate, "runs": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark: peak client memory of list vs streaming MetadataQuery results.
+
+Serves a synthetic Dataset/DataFile listing of N rows from a generator-backed
+fake driver and compares get_all_datasets_and_files (materialised list) with
+iter_all_datasets_and_files in dict/tuple/namedtuple row formats.
+
+Run from the repository root:
+    python -m benchmarks.bench_streaming --rows 1000000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.fake_driver import RecordingDriver
+from query_metadata import MetadataQuery
+
+
+def catalog_rows(count):
+    def responder(query, params):
+        return ({"dataset": f"DS{i % 100:03d}", "file": f"file_{i:08d}", "type": "train"}
+                for i in range(count))
+    return responder
+
+
+def measure(label, consume):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = consume()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mode": label, "rows": rows, "seconds": round(elapsed, 3), "peak_kib": peak // 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of list vs streaming results")
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    query = MetadataQuery(driver=RecordingDriver(responder=catalog_rows(args.rows)))
+    results = [measure("list", lambda: len(query.get_all_datasets_and_files()))]
+    for row_format in ("dict", "tuple", "namedtuple"):
+        results.append(measure(
+            f"iter/{row_format}",
+            lambda: sum(1 for _ in query.iter_all_datasets_and_files(row_format=row_format)),
+        ))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
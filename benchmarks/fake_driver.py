@@ -0,0 +1,214 @@
+"""Recording stand-ins for the neo4j sync and async drivers.
+
+Implement just enough of the driver/session/transaction API used in this repo
+(session(), run(), execute_read(), execute_write()) and count what would have
+gone over the wire. Every statement is one Bolt round trip (RUN + PULL); each
+managed transaction adds one more for COMMIT (BEGIN is pipelined with the first
+RUN by the real driver).
+
+`latency` (seconds) is slept per round trip to emulate a remote server, and an
+optional `responder(query, params) -> [dict, ...]` supplies result rows.
+"""
+import asyncio
+import threading
+import time
+
+from neo4j_connection import normalize_cypher
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeResult:
+    def __init__(self, records=None):
+        # Kept lazy so a generator responder can stream huge results
+        self._source = iter(records or ())
+        self._records = None
+
+    def _all(self):
+        if self._records is None:
+            self._records = [FakeRecord(r) for r in self._source]
+        return self._records
+
+    def __iter__(self):
+        if self._records is not None:
+            return iter(self._records)
+        return (FakeRecord(r) for r in self._source)
+
+    def single(self):
+        records = self._all()
+        return records[0] if records else None
+
+    def data(self):
+        return [r.data() for r in self._all()]
+
+    def consume(self):
+        return None
+
+
+class RecordingTransaction:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        self._driver.wait()
+        return FakeResult(self._driver.record(query, params))
+
+
+class RecordingSession:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        # Auto-commit query: a single round trip
+        params = dict(parameters or {}, **kwargs)
+        self._driver.wait()
+        return FakeResult(self._driver.record(query, params))
+
+    def _execute(self, work, *args, **kwargs):
+        value = work(RecordingTransaction(self._driver), *args, **kwargs)
+        self._driver.commit()
+        self._driver.wait()
+        return value
+
+    execute_read = _execute
+    execute_write = _execute
+
+
+class RecordingDriver:
+    def __init__(self, latency=0.0, responder=None):
+        self.latency = latency
+        self.responder = responder
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.sessions = 0
+        self.transactions = 0
+        self.statements = 0
+        self.round_trips = 0
+        self.parameter_rows = 0
+        self.templates = {}
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def commit(self):
+        with self._lock:
+            self.transactions += 1
+            self.round_trips += 1
+
+    def record(self, query, params):
+        key = normalize_cypher(query)
+        with self._lock:
+            self.statements += 1
+            self.round_trips += 1
+            self.templates[key] = self.templates.get(key, 0) + 1
+            # Rows shipped inside list parameters (UNWIND payloads)
+            for value in params.values():
+                if isinstance(value, list):
+                    self.parameter_rows += len(value)
+        return self.responder(query, params) if self.responder else []
+
+    def session(self, **kwargs):
+        with self._lock:
+            self.sessions += 1
+        return RecordingSession(self)
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {
+            "sessions": self.sessions,
+            "transactions": self.transactions,
+            "statements": self.statements,
+            "round_trips": self.round_trips,
+            "distinct_templates": len(self.templates),
+            "parameter_rows": self.parameter_rows,
+        }
+
+
+class AsyncFakeResult(FakeResult):
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in FakeResult.__iter__(self):
+            yield record
+
+    async def single(self):
+        return FakeResult.single(self)
+
+    async def data(self):
+        return FakeResult.data(self)
+
+    async def consume(self):
+        return None
+
+
+class AsyncRecordingTransaction:
+    def __init__(self, driver):
+        self._driver = driver
+
+    async def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        await self._driver.wait()
+        return AsyncFakeResult(self._driver.record(query, params))
+
+
+class AsyncRecordingSession:
+    def __init__(self, driver):
+        self._driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        pass
+
+    async def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        await self._driver.wait()
+        return AsyncFakeResult(self._driver.record(query, params))
+
+    async def _execute(self, work, *args, **kwargs):
+        value = await work(AsyncRecordingTransaction(self._driver), *args, **kwargs)
+        self._driver.commit()
+        await self._driver.wait()
+        return value
+
+    execute_read = _execute
+    execute_write = _execute
+
+
+class AsyncRecordingDriver(RecordingDriver):
+    """Async twin of RecordingDriver; latency is awaited, not slept."""
+
+    async def wait(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def session(self, **kwargs):
+        with self._lock:
+            self.sessions += 1
+        return AsyncRecordingSession(self)
+
+    async def close(self):
+        pass
@@ -0,0 +1,491 @@
+"""Scaling benchmark suite for the ingest, query, NAS and cleanup paths.
+
+Builds a synthetic catalog (datasets x files x features) and NAS history
+(architectures x experiments), drives MetadataIngest, MetadataQuery,
+nas_kg_loop/ExperimentSink and the cleanup helpers against a backend, and
+reports per scenario: throughput, p50/p99/max latency per operation, the
+largest client memory growth during one operation (tracemalloc, measured in a
+second pass so it does not distort the timings) and statements executed.
+
+Backends:
+    memory      memory_graph.MemoryGraphBackend (default, no server)
+    recording   the same in-memory graph behind a RecordingDriver, which also
+                counts round trips and can add --latency-ms per round trip
+    neo4j       a live server at --neo4j-uri, which must be a disposable
+                database: it is wiped before every scenario pass so runs
+                start from an empty graph, as on the in-memory backends
+
+Run from the repository root:
+    python -m benchmarks.suite run --files 100 --features 60 --architectures 2000 --out base.json
+    python -m benchmarks.suite run ... --out new.json
+    python -m benchmarks.suite compare base.json new.json --threshold 0.1
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.fake_driver import RecordingDriver
+from benchmarks.synthetic import (SEED_LAYERS, synthetic_catalog, synthetic_features,
+                                  synthetic_nas_history)
+import clean_metadata
+from ingest_metadata import MetadataIngest
+from memory_graph import MemoryGraphBackend
+from neo4j_connection import configure, get_driver, set_driver
+from query_metadata import MetadataQuery
+
+# After synthetic (it puts nas/ on sys.path)
+import nas_cleanup_data
+import nas_kg_loop
+from nas_experiment_sink import ExperimentSink
+from nas_fingerprint import FingerprintRegistry
+from nas_prefix_index import PrefixIndex
+from nas_pruning_index import PruningIndex
+
+BACKENDS = ("memory", "recording", "neo4j")
+
+# Empties the --neo4j-uri database before each scenario pass
+WIPE_DATABASE = """
+MATCH (n)
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+class Timer:
+    """Times each operation and sums the backend counters it used (setup is not counted).
+
+    In the memory pass it tracks the tracemalloc growth of each operation instead.
+    """
+
+    def __init__(self, backend, trace_memory=False):
+        self.backend = backend
+        self.trace_memory = trace_memory
+        self.latencies = []
+        self.peak_growth = 0
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def op(self):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            yield
+            self.peak_growth = max(self.peak_growth, tracemalloc.get_traced_memory()[1] - before)
+            return
+        counters = self.backend.counters()
+        start = time.perf_counter()
+        yield
+        self.latencies.append(time.perf_counter() - start)
+        for key, value in self.backend.counters().items():
+            self.counters[key] = self.counters.get(key, 0) + value - counters[key]
+
+
+class Backend:
+    def __init__(self, kind, latency_ms=0.0):
+        self.kind = kind
+        self.memory = None
+        self.recording = None
+        if kind == "neo4j":
+            # run() has pointed the settings at the disposable --neo4j-uri database
+            self.driver = get_driver()
+            with self.driver.session() as session:
+                session.run(WIPE_DATABASE).consume()
+            return
+        self.memory = MemoryGraphBackend()
+        self.driver = self.memory
+        if kind == "recording":
+            self.recording = RecordingDriver(latency=latency_ms / 1000.0, responder=self._respond)
+            self.driver = self.recording
+        # nas/ helpers reach the backend through neo4j_config's LazyDriver
+        set_driver(self.driver)
+
+    def _respond(self, query, params):
+        return self.memory.execute(query, params).data()
+
+    def counters(self):
+        if self.recording is not None:
+            stats = self.recording.stats()
+            return {"statements": stats["statements"], "round_trips": stats["round_trips"]}
+        if self.memory is not None:
+            return {"statements": sum(self.memory.statements.values())}
+        return {}
+
+
+# -- setup helpers ----------------------------------------------------------------
+
+def _ingest(backend, cfg):
+    return MetadataIngest(driver=backend.driver)
+
+
+def _load_catalog(backend, cfg):
+    ingest = _ingest(backend, cfg)
+    ingest.ingest_catalog(cfg["catalog"], batch_size=cfg["batch_size"])
+    return [entry["file"] for entry in cfg["catalog"]]
+
+
+def _load_nas_history(backend, cfg):
+    with backend.driver.session() as session:
+        session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=cfg["layers"]).consume())
+        with ExperimentSink(flush_every=cfg["batch_size"] * 10, flush_interval=1e9, session=session) as sink:
+            for row in cfg["history"]:
+                sink.add(row["name"], row["arch"], row["layers"], row["acc"], row["lat"], row["fingerprint"])
+
+
+# -- scenarios ----------------------------------------------------------------------
+
+@scenario("ingest_per_feature")
+def ingest_per_feature(backend, cfg, timer):
+    ingest = _ingest(backend, cfg)
+    for entry in cfg["catalog"]:
+        with timer.op():
+            ingest.ingest_metadata(entry["dataset"], entry["file"], entry["type"], features=cfg["features"])
+    return len(cfg["catalog"])
+
+
+@scenario("ingest_bulk")
+def ingest_bulk(backend, cfg, timer):
+    ingest = _ingest(backend, cfg)
+    for entry in cfg["catalog"]:
+        with timer.op():
+            ingest.ingest_metadata(entry["dataset"], entry["file"], entry["type"], bulk=True,
+                                   features=cfg["features"])
+    return len(cfg["catalog"])
+
+
+@scenario("ingest_catalog")
+def ingest_catalog(backend, cfg, timer):
+    ingest = _ingest(backend, cfg)
+    catalog, size = cfg["catalog"], cfg["batch_size"]
+    # Every file gets the --features columns, as in the per-file scenarios
+    feature_sets = {"full": cfg["features"], "rul": cfg["features"]}
+    for start in range(0, len(catalog), size):
+        with timer.op():
+            ingest.ingest_catalog(catalog[start:start + size], batch_size=size, feature_sets=feature_sets)
+    return len(catalog)
+
+
+@scenario("query_features")
+def query_features(backend, cfg, timer):
+    files = _load_catalog(backend, cfg)
+    query = MetadataQuery(driver=backend.driver)
+    for name in files:
+        with timer.op():
+            query.get_features_for_file(name)
+    return len(files)
+
+
+@scenario("query_features_batched")
+def query_features_batched(backend, cfg, timer):
+    files = _load_catalog(backend, cfg)
+    query = MetadataQuery(driver=backend.driver)
+    size = cfg["batch_size"]
+    for start in range(0, len(files), size):
+        with timer.op():
+            query.get_features_for_files(files[start:start + size])
+    return len(files)
+
+
+@scenario("query_stream_all")
+def query_stream_all(backend, cfg, timer):
+    _load_catalog(backend, cfg)
+    query = MetadataQuery(driver=backend.driver)
+    rows = 0
+    with timer.op():
+        for _ in query.iter_all_datasets_and_files():
+            rows += 1
+    return rows
+
+
+@scenario("nas_store")
+def nas_store(backend, cfg, timer):
+    with backend.driver.session() as session:
+        session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=cfg["layers"]).consume())
+        sink = ExperimentSink(flush_every=10**9, flush_interval=1e9, session=session)
+        history, size = cfg["history"], cfg["batch_size"]
+        for start in range(0, len(history), size):
+            for row in history[start:start + size]:
+                sink.add(row["name"], row["arch"], row["layers"], row["acc"], row["lat"], row["fingerprint"])
+            with timer.op():
+                sink.flush()
+    return len(cfg["history"])
+
+
+@scenario("nas_warm")
+def nas_warm(backend, cfg, timer):
+    _load_nas_history(backend, cfg)
+    with backend.driver.session() as session:
+        with timer.op():
+            FingerprintRegistry().warm(session)
+        with timer.op():
+            PruningIndex().warm(session)
+        with timer.op():
+            PrefixIndex().warm(session)
+    return 3
+
+
+@scenario("nas_prefix_queries")
+def nas_prefix_queries(backend, cfg, timer):
+    _load_nas_history(backend, cfg)
+    index = PrefixIndex()
+    with backend.driver.session() as session:
+        index.warm(session)
+    # Each stored sequence with its last layer dropped: one edit from a known run
+    queries = [row["layers"][:-1] for row in cfg["history"][:cfg["iterations"]]]
+    for layers in queries:
+        with timer.op():
+            index.longest_shared_prefix(layers)
+            index.neighbours(layers, max_distance=1)
+    return len(queries)
+
+
+@scenario("nas_loop")
+def nas_loop(backend, cfg, timer):
+    _load_nas_history(backend, cfg)
+    with timer.op(), contextlib.redirect_stdout(io.StringIO()):
+        nas_kg_loop.nas_loop(iterations=cfg["iterations"], flush_every=cfg["batch_size"])
+    return cfg["iterations"]
+
+
+@scenario("cleanup_metadata")
+def cleanup_metadata(backend, cfg, timer):
+    _load_catalog(backend, cfg)
+    with backend.driver.session() as session, contextlib.redirect_stdout(io.StringIO()):
+        deleted = 0
+        for label in clean_metadata.METADATA_LABELS:
+            with timer.op():
+                deleted += clean_metadata.delete_label_batched(session, label, cfg["batch_size"])
+    return deleted
+
+
+@scenario("cleanup_experiments")
+def cleanup_experiments(backend, cfg, timer):
+    _load_nas_history(backend, cfg)
+    with backend.driver.session() as session:
+        with timer.op():
+            deleted = nas_cleanup_data.delete_nodes_by_label_batch(session, "Experiment",
+                                                                   batch_size=cfg["batch_size"])
+    return deleted
+
+
+# -- runner -------------------------------------------------------------------------
+
+def percentile(values, q):
+    """Nearest-rank percentile of `values` (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_scenario(name, cfg, backend_kind, latency_ms=0.0, trace_memory=True):
+    backend = Backend(backend_kind, latency_ms)
+    timer = Timer(backend)
+    ops = SCENARIOS[name](backend, cfg, timer)
+
+    peak = None
+    if trace_memory:
+        # Fresh graph, same work, op-level memory growth only
+        memory_backend = Backend(backend_kind, latency_ms)
+        memory_timer = Timer(memory_backend, trace_memory=True)
+        tracemalloc.start()
+        try:
+            SCENARIOS[name](memory_backend, cfg, memory_timer)
+        finally:
+            tracemalloc.stop()
+        peak = memory_timer.peak_growth
+
+    seconds = sum(timer.latencies)
+    ms = [t * 1000 for t in timer.latencies]
+    return {
+        "scenario": name,
+        "backend": backend_kind,
+        "ops": ops,
+        "timed_calls": len(ms),
+        "seconds": round(seconds, 6),
+        "throughput_ops_per_sec": round(ops / seconds, 2) if seconds > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(ms, 50), 4) if ms else None,
+            "p99": round(percentile(ms, 99), 4) if ms else None,
+            "max": round(max(ms), 4) if ms else None,
+        },
+        "peak_op_memory_bytes": peak,
+        **timer.counters,
+    }
+
+
+def build_config(args):
+    layers, history = synthetic_nas_history(args.architectures, args.experiments, seed=args.seed)
+    return {
+        "catalog": synthetic_catalog(args.datasets, args.files, seed=args.seed),
+        "features": synthetic_features(args.features, seed=args.seed),
+        "layers": layers,
+        "history": history,
+        "batch_size": args.batch_size,
+        "iterations": args.iterations,
+    }
+
+
+def run(args):
+    if args.backend == "neo4j":
+        if not args.neo4j_uri:
+            raise SystemExit("--backend neo4j wipes the database before every scenario: "
+                             "pass a disposable one with --neo4j-uri")
+        configure(uri=args.neo4j_uri)
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+    cfg = build_config(args)
+    results = []
+    for name in names:
+        result = run_scenario(name, cfg, args.backend, args.latency_ms, trace_memory=not args.no_memory)
+        results.append(result)
+        print(f"{name}: {result['throughput_ops_per_sec']} ops/s", file=sys.stderr)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "latency_ms": args.latency_ms,
+            "scale": {
+                "datasets": args.datasets, "files_per_dataset": args.files, "features": args.features,
+                "architectures": args.architectures, "experiments_per_arch": args.experiments,
+                "batch_size": args.batch_size, "iterations": args.iterations, "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+
+def print_table(report, out=sys.stdout):
+    print(f"{'scenario':<24} {'ops':>7} {'ops/s':>11} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'peak KiB':>9} {'stmts':>8}", file=out)
+    for r in report["results"]:
+        peak = r["peak_op_memory_bytes"]
+        print(f"{r['scenario']:<24} {r['ops']:>7} {r['throughput_ops_per_sec'] or 0:>11.1f} "
+              f"{r['latency_ms']['p50'] or 0:>9.3f} {r['latency_ms']['p99'] or 0:>9.3f} "
+              f"{peak / 1024 if peak is not None else float('nan'):>9.1f} {r.get('statements', ''):>8}",
+              file=out)
+
+
+# (metric path, higher is better)
+COMPARED = [
+    (("throughput_ops_per_sec",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p99"), False),
+    (("peak_op_memory_bytes",), False),
+    (("statements",), False),
+    (("round_trips",), False),
+]
+
+
+def _metric(result, path):
+    value = result
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(base, new, threshold=0.1):
+    """Per scenario and metric: base, new, change ratio and whether it regressed."""
+    base_by_name = {r["scenario"]: r for r in base["results"]}
+    rows = []
+    for result in new["results"]:
+        before = base_by_name.get(result["scenario"])
+        if before is None:
+            continue
+        for path, higher_is_better in COMPARED:
+            old, cur = _metric(before, path), _metric(result, path)
+            if old is None or cur is None:
+                continue
+            change = (cur - old) / old if old else (0.0 if cur == old else float("inf"))
+            worse = -change if higher_is_better else change
+            rows.append({
+                "scenario": result["scenario"],
+                "metric": ".".join(path),
+                "base": old,
+                "new": cur,
+                "change": round(change, 4),
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scaling benchmarks (see module docstring)")
+    sub = parser.add_subparsers(dest="cmd")
+
+    sp = sub.add_parser("run", help="Run the scenarios and report JSON")
+    sp.add_argument("--backend", choices=BACKENDS, default="memory")
+    sp.add_argument("--latency-ms", type=float, default=0.0, help="per round trip (recording backend)")
+    sp.add_argument("--neo4j-uri", help="disposable database for --backend neo4j (wiped before every scenario)")
+    sp.add_argument("--datasets", type=int, default=4)
+    sp.add_argument("--files", type=int, default=25, help="files per dataset")
+    sp.add_argument("--features", type=int, default=30, help="features per file (ingest scenarios)")
+    sp.add_argument("--architectures", type=int, default=200)
+    sp.add_argument("--experiments", type=int, default=3, help="experiments per architecture")
+    sp.add_argument("--batch-size", type=int, default=50)
+    sp.add_argument("--iterations", type=int, default=50, help="nas_loop iterations")
+    sp.add_argument("--seed", type=int, default=0)
+    sp.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    sp.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    sp.add_argument("--out", help="write the JSON report to this file")
+    sp.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+
+    sp = sub.add_parser("compare", help="Compare two JSON reports")
+    sp.add_argument("base")
+    sp.add_argument("new")
+    sp.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    sp.add_argument("--fail-on-regression", action="store_true", help="exit 1 if anything regressed")
+    sp.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.cmd == "run":
+        report = run(args)
+        if args.out:
+            with open(args.out, "w") as fh:
+                json.dump(report, fh, indent=2)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_table(report)
+    elif args.cmd == "compare":
+        with open(args.base) as fh:
+            base = json.load(fh)
+        with open(args.new) as fh:
+            new = json.load(fh)
+        if base["meta"]["scale"] != new["meta"]["scale"] or base["meta"]["backend"] != new["meta"]["backend"]:
+            print("warning: the reports were run at different scales or on different backends", file=sys.stderr)
+        rows = compare(base, new, args.threshold)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print(f"{'scenario':<24} {'metric':<24} {'base':>12} {'new':>12} {'change':>8}")
+            for row in rows:
+                flag = "  REGRESSION" if row["regression"] else ""
+                print(f"{row['scenario']:<24} {row['metric']:<24} {row['base']:>12.4g} {row['new']:>12.4g} "
+                      f"{row['change']:>+8.1%}{flag}")
+        if args.fail_on_regression and any(row["regression"] for row in rows):
+            sys.exit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Synthetic catalogs and NAS histories at configurable scale.
+
+Everything is derived from a seed, so two runs with the same arguments build
+the same graph:
+
+    manifest = synthetic_catalog(datasets=10, files_per_dataset=100)
+    features = synthetic_features(200)
+    layers, results = synthetic_nas_history(architectures=5000, experiments_per_arch=4)
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# The NAS helpers are flat scripts in nas/, not a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nas"))
+
+from nas_fingerprint import architecture_fingerprint, architecture_name
+
+# Layer nodes for a NAS history in one statement (the NAS scripts use nas_create_data.MERGE_LAYER per layer)
+SEED_LAYERS = """
+UNWIND $layers AS row
+MERGE (l:Layer {name: row.name})
+SET l += row.props
+"""
+
+LAYER_TYPES = [
+    ("Conv3x3", {"type": "conv", "kernel": 3}),
+    ("Conv5x5", {"type": "conv", "kernel": 5}),
+    ("DWConv3x3", {"type": "depthwise_conv", "kernel": 3}),
+    ("ReLU", {"type": "activation"}),
+    ("GELU", {"type": "activation"}),
+    ("BatchNorm", {"type": "normalization"}),
+    ("MaxPool2x2", {"type": "pool", "kernel": 2}),
+    ("AvgPool2x2", {"type": "pool", "kernel": 2}),
+    ("Dropout", {"type": "regularization"}),
+    ("Linear", {"type": "dense"}),
+]
+
+CATEGORIES = [("Index", None), ("Setting", None), ("Sensor", "R"), ("Sensor", "psia"), ("Sensor", "rpm")]
+
+
+def synthetic_features(count, seed=0):
+    """`count` feature rows in the build_feature_rows() shape."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        category, unit = CATEGORIES[0] if i < 2 else rng.choice(CATEGORIES)
+        rows.append({
+            "name": f"{category.lower()}_{i:04d}",
+            "category": category,
+            "unit": unit,
+            "desc": f"synthetic unit {unit}" if unit else None,
+        })
+    return rows
+
+
+def synthetic_catalog(datasets=4, files_per_dataset=25, rul_every=3, with_storage=True, seed=0):
+    """Manifest entries (see ingest_metadata.load_manifest) for datasets x files.
+
+    Every `rul_every`-th file is a RUL file; each file gets an asset shared by the
+    files of its dataset and, with_storage, its own Storage location.
+    """
+    rng = random.Random(seed)
+    entries = []
+    for d in range(datasets):
+        dataset = f"SYN-{d:03d}"
+        for f in range(files_per_dataset):
+            file_type = "RUL" if rul_every and f % rul_every == rul_every - 1 else rng.choice(["train", "test"])
+            name = f"{file_type}_{dataset}_{f:05d}"
+            entry = {"dataset": dataset, "file": name, "type": file_type, "asset": f"{dataset}-engine"}
+            if with_storage:
+                entry["storage"] = {
+                    "type": "minio",
+                    "path": f"/data/{dataset}/{name}.txt",
+                    "url": "localhost:9009",
+                    "name": f"{name.lower()}_storage",
+                }
+            entries.append(entry)
+    return entries
+
+
+def synthetic_layers():
+    """Layer rows for SEED_LAYERS and the {name: props} map fingerprints use."""
+    rows = [{"name": name, "props": dict(props)} for name, props in LAYER_TYPES]
+    return rows, {row["name"]: {"name": row["name"], **row["props"]} for row in rows}
+
+
+def synthetic_nas_history(architectures=200, experiments_per_arch=3, min_depth=2, max_depth=8, seed=0):
+    """(layer rows, ExperimentSink-style result rows) for a past NAS search.
+
+    Accuracy grows and latency rises with depth plus noise, so pruning and
+    Pareto queries see a realistic spread. Architectures are named by
+    fingerprint as nas_kg_loop does; duplicate layer sequences are skipped.
+    """
+    rng = random.Random(seed)
+    layers, layer_props = synthetic_layers()
+    names = [row["name"] for row in layers]
+    start = datetime(2026, 1, 1)
+    results = []
+    seen = set()
+    attempts = 0
+    while len(seen) < architectures and attempts < architectures * 20:
+        attempts += 1
+        sequence = [rng.choice(names) for _ in range(rng.randint(min_depth, max_depth))]
+        fingerprint = architecture_fingerprint(sequence, layer_props)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        arch = architecture_name(fingerprint)
+        for e in range(experiments_per_arch):
+            depth = len(sequence)
+            results.append({
+                "name": f"exp_{arch}_{e}",
+                "arch": arch,
+                "fingerprint": fingerprint,
+                "layers": sequence,
+                "acc": round(min(0.99, 0.6 + 0.04 * depth + rng.gauss(0, 0.03)), 4),
+                "lat": round(4 + 3 * depth + rng.expovariate(0.5), 3),
+                "time": (start + timedelta(minutes=len(results))).isoformat(),
+            })
+    return layers, results
@@ -0,0 +1,381 @@
+"""Export a catalog manifest as neo4j-admin import CSVs for first-time loads.
+
+Takes the same input as MetadataIngest.ingest_catalog, i.e. what
+ingest_metadata/ingest_rul_metadata and the asset/storage linking write, and
+produces the same graph: Dataset, DataFile, Feature, Category, Unit, Asset and
+Storage nodes with CONTAINS, HAS_FEATURE, BELONGS_TO, MEASURED_IN,
+linked_asset and is_stored_in relationships. The difference is that it writes
+the graph as CSV files that `neo4j-admin database import full` loads into an
+empty database without any transactions.
+
+Each node and relationship file gets a header row with typed IDs, e.g.
+name:ID(Dataset), and :START_ID(DataFile),:END_ID(Feature). Rows are written
+as entries are read. A .jsonl manifest is read line by line, so memory stays
+bounded by the shared dimension nodes (datasets, features, units, assets) plus
+the name of every distinct DataFile and the location of every Storage, which
+deduplication compares on (assume_unique_files=True drops the DataFile names).
+IDs are stable across runs: node
+names for the named labels, a hash of the location tuple for Storage, and a
+hash of the name for Asset.asset_id (MetadataIngest picks that one at random).
+
+Usage:
+    python bulk_export.py cmapss_catalog.json --out import/catalog --validate
+    python bulk_export.py --validate-only import/catalog
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+from ingest_metadata import build_feature_sets, content_hash, entry_feature_set, load_manifest
+
+# label -> (file stem, header); the first column is the ID
+NODE_FILES = {
+    "Dataset": ("datasets", ["name:ID(Dataset)"]),
+    # content_hash as ingest_catalog writes it, so the first sync_catalog after an import is a no-op
+    "DataFile": ("datafiles", ["name:ID(DataFile)", "type", "content_hash"]),
+    "Feature": ("features", ["name:ID(Feature)"]),
+    "Category": ("categories", ["name:ID(Category)"]),
+    "Unit": ("units", ["name:ID(Unit)", "description"]),
+    "Asset": ("assets", ["name:ID(Asset)", "asset_id:int", "asset_type"]),
+    # Storage has no single key, so its ID (not stored as a property) hashes the MERGE tuple
+    "Storage": ("storages", [":ID(Storage)", "type", "path", "storage_url", "storage_name"]),
+}
+
+# (relationship type, file stem, start ID space, end ID space)
+RELATIONSHIP_FILES = [
+    ("CONTAINS", "contains", "Dataset", "DataFile"),
+    ("HAS_FEATURE", "has_feature", "DataFile", "Feature"),
+    ("BELONGS_TO", "belongs_to", "Feature", "Category"),
+    ("MEASURED_IN", "measured_in", "Feature", "Unit"),
+    ("linked_asset", "linked_asset", "DataFile", "Asset"),
+    ("is_stored_in", "is_stored_in", "DataFile", "Storage"),
+]
+
+# Property columns after :START_ID/:END_ID
+RELATIONSHIP_PROPERTIES = {"HAS_FEATURE": ["column:int"]}
+
+# ID spaces with one entry per manifest file; validate_export keeps only their digests
+PER_FILE_LABELS = ("DataFile", "Storage")
+
+# Where the exported directory ends up inside the container (docker-compose mounts /import)
+CONTAINER_DIR = "/import/catalog"
+
+
+def digest(*parts):
+    """64-bit key for the large ID sets of validate_export."""
+    h = hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8)
+    return int.from_bytes(h.digest(), "big")
+
+
+def storage_id(storage):
+    key = "\x1f".join((storage["type"], storage["path"], storage["url"], storage["name"]))
+    return "storage-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def stable_asset_id(name):
+    # Same range as the random ids create_asset_and_link assigns
+    return 100000 + int(hashlib.sha1(name.encode("utf-8")).hexdigest()[:8], 16) % 900000
+
+
+def iter_manifest(manifest):
+    """Yield manifest entries; .jsonl/.ndjson files are streamed one entry per line."""
+    if isinstance(manifest, (str, os.PathLike)) and os.fspath(manifest).endswith((".jsonl", ".ndjson")):
+        with open(manifest, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    missing = [key for key in ("dataset", "file", "type") if key not in entry]
+                    if missing:
+                        raise ValueError(f"Manifest entry {entry!r} is missing {', '.join(missing)}")
+                    yield entry
+    elif isinstance(manifest, (str, os.PathLike, list, tuple, dict)):
+        yield from load_manifest(manifest)
+    else:
+        # Any other iterable (e.g. a generator) is consumed lazily
+        yield from manifest
+
+
+def relationship_header(rel, start, end):
+    return [f":START_ID({start})", f":END_ID({end})"] + RELATIONSHIP_PROPERTIES.get(rel, [])
+
+
+def _path(directory, stem, compress):
+    return os.path.join(directory, stem + (".csv.gz" if compress else ".csv"))
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+class CatalogExport:
+    """Streams manifest entries into one CSV per label and relationship type."""
+
+    def __init__(self, directory, compress=False, assume_unique_files=False):
+        self.directory = directory
+        self.compress = compress
+        self.assume_unique_files = assume_unique_files
+        self.feature_sets = build_feature_sets()
+        self.counts = {label: 0 for label in NODE_FILES}
+        self.counts.update({rel: 0 for rel, *_ in RELATIONSHIP_FILES})
+        self.duplicate_files = 0
+        # Keys already written per label; Storage IDs map to their location to catch collisions
+        self._seen = {label: set() for label in NODE_FILES}
+        self._storages = {}
+        self._feature_edges = set()
+        self._feature_sets = set()
+        self._files = {}
+        self._writers = {}
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for label, (stem, header) in NODE_FILES.items():
+            self._open(label, stem, header)
+        for rel, stem, start, end in RELATIONSHIP_FILES:
+            self._open(rel, stem, relationship_header(rel, start, end))
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self, key, stem, header):
+        fh = _open(_path(self.directory, stem, self.compress), "w")
+        self._files[key] = fh
+        self._writers[key] = csv.writer(fh)
+        self._writers[key].writerow(header)
+
+    def close(self):
+        for fh in self._files.values():
+            fh.close()
+        self._files.clear()
+
+    def _node(self, label, key, row):
+        seen = self._seen[label]
+        if key in seen:
+            return False
+        seen.add(key)
+        self._writers[label].writerow(row)
+        self.counts[label] += 1
+        return True
+
+    def _edge(self, rel, start, end):
+        self._writers[rel].writerow([start, end])
+        self.counts[rel] += 1
+
+    def _feature(self, feat):
+        self._node("Feature", feat["name"], [feat["name"]])
+        self._node("Category", feat["category"], [feat["category"]])
+        if (feat["name"], feat["category"]) not in self._feature_edges:
+            self._feature_edges.add((feat["name"], feat["category"]))
+            self._edge("BELONGS_TO", feat["name"], feat["category"])
+        if feat["unit"]:
+            # ON CREATE SET: the first description seen wins
+            self._node("Unit", feat["unit"], [feat["unit"], feat["desc"]])
+            if (feat["name"], feat["unit"]) not in self._feature_edges:
+                self._feature_edges.add((feat["name"], feat["unit"]))
+                self._edge("MEASURED_IN", feat["name"], feat["unit"])
+
+    def add(self, entry):
+        """Write the nodes/relationships of one manifest entry; repeated files are skipped."""
+        name = entry["file"]
+        kind = entry_feature_set(entry)
+        features = self.feature_sets[kind]
+        row = [name, entry["type"], content_hash(entry, features)]
+        if self.assume_unique_files:
+            self._writers["DataFile"].writerow(row)
+            self.counts["DataFile"] += 1
+        elif not self._node("DataFile", name, row):
+            self.duplicate_files += 1
+            return
+
+        self._node("Dataset", entry["dataset"], [entry["dataset"]])
+        self._edge("CONTAINS", entry["dataset"], name)
+
+        if kind not in self._feature_sets:
+            # Feature/Category/Unit nodes only once per feature set
+            self._feature_sets.add(kind)
+            for feat in features:
+                self._feature(feat)
+        self._writers["HAS_FEATURE"].writerows(
+            [name, feat["name"], column] for column, feat in enumerate(features))
+        self.counts["HAS_FEATURE"] += len(features)
+
+        if entry.get("asset"):
+            asset = entry["asset"]
+            self._node("Asset", asset, [asset, stable_asset_id(asset), "turbofan_engine"])
+            self._edge("linked_asset", name, asset)
+
+        storage = entry.get("storage")
+        if storage:
+            sid = storage_id(storage)
+            location = (storage["type"], storage["path"], storage["url"], storage["name"])
+            known = self._storages.get(sid)
+            if known is None:
+                self._storages[sid] = location
+                self._writers["Storage"].writerow([sid, *location])
+                self.counts["Storage"] += 1
+            elif known != location:
+                raise ValueError(f"Storage ID {sid} is the same for {known} and {location}")
+            self._edge("is_stored_in", name, sid)
+
+    def report(self):
+        return {
+            "directory": self.directory,
+            "nodes": {label: self.counts[label] for label in NODE_FILES},
+            "relationships": {rel: self.counts[rel] for rel, *_ in RELATIONSHIP_FILES},
+            "duplicate_files_skipped": self.duplicate_files,
+        }
+
+
+def export_catalog(manifest, directory, compress=False, assume_unique_files=False):
+    """Write the import CSVs for `manifest` (list, path or iterable of entries) into `directory`."""
+    with CatalogExport(directory, compress, assume_unique_files) as export:
+        for entry in iter_manifest(manifest):
+            export.add(entry)
+    return export.report()
+
+
+def _existing(directory, stem):
+    for compress in (False, True):
+        path = _path(directory, stem, compress)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def validate_export(directory, max_errors=20):
+    """Check an export offline: headers, unique IDs and that every relationship end exists.
+
+    Reads the node files once to collect the IDs per ID space (digests for the
+    per-file labels), then streams the relationship files against them.
+    """
+    ids = {label: set() for label in NODE_FILES}
+    keys = {label: digest if label in PER_FILE_LABELS else str for label in NODE_FILES}
+    errors = []
+    error_count = 0
+    report = {"nodes": {}, "relationships": {}}
+
+    def error(message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append(message)
+
+    for label, (stem, header) in NODE_FILES.items():
+        path = _existing(directory, stem)
+        if path is None:
+            error(f"missing node file {stem}.csv for {label}")
+            continue
+        rows = 0
+        with _open(path, "r") as fh:
+            reader = csv.reader(fh)
+            if next(reader, None) != header:
+                error(f"{path}: header is not {','.join(header)}")
+            space, key_of = ids[label], keys[label]
+            for line, row in enumerate(reader, start=2):
+                rows += 1
+                if len(row) != len(header):
+                    error(f"{path}:{line}: {len(row)} columns, expected {len(header)}")
+                    continue
+                if not row[0]:
+                    error(f"{path}:{line}: empty ID")
+                    continue
+                key = key_of(row[0])
+                if key in space:
+                    error(f"{path}:{line}: duplicate {label} ID {row[0]!r}")
+                space.add(key)
+        report["nodes"][label] = rows
+
+    for rel, stem, start, end in RELATIONSHIP_FILES:
+        path = _existing(directory, stem)
+        if path is None:
+            error(f"missing relationship file {stem}.csv for {rel}")
+            continue
+        rows = 0
+        with _open(path, "r") as fh:
+            reader = csv.reader(fh)
+            header = relationship_header(rel, start, end)
+            if next(reader, None) != header:
+                error(f"{path}: header is not {','.join(header)}")
+            # Rows come grouped by start node, so repeated IDs are checked once
+            last = (None, None)
+            for line, row in enumerate(reader, start=2):
+                rows += 1
+                if len(row) != len(header):
+                    error(f"{path}:{line}: {len(row)} columns, expected {len(header)}")
+                    continue
+                if row[0] != last[0] and keys[start](row[0]) not in ids[start]:
+                    error(f"{path}:{line}: {rel} start {row[0]!r} is not a {start} ID")
+                if row[1] != last[1] and keys[end](row[1]) not in ids[end]:
+                    error(f"{path}:{line}: {rel} end {row[1]!r} is not a {end} ID")
+                last = row
+        report["relationships"][rel] = rows
+
+    report["errors"] = errors
+    report["error_count"] = error_count
+    report["valid"] = error_count == 0
+    return report
+
+
+def import_command(directory, database="neo4j", container_dir=CONTAINER_DIR):
+    """neo4j-admin (5.x) arguments loading the export once it is copied to `container_dir`."""
+    args = ["neo4j-admin", "database", "import", "full", "--overwrite-destination"]
+    for label, (stem, _) in NODE_FILES.items():
+        path = _existing(directory, stem)
+        if path:
+            args.append(f"--nodes={label}={container_dir}/{os.path.basename(path)}")
+    for rel, stem, _, _ in RELATIONSHIP_FILES:
+        path = _existing(directory, stem)
+        if path:
+            args.append(f"--relationships={rel}={container_dir}/{os.path.basename(path)}")
+    args.append(database)
+    return args
+
+
+def print_import_steps(directory, database="neo4j"):
+    # neo4j-admin import needs the database stopped; the compose volumes stay attached
+    print("Load into an empty database (replaces it) with:")
+    print("  docker compose stop neo4j")
+    print(f"  docker cp {directory}/. neo4j:{CONTAINER_DIR}")
+    print("  docker compose run --rm neo4j " + " ".join(import_command(directory, database)))
+    print("  docker compose start neo4j")
+    print("  python metadata_schema.py   # constraints/indexes are not part of the import")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a catalog manifest as neo4j-admin import CSVs")
+    parser.add_argument("manifest", nargs="?", help="JSON/YAML manifest or JSON Lines (.jsonl) file")
+    parser.add_argument("--out", default=os.path.join("import", "catalog"), help="output directory")
+    parser.add_argument("--gzip", action="store_true", help="write .csv.gz files")
+    parser.add_argument("--assume-unique-files", action="store_true",
+                        help="skip DataFile deduplication (manifest has each file once)")
+    parser.add_argument("--validate", action="store_true", help="check referential integrity after exporting")
+    parser.add_argument("--validate-only", metavar="DIR", help="only validate an existing export")
+    parser.add_argument("--database", default="neo4j")
+    args = parser.parse_args()
+
+    if args.validate_only:
+        report = validate_export(args.validate_only)
+        print(json.dumps(report, indent=2))
+        sys.exit(0 if report["valid"] else 1)
+    if not args.manifest:
+        parser.error("manifest is required unless --validate-only is given")
+
+    report = export_catalog(args.manifest, args.out, compress=args.gzip,
+                            assume_unique_files=args.assume_unique_files)
+    print(json.dumps(report, indent=2))
+    if args.validate:
+        validation = validate_export(args.out)
+        print(json.dumps(validation, indent=2))
+        if not validation["valid"]:
+            sys.exit(1)
+    print_import_steps(args.out, args.database)
+
+
+if __name__ == "__main__":
+    main()
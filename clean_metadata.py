@@ -1,27 +1,167 @@
-from neo4j import GraphDatabase
+import argparse
+
+from neo4j_connection import configure, get_driver, close_driver
+
+# Connection details come from NEO4J_* env vars (see neo4j_connection.py)
+
+# Labels written by ingest_metadata.py, in deletion order
+METADATA_LABELS = ['Dataset', 'DataFile', 'Feature', 'Category', 'Unit', 'Asset', 'Storage']
+
+# Everything a Dataset's subgraph can reach. DataFiles that another Dataset also
+# CONTAINS are left alone.
+DATASET_SCOPE = """
+MATCH (ds:Dataset {name: $dataset})
+OPTIONAL MATCH (ds)-[:CONTAINS]->(df:DataFile)
+WHERE NOT EXISTS { MATCH (other:Dataset)-[:CONTAINS]->(df) WHERE other <> ds }
+RETURN elementId(ds) AS dataset, collect(elementId(df)) AS files
+"""
+
+# (label, relationship that references it, label of the referrers) in deletion
+# order: a node is deleted only when every referrer is deleted too
+DEPENDENTS = [
+    ('Feature', 'HAS_FEATURE', 'DataFile'),
+    ('Category', 'BELONGS_TO', 'Feature'),
+    ('Unit', 'MEASURED_IN', 'Feature'),
+    ('Asset', 'linked_asset', 'DataFile'),
+    ('Storage', 'is_stored_in', 'DataFile'),
+]
+
+# Nodes of `label` referenced by the doomed referrers and by nothing else
+ORPHANED_BY = """
+UNWIND $doomed AS id
+MATCH (m)-[:{rel}]->(n:{label})
+WHERE elementId(m) = id
+WITH DISTINCT n
+WHERE NOT EXISTS {{ MATCH (other)-[:{rel}]->(n) WHERE NOT elementId(other) IN $doomed }}
+RETURN collect(elementId(n)) AS ids
+"""
+
+DELETE_LABEL_BATCH = """
+MATCH (n:{label})
+WITH n LIMIT $limit
+DETACH DELETE n
+RETURN count(*) AS deleted
+"""
+
+# Every metadata node in one transaction (clean_metadata, for small graphs)
+DELETE_METADATA = """
+MATCH (n)
+WHERE any(label IN labels(n) WHERE label IN $labels)
+DETACH DELETE n
+"""
+
+COUNT_LABEL = "MATCH (n:{label}) RETURN count(n) AS count"
+
+# Re-checks the orphan condition at delete time in case a concurrent ingest
+# linked the node again since the plan was read
+DELETE_IDS = """
+UNWIND $ids AS id
+MATCH (n)
+WHERE elementId(n) = id {guard}
+DETACH DELETE n
+RETURN count(*) AS deleted
+"""
+
+
+def delete_label_batched(session, label, batch_size=10000):
+    """Delete all nodes of one label, `batch_size` per transaction (label scan)."""
+    query = DELETE_LABEL_BATCH.format(label=label)
+    total = 0
+    while True:
+        deleted = session.execute_write(lambda tx: tx.run(query, limit=batch_size).single()["deleted"])
+        if not deleted:
+            return total
+        total += deleted
+        print(f"  {label}: deleted {total}")
+
+
+def count_labels(session, labels=METADATA_LABELS):
+    return {label: session.run(COUNT_LABEL.format(label=label)).single()["count"] for label in labels}
 
-# Connection details
-uri = "bolt://localhost:7687"
-username = "neo4j"
-password = "cool@1983"  # Match with docker compose yaml
 
 # Function to clear all relevant metadata nodes and relationships
-def clean_metadata(tx):
-    # You can narrow the deletion scope by adjusting labels below
-    query = """
-    MATCH (n)
-    WHERE any(label IN labels(n) WHERE label IN ['Dataset','DataFile', 'Feature', 'Category', 'Unit', 'Asset', 'Storage'])
-    DETACH DELETE n
+def clean_metadata(tx, labels=METADATA_LABELS):
+    """Delete every metadata node in the caller's transaction (session.execute_write(clean_metadata))."""
+    tx.run(DELETE_METADATA, labels=list(labels))
+
+
+def clean_metadata_batched(session, labels=METADATA_LABELS, batch_size=10000):
+    """Delete every metadata node, label by label, in bounded transactions."""
+    return {label: delete_label_batched(session, label, batch_size) for label in labels}
+
+
+def plan_dataset_cleanup(session, dataset):
+    """Element ids to delete per label for one Dataset's subgraph ({} if unknown).
+
+    DataFiles only in this Dataset, then Features/Categories/Units/Assets/Storage
+    that nothing outside the plan still references.
     """
-    tx.run(query)
+    def read(tx):
+        record = tx.run(DATASET_SCOPE, dataset=dataset).single()
+        if record is None:
+            return {}
+        plan = {'Dataset': [record["dataset"]], 'DataFile': record["files"]}
+        for label, rel, referrer in DEPENDENTS:
+            query = ORPHANED_BY.format(rel=rel, label=label)
+            plan[label] = tx.run(query, doomed=plan[referrer]).single()["ids"]
+        return plan
+
+    return session.execute_read(read)
+
+
+def delete_ids_batched(session, ids, guard="", batch_size=10000):
+    query = DELETE_IDS.format(guard=guard)
+    total = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        total += session.execute_write(lambda tx: tx.run(query, ids=chunk).single()["deleted"])
+    return total
+
+
+def clean_dataset(session, dataset, batch_size=10000):
+    """Delete one Dataset, its DataFiles and the metadata nodes they orphan."""
+    plan = plan_dataset_cleanup(session, dataset)
+    if not plan:
+        return {}
+    deleted = {'DataFile': delete_ids_batched(session, plan['DataFile'], batch_size=batch_size)}
+    for label, rel, _ in DEPENDENTS:
+        guard = f"AND NOT ()-[:{rel}]->(n)"
+        deleted[label] = delete_ids_batched(session, plan[label], guard, batch_size)
+    deleted['Dataset'] = delete_ids_batched(session, plan['Dataset'], batch_size=batch_size)
+    return deleted
+
 
 # Main execution
 def main():
-    driver = GraphDatabase.driver(uri, auth=(username, password))
-    with driver.session() as session:
-        session.execute_write(clean_metadata)
-        print("Metadata nodes and relationships have been deleted.")
-    driver.close()
+    parser = argparse.ArgumentParser(description="Delete metadata nodes in bounded batches")
+    parser.add_argument("--dataset", help="Only delete this Dataset's subgraph")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Nodes per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted")
+    parser.add_argument("--uri")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+    configure(uri=args.uri, user=args.user, password=args.password)
+
+    with get_driver().session() as session:
+        if args.dataset:
+            if args.dry_run:
+                counts = {label: len(ids) for label, ids in plan_dataset_cleanup(session, args.dataset).items()}
+            else:
+                counts = clean_dataset(session, args.dataset, args.batch_size)
+            if not counts:
+                print(f"Dataset '{args.dataset}' not found.")
+        elif args.dry_run:
+            counts = count_labels(session)
+        else:
+            counts = clean_metadata_batched(session, batch_size=args.batch_size)
+
+        verb = "Would delete" if args.dry_run else "Deleted"
+        for label, count in counts.items():
+            print(f"{verb} {count} {label} nodes")
+        if counts and not args.dry_run:
+            print("Metadata nodes and relationships have been deleted.")
+    close_driver()
 
 if __name__ == "__main__":
     main()
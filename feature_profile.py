@@ -0,0 +1,278 @@
+"""Per-feature statistics of DataFiles, written onto their HAS_FEATURE edges.
+
+For every DataFile the storage location and column order come from the KG
+(kg_loader.KGDataLoader.plan). The source text is then streamed in row
+chunks by a pool of worker processes, one file per task. The first pass
+computes count/nulls/min/max/mean/std per column with NumPy, merging chunks
+with the parallel variance formula. The second pass fills `bins` equal-width
+histogram bins between min and max. Results are written in batches of
+UNWIND ... SET r += row.stats, so consumers can read normalisation
+constants with read_profiles() instead of rescanning the data.
+
+Properties set on (DataFile)-[r:HAS_FEATURE]->(Feature):
+    count, nulls, min, max, mean, std (population), histogram (counts),
+    histogram_edges, profiled_at (ISO timestamp)
+
+Usage:
+    python feature_profile.py train_FD001 test_FD001
+    python feature_profile.py --type train --workers 8 --chunk-rows 100000
+    python feature_profile.py --all --bins 0            # stats only, one pass
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import islice
+
+import numpy as np
+
+from kg_loader import KGDataLoader, STORAGE_RESOLVERS
+from neo4j_connection import close_driver, configure
+
+WRITE_PROFILES = """
+    UNWIND $rows AS row
+    MATCH (df:DataFile {name: row.file})-[r:HAS_FEATURE]->(f:Feature {name: row.feature})
+    SET r += row.stats
+"""
+
+READ_PROFILES = """
+    MATCH (df:DataFile {name: $file})-[r:HAS_FEATURE]->(f:Feature)
+    RETURN f.name AS feature, r.column AS column, r.count AS count, r.nulls AS nulls,
+           r.min AS min, r.max AS max, r.mean AS mean, r.std AS std,
+           r.histogram AS histogram, r.histogram_edges AS histogram_edges, r.profiled_at AS profiled_at
+    ORDER BY column
+"""
+
+DEFAULT_CHUNK_ROWS = 50000
+DEFAULT_BINS = 20
+DEFAULT_BATCH_SIZE = 500
+
+
+def _to_float(token):
+    try:
+        return float(token)
+    except ValueError:
+        return math.nan
+
+
+def iter_chunks(path, width, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (rows x width) float64 arrays of a whitespace-separated text file.
+
+    Tokens that are not numbers (NA, null, ...) become NaN and count as nulls.
+    """
+    with open(path, "rb") as fh:
+        while True:
+            raw = list(islice(fh, chunk_rows))
+            if not raw:
+                return
+            lines = [line for line in raw if line.strip()]
+            if not lines:
+                continue
+            tokens = b" ".join(lines).split()
+            if len(tokens) != len(lines) * width:
+                raise ValueError(f"{path}: expected {width} columns per row")
+            try:
+                values = np.array(tokens, dtype=np.float64)
+            except ValueError:
+                values = np.array([_to_float(token) for token in tokens], dtype=np.float64)
+            yield values.reshape(len(lines), width)
+
+
+class ColumnStats:
+    """Running per-column count/nulls/min/max/mean/M2 over row chunks."""
+
+    def __init__(self, width):
+        self.count = np.zeros(width, dtype=np.int64)
+        self.nulls = np.zeros(width, dtype=np.int64)
+        self.min = np.full(width, np.nan)
+        self.max = np.full(width, np.nan)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, chunk):
+        missing = np.isnan(chunk)
+        n_b = (~missing).sum(axis=0)
+        self.nulls += missing.sum(axis=0)
+        # fmin/fmax skip NaN (all-NaN columns stay NaN)
+        self.min = np.fmin(self.min, np.fmin.reduce(chunk, axis=0))
+        self.max = np.fmax(self.max, np.fmax.reduce(chunk, axis=0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(n_b > 0, np.nansum(chunk, axis=0) / n_b, 0.0)
+            m2_b = np.nansum((chunk - mean_b) ** 2, axis=0)
+            n = self.count + n_b
+            delta = mean_b - self.mean
+            safe_n = np.maximum(n, 1)
+            self.mean = self.mean + delta * n_b / safe_n
+            self.m2 = self.m2 + m2_b + delta ** 2 * self.count * n_b / safe_n
+        self.count = n
+
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, np.sqrt(self.m2 / np.maximum(self.count, 1)), np.nan)
+
+
+def histogram_pass(path, width, stats, bins, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """(columns x bins) counts between each column's min and max."""
+    counts = np.zeros(width * bins, dtype=np.int64)
+    low = np.nan_to_num(stats.min)
+    span = np.nan_to_num(stats.max) - low
+    # Constant columns land in the first bin
+    scale = np.where(span > 0, bins / np.where(span > 0, span, 1), 0.0)
+    offsets = np.arange(width) * bins
+    for chunk in iter_chunks(path, width, chunk_rows):
+        valid = ~np.isnan(chunk)
+        filled = np.where(valid, chunk, low)
+        index = np.clip(((filled - low) * scale).astype(np.int64), 0, bins - 1) + offsets
+        counts += np.bincount(index[valid], minlength=width * bins)
+    return counts.reshape(width, bins)
+
+
+def profile_source(path, width, bins=DEFAULT_BINS, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Per-column stats of one text file; runs in a worker process.
+
+    Returns a list (one dict per column) of plain Python values.
+    """
+    stats = ColumnStats(width)
+    for chunk in iter_chunks(path, width, chunk_rows):
+        stats.update(chunk)
+    histograms = histogram_pass(path, width, stats, bins, chunk_rows) if bins else None
+    std = stats.std()
+
+    columns = []
+    for i in range(width):
+        empty = stats.count[i] == 0
+        column = {
+            "count": int(stats.count[i]),
+            "nulls": int(stats.nulls[i]),
+            "min": None if empty else float(stats.min[i]),
+            "max": None if empty else float(stats.max[i]),
+            "mean": None if empty else float(stats.mean[i]),
+            "std": None if empty else float(std[i]),
+        }
+        if histograms is not None and not empty:
+            column["histogram"] = histograms[i].tolist()
+            column["histogram_edges"] = np.linspace(stats.min[i], stats.max[i], bins + 1).tolist()
+        columns.append(column)
+    return columns
+
+
+def write_profiles_tx(tx, rows):
+    tx.run(WRITE_PROFILES, rows=rows)
+
+
+def read_profiles(driver, file_name):
+    """Stored statistics of `file_name`, in column order."""
+    with driver.session() as session:
+        return [record.data() for record in session.run(READ_PROFILES, file=file_name)]
+
+
+def normalisation_constants(driver, file_name):
+    """{feature: (mean, std)} of a profiled DataFile."""
+    return {row["feature"]: (row["mean"], row["std"]) for row in read_profiles(driver, file_name)}
+
+
+def profile_files(file_names, workers=None, bins=DEFAULT_BINS, chunk_rows=DEFAULT_CHUNK_ROWS,
+                  batch_size=DEFAULT_BATCH_SIZE, loader=None):
+    """Profile `file_names` across a process pool and write the stats to the KG.
+
+    Plans (storage and columns) are read and stats written in this process;
+    the workers only read files. Stats of array column i are written to the
+    HAS_FEATURE edge with column = i (KGDataLoader.plan checks the columns are
+    0..n-1). Returns one report per file.
+    """
+    own_loader = loader is None
+    loader = loader or KGDataLoader()
+    try:
+        return _profile_files(loader, file_names, workers, bins, chunk_rows, batch_size)
+    finally:
+        if own_loader:
+            loader.close()
+
+
+def _profile_files(loader, file_names, workers, bins, chunk_rows, batch_size):
+    pending = []
+    reports = []
+
+    def flush(session):
+        if pending:
+            session.execute_write(write_profiles_tx, list(pending))
+            pending.clear()
+
+    with loader.driver.session() as session, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for file_name in file_names:
+            plan = loader.plan(file_name)
+            storage = plan["storage"]
+            resolver = STORAGE_RESOLVERS.get(storage["type"])
+            if resolver is None:
+                raise ValueError(f"Unsupported storage type {storage['type']!r}")
+            source = resolver(storage, loader.cache_dir)
+            # Feature name by array column, from HAS_FEATURE.column rather than result order
+            features = [None] * len(plan["features"])
+            for row in plan["features"]:
+                features[row["column"]] = row["feature"]
+            future = pool.submit(profile_source, source, len(features), bins, chunk_rows)
+            futures[future] = (file_name, features, time.perf_counter())
+
+        for future in as_completed(futures):
+            file_name, features, started = futures[future]
+            columns = future.result()
+            profiled_at = datetime.now(timezone.utc).isoformat()
+            for feature, stats in zip(features, columns):
+                pending.append({"file": file_name, "feature": feature,
+                                "stats": {**stats, "profiled_at": profiled_at}})
+                if len(pending) >= batch_size:
+                    flush(session)
+            reports.append({
+                "file": file_name,
+                "columns": len(columns),
+                "rows": max((column["count"] + column["nulls"] for column in columns), default=0),
+                "seconds": round(time.perf_counter() - started, 3),
+            })
+        flush(session)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile DataFile columns and store the stats on HAS_FEATURE")
+    parser.add_argument("files", nargs="*", help="DataFile names")
+    parser.add_argument("--type", help="profile every DataFile of this type")
+    parser.add_argument("--all", action="store_true", help="profile every DataFile")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS, help="histogram bins (0: no histogram)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="HAS_FEATURE rows per write")
+    parser.add_argument("--uri")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+    configure(uri=args.uri, user=args.user, password=args.password)
+
+    from query_metadata import MetadataQuery
+
+    files = list(args.files)
+    if args.type or args.all:
+        query = MetadataQuery()
+        try:
+            if args.type:
+                files.extend(query.iter_files_by_type(args.type))
+            else:
+                files.extend(row["file"] for row in query.iter_all_datasets_and_files())
+        finally:
+            query.close()
+    if not files:
+        parser.error("give DataFile names, --type or --all")
+
+    try:
+        for report in profile_files(dict.fromkeys(files), args.workers, args.bins, args.chunk_rows,
+                                    args.batch_size):
+            print(f"{report['file']}: {report['rows']} rows x {report['columns']} columns "
+                  f"in {report['seconds']}s")
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
-from neo4j import GraphDatabase
+from neo4j_connection import acquire_driver, release_driver
+from metadata_cache import invalidate_datafile
+from metadata_schema import ensure_schema
+import hashlib
+import json
+import os
 import random
+import time
 
 unit_info = {
     "R": "Rankine temperature scale",
@@ -35,147 +41,616 @@ sensor_names = [
     ("(Low-pressure turbines Cool air flow)", None)
 ]
 
+# Cypher statements, shared by the sync tx functions below and async_metadata.py
+MERGE_DATAFILE = """
+    MERGE (ds:Dataset {name: $dataset})
+    MERGE (df:DataFile {name: $file})
+    SET df.type = $file_type
+    MERGE (ds)-[:CONTAINS]->(df)
+"""
+
+MERGE_FEATURE = """
+    MERGE (f:Feature {name: $name})
+    MERGE (c:Category {name: $category})
+    MERGE (f)-[:BELONGS_TO]->(c)
+    MERGE (df:DataFile {name: $file})
+    MERGE (df)-[r:HAS_FEATURE]->(f)
+    SET r.column = $column
+"""
+
+MERGE_FEATURE_UNIT = """
+    MERGE (u:Unit {name: $unit})
+    ON CREATE SET u.description = $desc
+    MERGE (f:Feature {name: $name})
+    MERGE (f)-[:MEASURED_IN]->(u)
+"""
+
+MERGE_RUL_FEATURE = """
+    MERGE (f:Feature {name: 'RUL_Value'})
+    MERGE (c:Category {name: 'RUL'})
+    MERGE (f)-[:BELONGS_TO]->(c)
+    MERGE (df:DataFile {name: $file})
+    MERGE (df)-[r:HAS_FEATURE]->(f)
+    SET r.column = 0
+"""
+
+# Dataset/DataFile plus every Feature, Category and HAS_FEATURE edge in one statement
+MERGE_DATAFILE_FEATURES_BULK = """
+    MERGE (ds:Dataset {name: $dataset})
+    MERGE (df:DataFile {name: $file})
+    SET df.type = $file_type
+    MERGE (ds)-[:CONTAINS]->(df)
+    WITH df
+    UNWIND range(0, size($features) - 1) AS column
+    WITH df, column, $features[column] AS feat
+    MERGE (f:Feature {name: feat.name})
+    MERGE (c:Category {name: feat.category})
+    MERGE (f)-[:BELONGS_TO]->(c)
+    MERGE (df)-[r:HAS_FEATURE]->(f)
+    SET r.column = column
+"""
+
+MERGE_UNITS_BULK = """
+    UNWIND $units AS row
+    MERGE (u:Unit {name: row.unit})
+    ON CREATE SET u.description = row.desc
+    MERGE (f:Feature {name: row.name})
+    MERGE (f)-[:MEASURED_IN]->(u)
+"""
+
+MERGE_DATAFILES_BULK = """
+    UNWIND $files AS row
+    MERGE (ds:Dataset {name: row.dataset})
+    MERGE (df:DataFile {name: row.file})
+    SET df.type = row.type, df.content_hash = row.content_hash
+    MERGE (ds)-[:CONTAINS]->(df)
+"""
+
+MERGE_FEATURES_BULK = """
+    UNWIND $features AS feat
+    MERGE (f:Feature {name: feat.name})
+    MERGE (c:Category {name: feat.category})
+    MERGE (f)-[:BELONGS_TO]->(c)
+"""
+
+# The column list is looked up per file from $feature_sets
+MERGE_HAS_FEATURE_BULK = """
+    UNWIND $files AS row
+    MATCH (df:DataFile {name: row.file})
+    WITH df, $feature_sets[row.feature_set] AS feature_names
+    UNWIND range(0, size(feature_names) - 1) AS column
+    MATCH (f:Feature {name: feature_names[column]})
+    MERGE (df)-[r:HAS_FEATURE]->(f)
+    SET r.column = column
+"""
+
+MERGE_ASSETS_BULK = """
+    UNWIND $assets AS row
+    MERGE (a:Asset {name: row.name})
+    ON CREATE SET a.asset_id = row.asset_id, a.asset_type = 'turbofan_engine'
+    ON MATCH SET a.asset_type = 'turbofan_engine'
+    MERGE (df:DataFile {name: row.file})
+    MERGE (df)-[:linked_asset]->(a)
+"""
+
+MERGE_STORAGES_BULK = """
+    UNWIND $storages AS row
+    MERGE (s:Storage {type: row.type, path: row.path, storage_url: row.url, storage_name: row.name})
+    MERGE (df:DataFile {name: row.file})
+    MERGE (df)-[:is_stored_in]->(s)
+"""
+
+MERGE_ASSET = """
+    MERGE (a:Asset {name: $asset_name})
+    ON CREATE SET a.asset_id = $asset_id, a.asset_type = 'turbofan_engine'
+    ON MATCH SET a.asset_type = 'turbofan_engine'
+    MERGE (df:DataFile {name: $datafile_name})
+    MERGE (df)-[:linked_asset]->(a)
+"""
+
+MERGE_STORAGE = """
+    MERGE (s:Storage {type: $storage_type, path: $storage_path, storage_url: $storage_url, storage_name: $storage_name})
+    MERGE (df:DataFile {name: $datafile_name})
+    MERGE (df)-[:is_stored_in]->(s)
+"""
+
+# -- incremental sync (sync_catalog) --
+
+# The one read over the whole manifest: stored hash per existing DataFile
+CONTENT_HASHES = """
+    UNWIND $files AS file
+    MATCH (df:DataFile {name: file})
+    RETURN df.name AS file, df.content_hash AS content_hash
+"""
+
+# Current links of the changed files only, to diff against the manifest
+DATAFILE_STATE = """
+    UNWIND $files AS file
+    MATCH (df:DataFile {name: file})
+    OPTIONAL MATCH (ds:Dataset)-[:CONTAINS]->(df)
+    WITH df, collect(ds.name) AS datasets
+    OPTIONAL MATCH (df)-[:linked_asset]->(a:Asset)
+    WITH df, datasets, collect(a.name) AS assets
+    OPTIONAL MATCH (df)-[:is_stored_in]->(s:Storage)
+    WITH df, datasets, assets,
+         collect(s {.type, .path, url: s.storage_url, name: s.storage_name}) AS storages
+    OPTIONAL MATCH (df)-[r:HAS_FEATURE]->(f:Feature)
+    RETURN df.name AS file, df.type AS type, datasets, assets, storages,
+           [x IN collect({name: f.name, column: r.column}) WHERE x.name IS NOT NULL] AS features
+"""
+
+UPDATE_DATAFILES = """
+    UNWIND $files AS row
+    MATCH (df:DataFile {name: row.file})
+    SET df.type = row.type, df.content_hash = row.content_hash
+"""
+
+REMOVE_CONTAINS = """
+    UNWIND $rows AS row
+    MATCH (ds:Dataset {name: row.dataset})-[r:CONTAINS]->(df:DataFile {name: row.file})
+    DELETE r
+"""
+
+# Adds new HAS_FEATURE edges and moves existing ones to their new column
+SET_HAS_FEATURE = """
+    UNWIND $rows AS row
+    MATCH (df:DataFile {name: row.file})
+    MATCH (f:Feature {name: row.feature})
+    MERGE (df)-[r:HAS_FEATURE]->(f)
+    SET r.column = row.column
+"""
+
+REMOVE_HAS_FEATURE = """
+    UNWIND $rows AS row
+    MATCH (df:DataFile {name: row.file})-[r:HAS_FEATURE]->(f:Feature {name: row.feature})
+    DELETE r
+"""
+
+REMOVE_ASSET_LINKS = """
+    UNWIND $rows AS row
+    MATCH (df:DataFile {name: row.file})-[r:linked_asset]->(a:Asset {name: row.name})
+    DELETE r
+"""
+
+# A Storage belongs to its file; drop it once nothing is stored in it
+REMOVE_STORAGE_LINKS = """
+    UNWIND $rows AS row
+    MATCH (df:DataFile {name: row.file})-[r:is_stored_in]->
+          (s:Storage {type: row.type, path: row.path, storage_url: row.url, storage_name: row.name})
+    DELETE r
+    WITH DISTINCT s
+    WHERE NOT (s)<-[:is_stored_in]-()
+    DELETE s
+"""
+
 class MetadataIngest:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None, driver=None, bootstrap_schema=True):
+        # An explicit driver (e.g. a recording fake for benchmarks) takes precedence,
+        # otherwise use the process-wide pooled driver (settings from neo4j_connection)
+        self._shared = driver is None
+        self.driver = driver or acquire_driver(uri, user, password)
+        self._schema_ready = not bootstrap_schema
 
     def close(self):
-        self.driver.close()
-
-    def ingest_metadata(self, dataset_name, datafile_name, file_type):
-        """Ingest train or test datafile metadata (full feature columns)"""
+        if self._shared:
+            release_driver(self.driver)
+        else:
+            self.driver.close()
+
+    def _ensure_schema(self):
+        # Constraints/indexes are created on the first write, not in __init__
+        if not self._schema_ready:
+            ensure_schema(self.driver)
+            self._schema_ready = True
+
+    def ingest_metadata(self, dataset_name, datafile_name, file_type, bulk=False, features=None):
+        """Ingest train or test datafile metadata (full feature columns)
+
+        With bulk=True all feature columns are sent as one parameter list and
+        written with UNWIND, i.e. two statements per file instead of two per feature.
+        `features` replaces the CMAPSS columns with other rows of the
+        build_feature_rows() shape (name, category, unit, desc).
+        """
+        if features is None:
+            features = build_feature_rows(index_names, setting_names, sensor_names, unit_info)
+        self._ensure_schema()
         with self.driver.session() as session:
             session.execute_write(
-                ingest_metadata_tx,
+                ingest_features_bulk_tx if bulk else ingest_feature_rows_tx,
                 dataset_name,
                 datafile_name,
                 file_type,
-                unit_info,
-                index_names,
-                setting_names,
-                sensor_names
+                features
             )
+        invalidate_datafile(datafile_name)
 
-    def ingest_rul_metadata(self, dataset_name, datafile_name, file_type="RUL"):
+    def ingest_rul_metadata(self, dataset_name, datafile_name, file_type="RUL", bulk=False):
         """Ingest RUL file metadata with only one feature 'RUL_Value'"""
+        self._ensure_schema()
         with self.driver.session() as session:
-            session.execute_write(
-                ingest_rul_metadata_tx,
-                dataset_name,
-                datafile_name,
-                file_type,
-                unit_info
-            )
-
-def ingest_metadata_tx(tx, dataset_name, datafile_name, file_type, unit_info,
-                       index_names, setting_names, sensor_names):
-    # Create Dataset and DataFile nodes, set file_type property
-    tx.run("""
-        MERGE (ds:Dataset {name: $dataset})
-        MERGE (df:DataFile {name: $file})
-        SET df.type = $file_type
-        MERGE (ds)-[:CONTAINS]->(df)
-    """, dataset=dataset_name, file=datafile_name, file_type=file_type)
-
-    def create_feature(tx, name, category, unit):
-        tx.run("""
-            MERGE (f:Feature {name: $name})
-            MERGE (c:Category {name: $category})
-            MERGE (f)-[:BELONGS_TO]->(c)
-            MERGE (df:DataFile {name: $file})
-            MERGE (df)-[:HAS_FEATURE]->(f)
-        """, name=name, category=category, file=datafile_name)
-
-        if unit:
-            desc = unit_info.get(unit, None)
-            tx.run("""
-                MERGE (u:Unit {name: $unit})
-                ON CREATE SET u.description = $desc
-                MERGE (f:Feature {name: $name})
-                MERGE (f)-[:MEASURED_IN]->(u)
-            """, unit=unit, desc=desc, name=name)
-
-    for name in index_names:
-        create_feature(tx, name, "Index", None)
-
-    for name in setting_names:
-        create_feature(tx, name, "Setting", None)
-
-    for name, unit in sensor_names:
-        create_feature(tx, name, "Sensor", unit)
-
-def ingest_rul_metadata_tx(tx, dataset_name, datafile_name, file_type, unit_info):
-    # Create Dataset and DataFile nodes for RUL file
-    tx.run("""
-        MERGE (ds:Dataset {name: $dataset})
-        MERGE (df:DataFile {name: $file})
-        SET df.type = $file_type
-        MERGE (ds)-[:CONTAINS]->(df)
-    """, dataset=dataset_name, file=datafile_name, file_type=file_type)
-
-    # Create the single RUL feature node and connect
-    tx.run("""
-        MERGE (f:Feature {name: 'RUL_Value'})
-        MERGE (c:Category {name: 'RUL'})
-        MERGE (f)-[:BELONGS_TO]->(c)
-        MERGE (df:DataFile {name: $file})
-        MERGE (df)-[:HAS_FEATURE]->(f)
-    """, file=datafile_name)
-
-    
-
-    def create_asset_and_link(tx, asset_name, datafile_name):
-        """
-        Create an Asset node with asset_id (random number) and asset_type='turbofan_engine',
-        and link it to a DataFile node with a 'linked_asset' relationship.
-        """
-        asset_id = random.randint(100000, 999999)
-        tx.run("""
-            MERGE (a:Asset {name: $asset_name})
-            ON CREATE SET a.asset_id = $asset_id, a.asset_type = 'turbofan_engine'
-            ON MATCH SET a.asset_type = 'turbofan_engine'
-            MERGE (df:DataFile {name: $datafile_name})
-            MERGE (df)-[:linked_asset]->(a)
-        """, asset_name=asset_name, datafile_name=datafile_name, asset_id=asset_id)
+            if bulk:
+                session.execute_write(
+                    ingest_features_bulk_tx,
+                    dataset_name,
+                    datafile_name,
+                    file_type,
+                    build_rul_feature_rows()
+                )
+            else:
+                session.execute_write(
+                    ingest_rul_metadata_tx,
+                    dataset_name,
+                    datafile_name,
+                    file_type,
+                    unit_info
+                )
+        invalidate_datafile(datafile_name)
 
     def create_asset_and_link_to_datafile(self, asset_name, datafile_name):
         """
         Public method to create an Asset node and link it to a DataFile node.
         """
+        self._ensure_schema()
         with self.driver.session() as session:
             session.execute_write(create_asset_and_link, asset_name, datafile_name)
-
-    # Add the method to MetadataIngest class
-    MetadataIngest.create_asset_and_link_to_datafile = create_asset_and_link_to_datafile
-
-
-    def create_storage_and_link(tx, datafile_name, storage_type, storage_path, storage_url, storage_name):
-        """
-        Create a Storage node with given type and path, and link it to a DataFile node.
-        """
-        tx.run("""
-            MERGE (s:Storage {type: $storage_type, path: $storage_path, storage_url: $storage_url, storage_name: $storage_name})
-            MERGE (df:DataFile {name: $datafile_name})
-            MERGE (df)-[:is_stored_in]->(s)
-        """, storage_type=storage_type, storage_path=storage_path, datafile_name=datafile_name, storage_url=storage_url, storage_name = storage_name )
+        invalidate_datafile(datafile_name)
 
     def create_storage_and_link_to_datafile(self, datafile_name, storage_type, storage_path, storage_url, storage_name):
         """
         Public method to create a Storage node and link it to a DataFile node.
         """
+        self._ensure_schema()
         with self.driver.session() as session:
             session.execute_write(create_storage_and_link, datafile_name, storage_type, storage_path, storage_url, storage_name )
+        invalidate_datafile(datafile_name)
 
-    # Add the method to MetadataIngest class
-    MetadataIngest.create_storage_and_link_to_datafile = create_storage_and_link_to_datafile
+    def ingest_catalog(self, manifest, batch_size=50, feature_sets=None):
+        """Register many datasets/files/assets/storage locations at once.
 
-if __name__ == "__main__":
-    URI = "bolt://localhost:7687"
-    USER = "neo4j"
-    PASSWORD = "cool@1983"
+        `manifest` is a list of file entries or a path to a JSON/YAML manifest
+        (see load_manifest). Files are grouped into write transactions of
+        `batch_size` entries on a single session, each transaction issuing a fixed
+        handful of UNWIND statements. Returns one throughput report per batch.
+        `feature_sets` replaces the CMAPSS feature sets (see build_catalog_batch).
+        """
+        entries = load_manifest(manifest)
+        reports = []
+        self._ensure_schema()
+        with self.driver.session() as session:
+            for start in range(0, len(entries), batch_size):
+                batch = entries[start:start + batch_size]
+                params = build_catalog_batch(batch, feature_sets)
+                t0 = time.perf_counter()
+                session.execute_write(ingest_catalog_batch_tx, **params)
+                elapsed = time.perf_counter() - t0
+                invalidate_datafile(*(row["file"] for row in params["files"]))
+                reports.append({
+                    "batch": len(reports) + 1,
+                    "files": len(batch),
+                    "seconds": round(elapsed, 6),
+                    "files_per_sec": round(len(batch) / elapsed, 2) if elapsed > 0 else None,
+                })
+        return reports
+
+    def sync_catalog(self, manifest, batch_size=500):
+        """Bring the graph in line with `manifest`, writing only what changed.
+
+        Each DataFile carries a content_hash of its dataset, type, features,
+        asset and storage. The stored hashes of every manifest file are fetched
+        in one read. Unchanged files are skipped, new files take the
+        ingest_catalog path, and only changed files are diffed against their
+        current links (catalog_deltas) and patched, stale HAS_FEATURE edges
+        included. Files missing from the manifest are left alone.
+        """
+        entries = list({entry["file"]: entry for entry in load_manifest(manifest)}.values())
+        feature_sets = build_feature_sets()
+        report = {"files": len(entries), "unchanged": 0, "added": 0, "changed": 0, "writes": {}}
+        self._ensure_schema()
+        with self.driver.session() as session:
+            stored = session.execute_read(read_content_hashes, [entry["file"] for entry in entries])
+            new, changed = [], []
+            for entry in entries:
+                if entry["file"] not in stored:
+                    new.append(entry)
+                elif stored[entry["file"]] != content_hash(entry, entry_features(entry, feature_sets)):
+                    changed.append(entry)
+            report["unchanged"] = len(entries) - len(new) - len(changed)
+
+            for start in range(0, len(new), batch_size):
+                session.execute_write(ingest_catalog_batch_tx, **build_catalog_batch(new[start:start + batch_size]))
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start:start + batch_size]
+                states = session.execute_read(read_datafile_states, [entry["file"] for entry in batch])
+                deltas = catalog_deltas(batch, states, feature_sets)
+                session.execute_write(apply_catalog_deltas_tx, **deltas)
+                for key, rows in deltas.items():
+                    report["writes"][key] = report["writes"].get(key, 0) + len(rows)
+
+        report["added"], report["changed"] = len(new), len(changed)
+        if new or changed:
+            invalidate_datafile(*(entry["file"] for entry in new + changed))
+        return report
+
+def load_manifest(manifest):
+    """Return the list of file entries of a catalog manifest.
+
+    Accepts a list of dicts or a path to a .json/.yaml/.yml file holding either
+    such a list or {"files": [...]}. Each entry looks like:
+
+        {"dataset": "N-CMAPSS", "file": "train_FD001", "type": "train",
+         "asset": "FD001",                                   # optional
+         "storage": {"type": "minio", "path": "...",         # optional
+                     "url": "localhost:9009", "name": "..."}}
+
+    Entries with type "RUL" get the single RUL_Value feature, all others the
+    full CMAPSS column set.
+    """
+    if isinstance(manifest, (str, os.PathLike)):
+        path = os.fspath(manifest)
+        with open(path, encoding="utf-8") as fh:
+            if path.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise ImportError("PyYAML is required for YAML manifests (pip install pyyaml)") from e
+                manifest = yaml.safe_load(fh)
+            else:
+                manifest = json.load(fh)
+    if isinstance(manifest, dict):
+        manifest = manifest.get("files", [])
+
+    entries = list(manifest)
+    for entry in entries:
+        missing = [key for key in ("dataset", "file", "type") if key not in entry]
+        if missing:
+            raise ValueError(f"Manifest entry {entry!r} is missing {', '.join(missing)}")
+    return entries
+
+def build_feature_sets():
+    """The feature rows of each feature set a manifest entry can have."""
+    return {
+        "full": build_feature_rows(index_names, setting_names, sensor_names, unit_info),
+        "rul": build_rul_feature_rows(),
+    }
+
+def entry_feature_set(entry):
+    return "rul" if entry["type"] == "RUL" else "full"
+
+def entry_features(entry, feature_sets=None):
+    return (feature_sets or build_feature_sets())[entry_feature_set(entry)]
+
+def content_hash(entry, features):
+    """Hash of everything the catalog ingest writes for one manifest entry."""
+    storage = entry.get("storage")
+    payload = {
+        "dataset": entry["dataset"],
+        "type": entry["type"],
+        "asset": entry.get("asset") or None,
+        "storage": [storage[key] for key in ("type", "path", "url", "name")] if storage else None,
+        "features": [[feat["name"], feat["category"], feat["unit"], feat["desc"]] for feat in features],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def build_catalog_batch(entries, feature_sets=None):
+    """Turn manifest entries into the parameter lists of ingest_catalog_batch_tx.
+
+    `feature_sets` replaces build_feature_sets() (same {"full", "rul"} keys).
+    """
+    all_features = feature_sets or build_feature_sets()
+    full, rul = all_features["full"], all_features["rul"]
+    feature_sets = {
+        "full": [feat["name"] for feat in full],
+        "rul": [feat["name"] for feat in rul],
+    }
+
+    files, assets, storages = [], [], []
+    used_sets = set()
+    for entry in entries:
+        feature_set = entry_feature_set(entry)
+        used_sets.add(feature_set)
+        files.append({
+            "dataset": entry["dataset"],
+            "file": entry["file"],
+            "type": entry["type"],
+            "feature_set": feature_set,
+            "content_hash": content_hash(entry, all_features[feature_set]),
+        })
+        if entry.get("asset"):
+            assets.append({
+                "name": entry["asset"],
+                "file": entry["file"],
+                "asset_id": random.randint(100000, 999999),
+            })
+        storage = entry.get("storage")
+        if storage:
+            storages.append({
+                "file": entry["file"],
+                "type": storage["type"],
+                "path": storage["path"],
+                "url": storage["url"],
+                "name": storage["name"],
+            })
+
+    features = []
+    if "full" in used_sets:
+        features.extend(full)
+    if "rul" in used_sets:
+        features.extend(rul)
+
+    return {
+        "files": files,
+        "features": features,
+        "feature_sets": feature_sets,
+        "assets": assets,
+        "storages": storages,
+    }
+
+def ingest_catalog_batch_tx(tx, files, features, feature_sets, assets, storages):
+    # Datasets, DataFiles and CONTAINS edges for the whole batch
+    tx.run(MERGE_DATAFILES_BULK, files=files)
+
+    # Shared Feature/Category/Unit dimension nodes, once per batch
+    tx.run(MERGE_FEATURES_BULK, features=features)
+
+    units = [feat for feat in features if feat["unit"]]
+    if units:
+        tx.run(MERGE_UNITS_BULK, units=units)
+
+    tx.run(MERGE_HAS_FEATURE_BULK, files=files, feature_sets=feature_sets)
+
+    if assets:
+        tx.run(MERGE_ASSETS_BULK, assets=assets)
+
+    if storages:
+        tx.run(MERGE_STORAGES_BULK, storages=storages)
+
+def read_content_hashes(tx, file_names):
+    """{file: stored content_hash (None if never hashed)} for the existing DataFiles."""
+    return {record["file"]: record["content_hash"] for record in tx.run(CONTENT_HASHES, files=file_names)}
+
+def read_datafile_states(tx, file_names):
+    return {record["file"]: record.data() for record in tx.run(DATAFILE_STATE, files=file_names)}
+
+def catalog_deltas(entries, states, feature_sets=None):
+    """Minimal writes that turn the stored `states` (DATAFILE_STATE rows) into `entries`.
+
+    Returns the keyword arguments of apply_catalog_deltas_tx.
+    """
+    feature_sets = feature_sets or build_feature_sets()
+    deltas = {key: [] for key in (
+        "files", "contains_add", "contains_remove", "features", "has_feature_set",
+        "has_feature_remove", "assets_add", "assets_remove", "storages_add", "storages_remove")}
+    new_features = {}
+    for entry in entries:
+        file_name = entry["file"]
+        state = states[file_name]
+        features = entry_features(entry, feature_sets)
+        row = {"file": file_name, "type": entry["type"], "content_hash": content_hash(entry, features)}
+        deltas["files"].append(row)
+
+        if entry["dataset"] not in state["datasets"]:
+            deltas["contains_add"].append({**row, "dataset": entry["dataset"]})
+        deltas["contains_remove"].extend(
+            {"dataset": dataset, "file": file_name} for dataset in state["datasets"] if dataset != entry["dataset"])
+
+        current = {feat["name"]: feat["column"] for feat in state["features"]}
+        for column, feat in enumerate(features):
+            if feat["name"] not in current:
+                new_features.setdefault(feat["name"], feat)
+            if current.get(feat["name"], -1) != column:
+                deltas["has_feature_set"].append({"file": file_name, "feature": feat["name"], "column": column})
+        wanted = {feat["name"] for feat in features}
+        deltas["has_feature_remove"].extend(
+            {"file": file_name, "feature": name} for name in current if name not in wanted)
+
+        asset = entry.get("asset") or None
+        if asset and asset not in state["assets"]:
+            deltas["assets_add"].append({"name": asset, "file": file_name, "asset_id": random.randint(100000, 999999)})
+        deltas["assets_remove"].extend({"file": file_name, "name": name} for name in state["assets"] if name != asset)
+
+        storage = entry.get("storage")
+        location = {key: storage[key] for key in ("type", "path", "url", "name")} if storage else None
+        if location and location not in state["storages"]:
+            deltas["storages_add"].append({"file": file_name, **location})
+        deltas["storages_remove"].extend(
+            {"file": file_name, **stored} for stored in state["storages"] if stored != location)
+
+    deltas["features"] = list(new_features.values())
+    return deltas
+
+def apply_catalog_deltas_tx(tx, files, contains_add, contains_remove, features, has_feature_set,
+                            has_feature_remove, assets_add, assets_remove, storages_add, storages_remove):
+    # Only the statements with something to do are sent
+    if contains_remove:
+        tx.run(REMOVE_CONTAINS, rows=contains_remove)
+    if contains_add:
+        tx.run(MERGE_DATAFILES_BULK, files=contains_add)
+    tx.run(UPDATE_DATAFILES, files=files)
+
+    if features:
+        tx.run(MERGE_FEATURES_BULK, features=features)
+        units = [feat for feat in features if feat["unit"]]
+        if units:
+            tx.run(MERGE_UNITS_BULK, units=units)
+    if has_feature_remove:
+        tx.run(REMOVE_HAS_FEATURE, rows=has_feature_remove)
+    if has_feature_set:
+        tx.run(SET_HAS_FEATURE, rows=has_feature_set)
+
+    if assets_remove:
+        tx.run(REMOVE_ASSET_LINKS, rows=assets_remove)
+    if assets_add:
+        tx.run(MERGE_ASSETS_BULK, assets=assets_add)
+    if storages_remove:
+        tx.run(REMOVE_STORAGE_LINKS, rows=storages_remove)
+    if storages_add:
+        tx.run(MERGE_STORAGES_BULK, storages=storages_add)
+
+def build_feature_rows(index_names, setting_names, sensor_names, unit_info):
+    """Flatten the feature definitions into UNWIND-ready parameter rows."""
+    rows = []
+    for name in index_names:
+        rows.append({"name": name, "category": "Index", "unit": None, "desc": None})
+    for name in setting_names:
+        rows.append({"name": name, "category": "Setting", "unit": None, "desc": None})
+    for name, unit in sensor_names:
+        desc = unit_info.get(unit, None) if unit else None
+        rows.append({"name": name, "category": "Sensor", "unit": unit, "desc": desc})
+    return rows
+
+def build_rul_feature_rows():
+    return [{"name": "RUL_Value", "category": "RUL", "unit": None, "desc": None}]
 
+def ingest_features_bulk_tx(tx, dataset_name, datafile_name, file_type, features):
+    tx.run(MERGE_DATAFILE_FEATURES_BULK, dataset=dataset_name, file=datafile_name, file_type=file_type, features=features)
+
+    # Units only for the features that have one
+    units = [feat for feat in features if feat["unit"]]
+    if units:
+        tx.run(MERGE_UNITS_BULK, units=units)
+
+def ingest_feature_rows_tx(tx, dataset_name, datafile_name, file_type, features):
+    # Create Dataset and DataFile nodes, set file_type property
+    tx.run(MERGE_DATAFILE, dataset=dataset_name, file=datafile_name, file_type=file_type)
+
+    # One MERGE per feature (and per unit); HAS_FEATURE.column is the position in the file
+    for column, feat in enumerate(features):
+        tx.run(MERGE_FEATURE, name=feat["name"], category=feat["category"], file=datafile_name, column=column)
+        if feat["unit"]:
+            tx.run(MERGE_FEATURE_UNIT, unit=feat["unit"], desc=feat["desc"], name=feat["name"])
+
+def ingest_metadata_tx(tx, dataset_name, datafile_name, file_type, unit_info,
+                       index_names, setting_names, sensor_names):
+    features = build_feature_rows(index_names, setting_names, sensor_names, unit_info)
+    ingest_feature_rows_tx(tx, dataset_name, datafile_name, file_type, features)
+
+def ingest_rul_metadata_tx(tx, dataset_name, datafile_name, file_type, unit_info):
+    # Create Dataset and DataFile nodes for RUL file
+    tx.run(MERGE_DATAFILE, dataset=dataset_name, file=datafile_name, file_type=file_type)
+
+    # Create the single RUL feature node and connect
+    tx.run(MERGE_RUL_FEATURE, file=datafile_name)
+
+
+def create_asset_and_link(tx, asset_name, datafile_name):
+    """
+    Create an Asset node with asset_id (random number) and asset_type='turbofan_engine',
+    and link it to a DataFile node with a 'linked_asset' relationship.
+    """
+    asset_id = random.randint(100000, 999999)
+    tx.run(MERGE_ASSET, asset_name=asset_name, datafile_name=datafile_name, asset_id=asset_id)
+
+def create_storage_and_link(tx, datafile_name, storage_type, storage_path, storage_url, storage_name):
+    """
+    Create a Storage node with given type and path, and link it to a DataFile node.
+    """
+    tx.run(MERGE_STORAGE, storage_type=storage_type, storage_path=storage_path, datafile_name=datafile_name, storage_url=storage_url, storage_name = storage_name )
+
+if __name__ == "__main__":
     try:
-        ingest = MetadataIngest(URI, USER, PASSWORD)
+        # Connection settings come from NEO4J_* env vars (see neo4j_connection.py)
+        ingest = MetadataIngest()
 
         # Example calls
         ingest.ingest_metadata("N-CMAPSS", "train_FD001", "train")
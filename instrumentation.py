@@ -0,0 +1,523 @@
+"""Per-statement instrumentation for any driver used in this repo.
+
+instrument(driver) wraps a driver so that every statement run through its
+sessions and transactions is recorded under its template (the Cypher text with
+whitespace collapsed; parameters are not part of the key):
+
+    calls, errors, wall time (total/max/p50/p99), rows returned, and the
+    result.consume() counters (nodes/relationships created and deleted,
+    properties set)
+
+Wall time runs from tx.run() until the result is exhausted or consumed, so it
+covers streaming the records, not just sending the query. Results a
+transaction function never reads are consumed when it returns, which is what
+the driver does before COMMIT anyway.
+
+Every statement and managed transaction also becomes an OpenTelemetry-style
+span (dicts with trace/span ids, start/end in unix nanoseconds and db.*
+attributes). The data can be exported with summary_table(),
+prometheus_text(), spans() and report() (JSON-ready). capture_plans() adds
+EXPLAIN (or PROFILE, run in a rolled back transaction) plans for the N
+slowest templates.
+
+Enable it for the shared driver with NEO4J_INSTRUMENT=1 (see
+neo4j_connection.py). The summary is printed to stderr at exit, or written as
+JSON to NEO4J_INSTRUMENT_OUT. Or wrap a driver explicitly:
+
+    driver = instrument(get_driver())
+    MetadataIngest(driver=driver).ingest_metadata(...)
+    print(get_instrumentation().summary_table())
+"""
+import hashlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import deque
+
+from neo4j_connection import normalize_cypher
+
+COUNTERS = ("nodes_created", "nodes_deleted", "relationships_created",
+            "relationships_deleted", "properties_set")
+
+# Durations kept per template for the percentiles
+SAMPLE_SIZE = 1024
+MAX_SPANS = 10000
+# List parameters (UNWIND payloads) are kept cut to this many items for capture_plans
+PARAM_SAMPLE_ITEMS = 10
+
+
+def sample_params(params, limit=PARAM_SAMPLE_ITEMS):
+    """(copy of `params` with every list cut to `limit` items, total items of the top-level lists)."""
+    def cut(value):
+        if isinstance(value, (list, tuple)):
+            return [cut(item) for item in value[:limit]]
+        if isinstance(value, dict):
+            return {key: cut(item) for key, item in value.items()}
+        return value
+
+    params = params or {}
+    size = sum(len(value) for value in params.values() if isinstance(value, (list, tuple)))
+    return cut(params), size
+
+
+def statement_id(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+
+class StatementStats:
+    def __init__(self, text):
+        self.text = text
+        self.id = statement_id(text)
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.durations = deque(maxlen=SAMPLE_SIZE)
+        self.last_params = None      # truncated, see sample_params
+        self.last_param_items = 0
+        self.plan = None
+
+    def percentile(self, q):
+        if not self.durations:
+            return None
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "statement": self.text,
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 6),
+            "mean_ms": round(self.seconds / self.calls * 1000, 4) if self.calls else None,
+            "p50_ms": round(self.percentile(50) * 1000, 4) if self.durations else None,
+            "p99_ms": round(self.percentile(99) * 1000, 4) if self.durations else None,
+            "max_ms": round(self.max_seconds * 1000, 4),
+            "rows": self.rows,
+            "last_param_items": self.last_param_items,
+            **self.counters,
+            "plan": self.plan,
+        }
+
+
+class Instrumentation:
+    """Thread-safe per-template statistics and recent spans."""
+
+    def __init__(self, max_spans=MAX_SPANS):
+        self._lock = threading.Lock()
+        self.statements = {}
+        self._spans = deque(maxlen=max_spans)
+        self._local = threading.local()
+
+    @property
+    def paused(self):
+        return getattr(self._local, "paused", False)
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self._spans.clear()
+
+    def record(self, query, params, seconds, rows, counters, error=None):
+        text = normalize_cypher(query)
+        if self.paused:
+            return StatementStats(text)
+        sample, items = sample_params(params)
+        with self._lock:
+            stats = self.statements.get(text)
+            if stats is None:
+                stats = self.statements[text] = StatementStats(text)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.durations.append(seconds)
+            stats.rows += rows
+            stats.last_params, stats.last_param_items = sample, items
+            if error is not None:
+                stats.errors += 1
+            for name, value in (counters or {}).items():
+                stats.counters[name] += value
+        return stats
+
+    def add_span(self, span):
+        if self.paused:
+            return
+        with self._lock:
+            self._spans.append(span)
+
+    def top(self, n=None, key="seconds"):
+        """Templates sorted by total time (or another StatementStats attribute)."""
+        with self._lock:
+            ordered = sorted(self.statements.values(), key=lambda s: getattr(s, key), reverse=True)
+        return ordered[:n] if n else ordered
+
+    def summary(self, n=None):
+        return [stats.as_dict() for stats in self.top(n)]
+
+    def summary_table(self, n=20, width=70):
+        lines = [f"{'id':<8} {'calls':>7} {'total s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rows':>8} "
+                 f"{'+nodes':>7} {'+rels':>7} {'props':>7}  statement"]
+        for s in self.summary(n):
+            text = s["statement"] if len(s["statement"]) <= width else s["statement"][:width - 3] + "..."
+            lines.append(f"{s['id']:<8} {s['calls']:>7} {s['seconds']:>9.3f} {s['p50_ms'] or 0:>8.3f} "
+                         f"{s['p99_ms'] or 0:>8.3f} {s['rows']:>8} {s['nodes_created']:>7} "
+                         f"{s['relationships_created']:>7} {s['properties_set']:>7}  {text}")
+        return "\n".join(lines)
+
+    def prometheus_text(self):
+        """Prometheus text exposition format, one series per statement template."""
+        metrics = [
+            ("neo4j_statement_calls_total", "counter", "Statements executed", lambda s: s.calls),
+            ("neo4j_statement_errors_total", "counter", "Statements that raised", lambda s: s.errors),
+            ("neo4j_statement_seconds_total", "counter", "Wall time incl. streaming", lambda s: s.seconds),
+            ("neo4j_statement_seconds_max", "gauge", "Slowest execution", lambda s: s.max_seconds),
+            ("neo4j_statement_rows_total", "counter", "Records returned", lambda s: s.rows),
+        ] + [
+            (f"neo4j_statement_{name}_total", "counter", f"consume() counter {name}",
+             lambda s, name=name: s.counters[name])
+            for name in COUNTERS
+        ]
+        stats = self.top()
+        lines = ["# HELP neo4j_statement_info Statement text per statement_id",
+                 "# TYPE neo4j_statement_info gauge"]
+        for s in stats:
+            lines.append(f'neo4j_statement_info{{statement_id="{s.id}",statement="{_escape(s.text)}"}} 1')
+        for name, kind, help_text, value in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for s in stats:
+                lines.append(f'{name}{{statement_id="{s.id}"}} {value(s)}')
+        return "\n".join(lines) + "\n"
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def report(self, n=None):
+        return {"statements": self.summary(n), "spans": self.spans()}
+
+    def capture_plans(self, driver, n=5, profile=False):
+        """Attach EXPLAIN (or PROFILE) plans to the `n` slowest templates.
+
+        PROFILE executes the statement, so it runs in an explicit transaction
+        that is rolled back. Uses the last parameters seen for each template,
+        with lists cut to PARAM_SAMPLE_ITEMS items, so UNWIND batches are
+        planned/profiled on a sample.
+        The plan statements themselves are not recorded.
+        """
+        captured = []
+        self._local.paused = True
+        try:
+            for stats in self.top(n, key="max_seconds"):
+                captured.append(self._capture_plan(driver, stats, profile))
+        finally:
+            self._local.paused = False
+        return captured
+
+    def _capture_plan(self, driver, stats, profile):
+        mode = "PROFILE" if profile else "EXPLAIN"
+        try:
+            with driver.session() as session:
+                tx = session.begin_transaction()
+                try:
+                    summary = tx.run(f"{mode} {stats.text}", stats.last_params or {}).consume()
+                finally:
+                    tx.rollback()
+            plan = getattr(summary, "profile" if profile else "plan", None)
+            stats.plan = {"mode": mode, "tree": plan, "text": format_plan(plan)}
+        except Exception as e:
+            stats.plan = {"mode": mode, "error": f"{type(e).__name__}: {e}"}
+        return stats.as_dict()
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def format_plan(plan, depth=0):
+    """Indented operator tree of a plan/profile dict from ResultSummary."""
+    if not plan:
+        return ""
+    args = plan.get("args", {})
+    details = []
+    for key in ("Details", "EstimatedRows", "Rows", "DbHits"):
+        if key in args:
+            details.append(f"{key}={args[key]}")
+    if "rows" in plan:
+        details.append(f"rows={plan['rows']}")
+    if "dbHits" in plan:
+        details.append(f"dbHits={plan['dbHits']}")
+    line = "  " * depth + plan.get("operatorType", "?") + (f" ({', '.join(details)})" if details else "")
+    children = [format_plan(child, depth + 1) for child in plan.get("children", [])]
+    return "\n".join([line] + children)
+
+
+_default = Instrumentation()
+
+
+def get_instrumentation():
+    return _default
+
+
+def _now_ns():
+    return time.time_ns()
+
+
+def _span(name, trace_id, parent_id, start_ns, end_ns, attributes, error=None):
+    return {
+        "name": name,
+        "trace_id": trace_id,
+        "span_id": secrets.token_hex(8),
+        "parent_span_id": parent_id,
+        "start_time_unix_nano": start_ns,
+        "end_time_unix_nano": end_ns,
+        "attributes": attributes,
+        "status": {"code": "ERROR", "message": error} if error else {"code": "OK"},
+    }
+
+
+class InstrumentedResult:
+    """Proxies a driver result; records the statement once it is exhausted or consumed."""
+
+    def __init__(self, owner, result, query, params, start, start_ns):
+        self._owner = owner
+        self._result = result
+        self._query = query
+        self._params = params
+        self._start = start
+        self._start_ns = start_ns
+        self._rows = 0
+        self._done = False
+
+    def _finish(self, summary=None, error=None):
+        if self._done:
+            return summary
+        self._done = True
+        if summary is None and error is None:
+            try:
+                summary = self._result.consume()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        counters = {}
+        stats_counters = getattr(summary, "counters", None)
+        if stats_counters is not None:
+            counters = {name: getattr(stats_counters, name, 0) for name in COUNTERS}
+        self._owner.statement_done(self._query, self._params, self._start, self._start_ns,
+                                   self._rows, counters, error)
+        return summary
+
+    def __iter__(self):
+        try:
+            for record in self._result:
+                self._rows += 1
+                yield record
+        except Exception as e:
+            self._finish(error=f"{type(e).__name__}: {e}")
+            raise
+        self._finish()
+
+    def single(self, *args, **kwargs):
+        record = self._result.single(*args, **kwargs)
+        self._rows += record is not None
+        self._finish()
+        return record
+
+    def data(self, *keys):
+        rows = self._result.data(*keys)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def values(self, *keys):
+        rows = self._result.values(*keys)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def consume(self):
+        summary = self._result.consume()
+        return self._finish(summary)
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+
+class _Recorder:
+    """Shared bookkeeping of sessions and transactions: runs, pending results, spans."""
+
+    def __init__(self, instrumentation, trace_id, parent_id):
+        self._instrumentation = instrumentation
+        self._trace_id = trace_id
+        self._parent_id = parent_id
+        self._pending = []
+
+    def _run(self, target, query, parameters, kwargs):
+        params = dict(parameters or {}, **kwargs)
+        start, start_ns = time.perf_counter(), _now_ns()
+        try:
+            result = target.run(query, params)
+        except Exception as e:
+            self.statement_done(query, params, start, start_ns, 0, {}, f"{type(e).__name__}: {e}")
+            raise
+        wrapped = InstrumentedResult(self, result, query, params, start, start_ns)
+        self._pending.append(wrapped)
+        return wrapped
+
+    def statement_done(self, query, params, start, start_ns, rows, counters, error):
+        seconds = time.perf_counter() - start
+        stats = self._instrumentation.record(query, params, seconds, rows, counters, error)
+        text = stats.text
+        attributes = {
+            "db.system": "neo4j",
+            "db.statement": text,
+            "db.operation": text.split(" ", 1)[0].upper() if text else "",
+            "db.neo4j.statement_id": stats.id,
+            "db.response.returned_rows": rows,
+        }
+        attributes.update({f"db.neo4j.{name}": value for name, value in counters.items() if value})
+        self._instrumentation.add_span(_span(
+            f"neo4j {attributes['db.operation']}", self._trace_id, self._parent_id,
+            start_ns, start_ns + int(seconds * 1e9), attributes, error,
+        ))
+
+    def _finish_pending(self):
+        pending, self._pending = self._pending, []
+        for result in pending:
+            result._finish()
+
+
+class InstrumentedTransaction(_Recorder):
+    def __init__(self, instrumentation, tx, trace_id, parent_id):
+        super().__init__(instrumentation, trace_id, parent_id)
+        self._tx = tx
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._run(self._tx, query, parameters, kwargs)
+
+    def commit(self):
+        self._finish_pending()
+        return self._tx.commit()
+
+    def rollback(self):
+        self._finish_pending()
+        return self._tx.rollback()
+
+    def close(self):
+        self._finish_pending()
+        return self._tx.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class InstrumentedSession(_Recorder):
+    def __init__(self, instrumentation, session):
+        super().__init__(instrumentation, secrets.token_hex(16), None)
+        self._session = session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._finish_pending()
+        self._session.close()
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._run(self._session, query, parameters, kwargs)
+
+    def _managed(self, execute, kind, work, args, kwargs):
+        span_id = secrets.token_hex(8)
+        start, start_ns = time.perf_counter(), _now_ns()
+        attempts = 0
+
+        def instrumented_work(tx):
+            nonlocal attempts
+            attempts += 1
+            itx = InstrumentedTransaction(self._instrumentation, tx, self._trace_id, span_id)
+            value = work(itx, *args, **kwargs)
+            itx._finish_pending()
+            return value
+
+        error = None
+        try:
+            return execute(instrumented_work)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span = _span(f"neo4j {kind} transaction", self._trace_id, None, start_ns,
+                         start_ns + int((time.perf_counter() - start) * 1e9),
+                         {"db.system": "neo4j", "db.neo4j.attempts": attempts}, error)
+            span["span_id"] = span_id
+            self._instrumentation.add_span(span)
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._managed(self._session.execute_read, "read", work, args, kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._managed(self._session.execute_write, "write", work, args, kwargs)
+
+    def begin_transaction(self, *args, **kwargs):
+        tx = self._session.begin_transaction(*args, **kwargs)
+        return InstrumentedTransaction(self._instrumentation, tx, self._trace_id, None)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class InstrumentedDriver:
+    def __init__(self, driver, instrumentation=None):
+        self._driver = driver
+        self.instrumentation = instrumentation or _default
+
+    def session(self, **kwargs):
+        return InstrumentedSession(self.instrumentation, self._driver.session(**kwargs))
+
+    def close(self):
+        self._driver.close()
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def instrument(driver, instrumentation=None):
+    """Wrap `driver`; statements are recorded in `instrumentation` (default: the global one)."""
+    if isinstance(driver, InstrumentedDriver):
+        return driver
+    return InstrumentedDriver(driver, instrumentation)
+
+
+def write_report(path=None, instrumentation=None):
+    """JSON report to `path`, or the summary table to stderr (used at exit by neo4j_connection)."""
+    instrumentation = instrumentation or _default
+    if not instrumentation.statements:
+        return
+    if path:
+        with open(path, "w") as fh:
+            json.dump({**instrumentation.report(), "prometheus": instrumentation.prometheus_text()},
+                      fh, indent=2, default=str)
+    else:
+        print(instrumentation.summary_table(), file=sys.stderr)
+
+
+def report_at_exit(path=None):
+    import atexit
+
+    atexit.register(write_report, path or os.environ.get("NEO4J_INSTRUMENT_OUT") or None)
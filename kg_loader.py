@@ -0,0 +1,213 @@
+"""Load a DataFile's columns as NumPy arrays, located through the KG.
+
+One query resolves the DataFile's Storage and its ordered feature list
+(HAS_FEATURE.column). The whitespace-separated CMAPSS text is parsed once
+into a column-major .npy cache next to a small JSON sidecar. Later calls
+memory-map that cache, so a column is a contiguous, zero-copy view:
+
+    loader = KGDataLoader()
+    columns = loader.load_columns("train_FD001", categories=["Sensor"])
+    data, names = loader.load("train_FD001", features=["engine", "cycle"])
+
+The cache is rebuilt when the source file's size or mtime changes.
+
+Storage types:
+    local   Storage.path is a filesystem path
+    minio   with MINIO_STANDIN_DIR set, the object at Storage.path is read from
+            that directory instead (a local stand-in for the MinIO server);
+            otherwise it is downloaded once with the `minio` package from
+            Storage.storage_url (first path segment = bucket, credentials from
+            MINIO_ACCESS_KEY/MINIO_SECRET_KEY)
+
+Cache directory: KG_LOADER_CACHE_DIR (default .kg_cache).
+"""
+import json
+import os
+
+import numpy as np
+
+from neo4j_connection import acquire_driver, release_driver
+
+# Storage and ordered feature list of one DataFile in a single round trip
+LOAD_PLAN = """
+    MATCH (df:DataFile {name: $file})
+    OPTIONAL MATCH (df)-[:is_stored_in]->(s:Storage)
+    WITH df, collect(s {.type, .path, .storage_url, .storage_name}) AS storages
+    OPTIONAL MATCH (df)-[r:HAS_FEATURE]->(f:Feature)
+    OPTIONAL MATCH (f)-[:BELONGS_TO]->(c:Category)
+    WITH df, storages, r, f, c
+    ORDER BY r.column
+    RETURN df.name AS file, df.type AS type, storages,
+           [row IN collect({feature: f.name, category: c.name, column: r.column})
+            WHERE row.feature IS NOT NULL] AS features
+"""
+
+DEFAULT_CACHE_DIR = ".kg_cache"
+
+
+def _local_source(storage, cache_dir):
+    return storage["path"]
+
+
+def _minio_source(storage, cache_dir):
+    key = storage["path"].lstrip("/")
+    standin = os.environ.get("MINIO_STANDIN_DIR")
+    if standin:
+        return os.path.join(standin, key)
+
+    target = os.path.join(cache_dir, "objects", key)
+    if not os.path.exists(target):
+        try:
+            from minio import Minio
+        except ImportError as e:
+            raise ImportError("The minio package is required for minio storage "
+                              "(pip install minio), or set MINIO_STANDIN_DIR") from e
+        bucket, _, object_name = key.partition("/")
+        client = Minio(storage["storage_url"],
+                       access_key=os.environ.get("MINIO_ACCESS_KEY"),
+                       secret_key=os.environ.get("MINIO_SECRET_KEY"),
+                       secure=False)
+        client.fget_object(bucket, object_name, target)
+    return target
+
+
+# Storage.type -> function(storage, cache_dir) returning a local path of the text file
+STORAGE_RESOLVERS = {
+    "local": _local_source,
+    "minio": _minio_source,
+}
+
+
+def check_columns(file_name, features):
+    """Raise unless the HAS_FEATURE.column values of `features` are exactly 0..n-1."""
+    missing = [row["feature"] for row in features if row["column"] is None]
+    if missing:
+        raise ValueError(f"DataFile {file_name!r}: HAS_FEATURE without a column for "
+                         f"{', '.join(missing)} (re-ingest or sync the catalog to set it)")
+    columns = sorted(row["column"] for row in features)
+    if columns != list(range(len(features))):
+        raise ValueError(f"DataFile {file_name!r}: HAS_FEATURE columns {columns} are not 0..{len(features) - 1}")
+
+
+def parse_text(path):
+    """Whitespace-separated numeric text -> 2-D float64 array (rows x columns)."""
+    with open(path, "rb") as fh:
+        first = fh.readline()
+        width = len(first.split())
+        fh.seek(0)
+        values = np.array(fh.read().split(), dtype=np.float64)
+    if width == 0:
+        return np.empty((0, 0))
+    if values.size % width:
+        raise ValueError(f"{path}: {values.size} values do not fill rows of {width} columns")
+    return values.reshape(-1, width)
+
+
+class KGDataLoader:
+    def __init__(self, uri=None, user=None, password=None, driver=None, cache_dir=None):
+        self._shared = driver is None
+        self.driver = driver or acquire_driver(uri, user, password)
+        self.cache_dir = cache_dir or os.environ.get("KG_LOADER_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+    def close(self):
+        if self._shared:
+            release_driver(self.driver)
+        else:
+            self.driver.close()
+
+    def plan(self, file_name):
+        """{"file", "type", "storage", "features": [{feature, category, column}, ...]} from the KG.
+
+        Features are in column order; raises ValueError if a column is missing or
+        the columns are not 0..n-1.
+        """
+        with self.driver.session() as session:
+            record = session.run(LOAD_PLAN, file=file_name).single()
+        if record is None:
+            raise KeyError(f"DataFile {file_name!r} not found")
+        plan = record.data()
+        check_columns(file_name, plan["features"])
+        # Index i of the feature list is array column i from here on
+        plan["features"].sort(key=lambda row: row["column"])
+        storages = plan.pop("storages")
+        if not storages:
+            raise ValueError(f"DataFile {file_name!r} has no Storage")
+        plan["storage"] = storages[0]
+        return plan
+
+    def _cache_paths(self, file_name):
+        base = os.path.join(self.cache_dir, file_name)
+        return base + ".npy", base + ".json"
+
+    def _materialize(self, plan):
+        """Path of the .npy cache for `plan`, converting the source text if needed."""
+        storage = plan["storage"]
+        resolver = STORAGE_RESOLVERS.get(storage["type"])
+        if resolver is None:
+            raise ValueError(f"Unsupported storage type {storage['type']!r} "
+                             f"(known: {', '.join(STORAGE_RESOLVERS)})")
+        source = resolver(storage, self.cache_dir)
+        stat = os.stat(source)
+        signature = {"source": os.path.abspath(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        array_path, meta_path = self._cache_paths(plan["file"])
+        if os.path.exists(array_path) and os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as fh:
+                if json.load(fh).get("signature") == signature:
+                    return array_path
+
+        data = parse_text(source)
+        columns = [row["feature"] for row in plan["features"]]
+        if columns and data.shape[1] != len(columns):
+            raise ValueError(f"{source}: {data.shape[1]} columns but the KG lists {len(columns)} features")
+        os.makedirs(os.path.dirname(array_path) or ".", exist_ok=True)
+        # Column-major, so every column of the memory map is contiguous
+        tmp = array_path + ".tmp.npy"
+        np.save(tmp, np.asfortranarray(data))
+        os.replace(tmp, array_path)
+        with open(meta_path, "w", encoding="utf-8") as fh:
+            json.dump({"signature": signature, "columns": columns, "shape": list(data.shape)}, fh)
+        return array_path
+
+    def _select(self, plan, features, categories):
+        selected = []
+        for row in plan["features"]:
+            if features is not None and row["feature"] not in features:
+                continue
+            if categories is not None and row["category"] not in categories:
+                continue
+            selected.append((row["column"], row["feature"]))
+        if features is not None:
+            missing = set(features) - {name for _, name in selected}
+            if missing and categories is None:
+                raise KeyError(f"{plan['file']} has no feature(s) {', '.join(sorted(missing))}")
+            # Keep the caller's order
+            order = {name: i for i, name in enumerate(features)}
+            selected.sort(key=lambda item: order[item[1]])
+        return selected
+
+    def open(self, file_name):
+        """(read-only memory-mapped array, column names) of the whole file."""
+        plan = self.plan(file_name)
+        array = np.load(self._materialize(plan), mmap_mode="r")
+        return array, [row["feature"] for row in plan["features"]]
+
+    def load_columns(self, file_name, features=None, categories=None):
+        """{feature: 1-D read-only view} for the selected columns (no data is copied)."""
+        plan = self.plan(file_name)
+        array = np.load(self._materialize(plan), mmap_mode="r")
+        return {name: array[:, position] for position, name in self._select(plan, features, categories)}
+
+    def load(self, file_name, features=None, categories=None):
+        """(2-D array, column names) of the selected columns.
+
+        Without a projection this is the memory map itself; a projection copies
+        only the selected columns.
+        """
+        plan = self.plan(file_name)
+        array = np.load(self._materialize(plan), mmap_mode="r")
+        if features is None and categories is None:
+            return array, [row["feature"] for row in plan["features"]]
+        selected = self._select(plan, features, categories)
+        positions = [position for position, _ in selected]
+        return np.asfortranarray(array[:, positions]), [name for _, name in selected]
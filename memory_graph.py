@@ -0,0 +1,1528 @@
+"""In-memory graph backend: a driver-compatible stand-in for Neo4j.
+
+This is not a Cypher engine. It answers the repo's own statements with
+hand-written Python equivalents, one per statement, so it only knows the
+queries listed below and each handler has to be kept in step with its Cypher
+(tests/test_memory_graph.py compares them against a live server when
+NEO4J_TEST_URI is set).
+
+MemoryGraphBackend implements the part of the neo4j driver API used in this
+repo (session(), run(), execute_read(), execute_write(), begin_transaction(),
+records with data()/[]/single()/consume()) on top of a small property graph:
+nodes and relationships in dicts, typed adjacency lists per node and a
+(label, property) -> value -> nodes index, so MERGE/MATCH on a key is a dict
+lookup as it would be an index seek on the server.
+
+It does not parse Cypher. Each statement is normalised (whitespace collapsed)
+and dispatched to a Python handler registered for the exact text of a module
+constant (ingest_metadata.MERGE_DATAFILE, query_metadata.FEATURES_FOR_FILE,
+nas_kg_loop.STORE_EXPERIMENT, ...) or to a regex for statements built from
+templates (schema DDL, clean_metadata and nas_cleanup_data batches). Anything
+else raises NotImplementedError, so a changed query fails loudly instead of
+silently doing nothing. When a query constant changes, update its handler.
+
+Covered: ingest_metadata, parallel_ingest, query_metadata, metadata_schema,
+clean_metadata, kg_loader, feature_profile and the nas/ scripts (numbered
+steps, nas_create_data, the loops and their helpers). Not covered:
+query_metadata_old.py and the async driver (async_metadata.py).
+
+Select it with NEO4J_BACKEND=memory (see neo4j_connection.py), or pass one
+explicitly:
+
+    backend = MemoryGraphBackend()
+    ingest = MetadataIngest(driver=backend)
+    query = MetadataQuery(driver=backend)
+
+Managed transactions are atomic (a failing transaction function is rolled
+back) and serialised by one lock. Uniqueness constraints created through the
+schema statements are enforced on node creation and SET: a duplicate raises
+ConstraintError, as the server does, and the transaction is rolled back.
+"""
+import importlib
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+from neo4j_connection import normalize_cypher
+
+try:
+    from neo4j.exceptions import ConstraintError as _DriverConstraintError
+except ImportError:  # the driver is optional for the memory backend
+    _DriverConstraintError = Exception
+
+_MISSING = object()
+
+
+class ConstraintError(_DriverConstraintError):
+    """A write broke a uniqueness constraint (catchable as the driver's ConstraintError)."""
+    code = "Neo.ClientError.Schema.ConstraintValidationFailed"
+
+    def __str__(self):
+        return str(self.args[0]) if self.args else self.code
+
+
+class Node:
+    __slots__ = ("element_id", "labels", "props")
+
+    def __init__(self, element_id, labels, props):
+        self.element_id = element_id
+        self.labels = set(labels)
+        self.props = dict(props)
+
+    def get(self, key, default=None):
+        return self.props.get(key, default)
+
+
+class Relationship:
+    __slots__ = ("element_id", "type", "start", "end", "props")
+
+    def __init__(self, element_id, rel_type, start, end, props):
+        self.element_id = element_id
+        self.type = rel_type
+        self.start = start
+        self.end = end
+        self.props = dict(props)
+
+    def get(self, key, default=None):
+        return self.props.get(key, default)
+
+
+def _index_key(value):
+    if isinstance(value, list):
+        return tuple(value)
+    try:
+        hash(value)
+    except TypeError:
+        return _MISSING
+    return value
+
+
+class Graph:
+    """Property graph with label/property indexes and an undo journal."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = {}
+        self.schema = {}  # name -> (kind, label, properties)
+        self.counters = Counter()
+        self._next_id = 0
+        self._by_label = {}
+        self._index = {}
+        self._out = {}
+        self._in = {}
+        self._journal = None
+
+    def _new_id(self):
+        self._next_id += 1
+        return str(self._next_id)
+
+    # -- transactions ---------------------------------------------------------
+
+    def begin(self):
+        """Start journaling; returns False if a transaction is already open."""
+        if self._journal is not None:
+            return False
+        self._journal = []
+        return True
+
+    def commit(self):
+        self._journal = None
+
+    def rollback(self):
+        journal, self._journal = self._journal or [], None
+        for undo in reversed(journal):
+            undo()
+
+    def _log(self, undo):
+        if self._journal is not None:
+            self._journal.append(undo)
+
+    # -- indexes --------------------------------------------------------------
+
+    def _index_put(self, node, key, value):
+        value = _index_key(value)
+        if value is _MISSING:
+            return
+        for label in node.labels:
+            self._index.setdefault((label, key), {}).setdefault(value, {})[node.element_id] = node
+
+    def _index_drop(self, node, key, value):
+        value = _index_key(value)
+        if value is _MISSING:
+            return
+        for label in node.labels:
+            bucket = self._index.get((label, key), {}).get(value)
+            if bucket is not None:
+                bucket.pop(node.element_id, None)
+
+    def _attach_node(self, node):
+        self.nodes[node.element_id] = node
+        for label in node.labels:
+            self._by_label.setdefault(label, {})[node.element_id] = node
+        for key, value in node.props.items():
+            self._index_put(node, key, value)
+        self._out[node.element_id] = {}
+        self._in[node.element_id] = {}
+
+    def _detach_node(self, node):
+        for key, value in node.props.items():
+            self._index_drop(node, key, value)
+        for label in node.labels:
+            self._by_label[label].pop(node.element_id, None)
+        del self.nodes[node.element_id]
+        del self._out[node.element_id]
+        del self._in[node.element_id]
+
+    def _attach_rel(self, rel):
+        self.relationships[rel.element_id] = rel
+        self._out[rel.start.element_id].setdefault(rel.type, {})[rel.element_id] = rel
+        self._in[rel.end.element_id].setdefault(rel.type, {})[rel.element_id] = rel
+
+    def _detach_rel(self, rel):
+        del self.relationships[rel.element_id]
+        self._out[rel.start.element_id][rel.type].pop(rel.element_id)
+        self._in[rel.end.element_id][rel.type].pop(rel.element_id)
+
+    def _check_unique(self, node_id, labels, props, changed=None):
+        """Raise ConstraintError if `props` would duplicate another node's constrained key."""
+        for name, (kind, label, keys) in self.schema.items():
+            if kind != "constraint" or label not in labels or (changed is not None and changed not in keys):
+                continue
+            values = {key: props.get(key) for key in keys}
+            if any(value is None for value in values.values()):
+                continue
+            if any(other.element_id != node_id for other in self.find(label, **values)):
+                shown = ", ".join(f"{key} = {value!r}" for key, value in values.items())
+                raise ConstraintError(f"Node already exists with label `{label}` and {shown} "
+                                      f"(constraint {name})")
+
+    def _put(self, node, key, value):
+        old = node.props.get(key, _MISSING)
+        if old is not _MISSING:
+            self._index_drop(node, key, old)
+        if value is _MISSING or value is None:
+            node.props.pop(key, None)
+        else:
+            node.props[key] = value
+            self._index_put(node, key, value)
+
+    # -- writes ---------------------------------------------------------------
+
+    def create_node(self, labels, props=None):
+        props = {k: v for k, v in (props or {}).items() if v is not None}
+        self._check_unique(None, labels, props)
+        node = Node(self._new_id(), labels, props)
+        self._attach_node(node)
+        self._log(lambda: self._detach_node(node))
+        self.counters["nodes_created"] += 1
+        self.counters["labels_added"] += len(node.labels)
+        self.counters["properties_set"] += len(props)
+        return node
+
+    def set_property(self, entity, key, value):
+        """SET entity.key = value (None removes the property)."""
+        old = entity.props.get(key, _MISSING)
+        if isinstance(entity, Node):
+            if value is not None and value != old:
+                self._check_unique(entity.element_id, entity.labels, {**entity.props, key: value}, key)
+            self._put(entity, key, value)
+            self._log(lambda: self._put(entity, key, old))
+        else:
+            if value is None:
+                entity.props.pop(key, None)
+            else:
+                entity.props[key] = value
+
+            def undo():
+                if old is _MISSING:
+                    entity.props.pop(key, None)
+                else:
+                    entity.props[key] = old
+            self._log(undo)
+        self.counters["properties_set"] += 1
+
+    def delete_node(self, node, detach=True):
+        rels = self.relationships_of(node)
+        if rels and not detach:
+            raise ValueError(f"Node {node.element_id} still has relationships")
+        for rel in rels:
+            self.delete_relationship(rel)
+        self._detach_node(node)
+        self._log(lambda: self._attach_node(node))
+        self.counters["nodes_deleted"] += 1
+
+    def create_relationship(self, start, rel_type, end, props=None):
+        props = {k: v for k, v in (props or {}).items() if v is not None}
+        rel = Relationship(self._new_id(), rel_type, start, end, props)
+        self._attach_rel(rel)
+        self._log(lambda: self._detach_rel(rel))
+        self.counters["relationships_created"] += 1
+        self.counters["properties_set"] += len(props)
+        return rel
+
+    def delete_relationship(self, rel):
+        self._detach_rel(rel)
+        self._log(lambda: self._attach_rel(rel))
+        self.counters["relationships_deleted"] += 1
+
+    def merge_node(self, label, key, on_create=None, on_match=None):
+        """MERGE (n:label {key...}) [ON CREATE SET ...] [ON MATCH SET ...]."""
+        found = self.find(label, **key)
+        if found:
+            node = found[0]
+            for prop, value in (on_match or {}).items():
+                self.set_property(node, prop, value)
+            return node
+        return self.create_node([label], {**key, **(on_create or {})})
+
+    def merge_relationship(self, start, rel_type, end, props=None):
+        """MERGE (start)-[:rel_type {props}]->(end)."""
+        props = props or {}
+        for rel in self.outgoing(start, rel_type):
+            if rel.end is end and all(rel.props.get(k) == v for k, v in props.items()):
+                return rel
+        return self.create_relationship(start, rel_type, end, props)
+
+    # -- reads ----------------------------------------------------------------
+
+    def find(self, label=None, **props):
+        """Nodes with `label` (any label if None) and all of `props`."""
+        if label is None:
+            candidates = self.nodes.values()
+        elif props:
+            first, value = next(iter(props.items()))
+            value = _index_key(value)
+            if value is _MISSING:
+                candidates = self._by_label.get(label, {}).values()
+            else:
+                candidates = self._index.get((label, first), {}).get(value, {}).values()
+        else:
+            candidates = self._by_label.get(label, {}).values()
+        return [node for node in candidates
+                if all(node.props.get(k) == v for k, v in props.items())]
+
+    def find_one(self, label, **props):
+        found = self.find(label, **props)
+        return found[0] if found else None
+
+    def node(self, element_id):
+        return self.nodes.get(element_id)
+
+    def outgoing(self, node, rel_type):
+        return list(self._out[node.element_id].get(rel_type, {}).values())
+
+    def incoming(self, node, rel_type):
+        return list(self._in[node.element_id].get(rel_type, {}).values())
+
+    def relationships_of(self, node):
+        rels = {}
+        for by_type in (self._out[node.element_id], self._in[node.element_id]):
+            for typed in by_type.values():
+                rels.update(typed)
+        return list(rels.values())
+
+    def targets(self, node, rel_type, label=None):
+        return [rel.end for rel in self.outgoing(node, rel_type)
+                if label is None or label in rel.end.labels]
+
+    def sources(self, node, rel_type, label=None):
+        return [rel.start for rel in self.incoming(node, rel_type)
+                if label is None or label in rel.start.labels]
+
+
+# -- records and results ------------------------------------------------------
+
+class MemoryRecord:
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, row):
+        self._keys = tuple(row)
+        self._values = tuple(row.values())
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._keys, self._values))
+
+    def data(self):
+        return dict(zip(self._keys, self._values))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._values[key]
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        fields = " ".join(f"{k}={v!r}" for k, v in self.items())
+        return f"<Record {fields}>"
+
+
+class SummaryCounters:
+    FIELDS = ("nodes_created", "nodes_deleted", "relationships_created",
+              "relationships_deleted", "properties_set", "labels_added")
+
+    def __init__(self, counts):
+        for field in self.FIELDS:
+            setattr(self, field, counts.get(field, 0))
+        self.contains_updates = any(counts.get(field, 0) for field in self.FIELDS)
+
+
+class ResultSummary:
+    def __init__(self, query, parameters, counts):
+        self.query = query
+        self.parameters = parameters
+        self.counters = SummaryCounters(counts)
+        self.plan = None
+        self.profile = None
+
+
+class MemoryResult:
+    def __init__(self, query, parameters, rows, counts, plan=None, profile=None):
+        self._records = [MemoryRecord(row) for row in rows]
+        self._summary = ResultSummary(query, parameters, counts)
+        self._summary.plan = plan
+        self._summary.profile = profile
+
+    def __iter__(self):
+        records, self._records = self._records, []
+        return iter(records)
+
+    def keys(self):
+        return self._records[0].keys() if self._records else []
+
+    def peek(self):
+        return self._records[0] if self._records else None
+
+    def single(self, strict=False):
+        records, self._records = self._records, []
+        if strict and len(records) != 1:
+            raise ValueError(f"Expected exactly one record, got {len(records)}")
+        return records[0] if records else None
+
+    def data(self, *keys):
+        records, self._records = self._records, []
+        return [r.data() if not keys else {k: r.get(k) for k in keys} for r in records]
+
+    def values(self):
+        records, self._records = self._records, []
+        return [r.values() for r in records]
+
+    def consume(self):
+        self._records = []
+        return self._summary
+
+
+# -- driver API ---------------------------------------------------------------
+
+class MemoryTransaction:
+    def __init__(self, backend, explicit=False):
+        self._backend = backend
+        self._explicit = explicit
+        self.closed = False
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._backend.execute(query, dict(parameters or {}, **kwargs))
+
+    # begin_transaction() API
+    def commit(self):
+        self._finish(self._backend.graph.commit)
+
+    def rollback(self):
+        self._finish(self._backend.graph.rollback)
+
+    def close(self):
+        if not self.closed:
+            self.rollback()
+
+    def _finish(self, end):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            end()
+        finally:
+            self._backend.lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+class MemorySession:
+    def __init__(self, backend, **config):
+        self._backend = backend
+        self.config = config
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        # Auto-commit: the statement is its own transaction
+        return self._execute(lambda tx: tx.run(query, parameters, **kwargs))
+
+    def _execute(self, work, *args, **kwargs):
+        backend = self._backend
+        with backend.lock:
+            owner = backend.graph.begin()
+            try:
+                value = work(MemoryTransaction(backend), *args, **kwargs)
+            except BaseException:
+                if owner:
+                    backend.graph.rollback()
+                raise
+            if owner:
+                backend.graph.commit()
+            return value
+
+    execute_read = _execute
+    execute_write = _execute
+
+    # neo4j 4.x names, still used by some scripts
+    read_transaction = _execute
+    write_transaction = _execute
+
+    def begin_transaction(self):
+        self._backend.lock.acquire()
+        self._backend.graph.begin()
+        return MemoryTransaction(self._backend, explicit=True)
+
+
+class MemoryGraphBackend:
+    """Driver-compatible in-memory graph (see module docstring)."""
+
+    def __init__(self, graph=None):
+        self.graph = graph or Graph()
+        self.lock = threading.RLock()
+        self.statements = Counter()
+
+    def session(self, **config):
+        return MemorySession(self, **config)
+
+    def verify_connectivity(self):
+        return None
+
+    def close(self):
+        pass
+
+    def execute(self, query, params):
+        """Run one statement; returns a MemoryResult.
+
+        EXPLAIN/PROFILE prefixes are accepted; the "plan" is the Python handler
+        that answers the statement (EXPLAIN does not run it).
+        """
+        text = normalize_cypher(query)
+        mode, _, rest = text.partition(" ")
+        mode = mode.upper()
+        if mode in ("EXPLAIN", "PROFILE"):
+            text = rest
+        handler, match = resolve(text)
+        plan = {"operatorType": "InMemoryHandler", "args": {"Details": handler.__name__},
+                "identifiers": [], "children": []}
+        if mode == "EXPLAIN":
+            return MemoryResult(query, params, [], {}, plan=plan)
+        with self.lock:
+            self.graph.counters = Counter()
+            rows = handler(self.graph, params, match) if match is not None else handler(self.graph, params)
+            self.statements[text] += 1
+            if mode == "PROFILE":
+                rows = list(rows)
+                return MemoryResult(query, params, rows, self.graph.counters,
+                                    profile={**plan, "rows": len(rows), "dbHits": 0})
+            return MemoryResult(query, params, rows, self.graph.counters)
+
+
+# -- statement dispatch -------------------------------------------------------
+
+_HANDLERS = {}  # normalised statement text -> handler(graph, params)
+_CONSTANTS = []  # (module, constant, handler) not yet resolved
+_PATTERNS = []  # (compiled regex, handler(graph, params, match))
+_resolve_lock = threading.Lock()
+
+
+def statement(module, *constants):
+    """Register a handler for the text of module.CONSTANT (resolved on first use)."""
+    def register(handler):
+        for constant in constants:
+            _CONSTANTS.append((module, constant, handler))
+        return handler
+    return register
+
+
+def pattern(regex):
+    """Register a handler for statements matching `regex` (normalised text)."""
+    def register(handler):
+        _PATTERNS.append((re.compile(regex), handler))
+        return handler
+    return register
+
+
+def _resolve_constants():
+    # Modules are imported lazily: the NAS helpers are only importable when
+    # nas/ is on sys.path, which it is whenever they issued the statement
+    with _resolve_lock:
+        pending = []
+        for module_name, constant, handler in _CONSTANTS:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                pending.append((module_name, constant, handler))
+                continue
+            _HANDLERS[normalize_cypher(getattr(module, constant))] = handler
+        _CONSTANTS[:] = pending
+
+
+def resolve(text):
+    handler = _HANDLERS.get(text)
+    if handler is None and _CONSTANTS:
+        _resolve_constants()
+        handler = _HANDLERS.get(text)
+    if handler is not None:
+        return handler, None
+    for regex, handler in _PATTERNS:
+        match = regex.match(text)
+        if match:
+            return handler, match
+    raise NotImplementedError(f"No in-memory handler for statement: {text[:200]}")
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _to_string(value):
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _sort_key(value):
+    # Cypher sorts nulls last in ascending order
+    return (value is None, value)
+
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _add(a, b):
+    return None if a is None or b is None else a + b
+
+
+def _optional(nodes):
+    # OPTIONAL MATCH: one row per match, or a single null row
+    return nodes or [None]
+
+
+def _name(node):
+    return node.props.get("name") if node is not None else None
+
+
+# -- ingest_metadata.py ---------------------------------------------------------
+
+def _merge_datafile(g, dataset, file, file_type):
+    ds = g.merge_node("Dataset", {"name": dataset})
+    df = g.merge_node("DataFile", {"name": file})
+    g.set_property(df, "type", file_type)
+    g.merge_relationship(ds, "CONTAINS", df)
+    return df
+
+
+def _merge_feature(g, df, name, category, column=None):
+    f = g.merge_node("Feature", {"name": name})
+    c = g.merge_node("Category", {"name": category})
+    g.merge_relationship(f, "BELONGS_TO", c)
+    if df is not None:
+        _merge_has_feature(g, df, f, column)
+    return f
+
+
+def _merge_has_feature(g, df, f, column):
+    g.set_property(g.merge_relationship(df, "HAS_FEATURE", f), "column", column)
+
+
+def _merge_unit(g, unit, desc, name):
+    u = g.merge_node("Unit", {"name": unit}, on_create={"description": desc})
+    f = g.merge_node("Feature", {"name": name})
+    g.merge_relationship(f, "MEASURED_IN", u)
+
+
+def _merge_asset(g, name, asset_id, file):
+    a = g.merge_node("Asset", {"name": name},
+                     on_create={"asset_id": asset_id, "asset_type": "turbofan_engine"},
+                     on_match={"asset_type": "turbofan_engine"})
+    df = g.merge_node("DataFile", {"name": file})
+    g.merge_relationship(df, "linked_asset", a)
+
+
+def _merge_storage(g, storage_type, path, url, name, file):
+    s = g.merge_node("Storage", {"type": storage_type, "path": path, "storage_url": url, "storage_name": name})
+    df = g.merge_node("DataFile", {"name": file})
+    g.merge_relationship(df, "is_stored_in", s)
+
+
+@statement("ingest_metadata", "MERGE_DATAFILE")
+def _h_merge_datafile(g, p):
+    _merge_datafile(g, p["dataset"], p["file"], p["file_type"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_FEATURE")
+def _h_merge_feature(g, p):
+    df = g.merge_node("DataFile", {"name": p["file"]})
+    _merge_feature(g, df, p["name"], p["category"], p["column"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_FEATURE_UNIT")
+def _h_merge_feature_unit(g, p):
+    _merge_unit(g, p["unit"], p["desc"], p["name"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_RUL_FEATURE")
+def _h_merge_rul_feature(g, p):
+    df = g.merge_node("DataFile", {"name": p["file"]})
+    _merge_feature(g, df, "RUL_Value", "RUL", 0)
+    return []
+
+
+@statement("ingest_metadata", "MERGE_DATAFILE_FEATURES_BULK")
+def _h_merge_datafile_features_bulk(g, p):
+    df = _merge_datafile(g, p["dataset"], p["file"], p["file_type"])
+    for column, feat in enumerate(p["features"]):
+        _merge_feature(g, df, feat["name"], feat["category"], column)
+    return []
+
+
+@statement("ingest_metadata", "MERGE_UNITS_BULK")
+def _h_merge_units_bulk(g, p):
+    for row in p["units"]:
+        _merge_unit(g, row["unit"], row["desc"], row["name"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_DATAFILES_BULK")
+def _h_merge_datafiles_bulk(g, p):
+    for row in p["files"]:
+        df = _merge_datafile(g, row["dataset"], row["file"], row["type"])
+        g.set_property(df, "content_hash", row.get("content_hash"))
+    return []
+
+
+@statement("ingest_metadata", "MERGE_FEATURES_BULK")
+def _h_merge_features_bulk(g, p):
+    for feat in p["features"]:
+        _merge_feature(g, None, feat["name"], feat["category"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_HAS_FEATURE_BULK")
+def _h_merge_has_feature_bulk(g, p):
+    for row in p["files"]:
+        df = g.find_one("DataFile", name=row["file"])
+        if df is None:
+            continue
+        for column, feature_name in enumerate(p["feature_sets"][row["feature_set"]]):
+            f = g.find_one("Feature", name=feature_name)
+            if f is not None:
+                _merge_has_feature(g, df, f, column)
+    return []
+
+
+@statement("ingest_metadata", "MERGE_ASSETS_BULK")
+def _h_merge_assets_bulk(g, p):
+    for row in p["assets"]:
+        _merge_asset(g, row["name"], row["asset_id"], row["file"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_STORAGES_BULK")
+def _h_merge_storages_bulk(g, p):
+    for row in p["storages"]:
+        _merge_storage(g, row["type"], row["path"], row["url"], row["name"], row["file"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_ASSET")
+def _h_merge_asset(g, p):
+    _merge_asset(g, p["asset_name"], p["asset_id"], p["datafile_name"])
+    return []
+
+
+@statement("ingest_metadata", "MERGE_STORAGE")
+def _h_merge_storage(g, p):
+    _merge_storage(g, p["storage_type"], p["storage_path"], p["storage_url"], p["storage_name"],
+                   p["datafile_name"])
+    return []
+
+
+@statement("ingest_metadata", "CONTENT_HASHES")
+def _h_content_hashes(g, p):
+    return [{"file": _name(df), "content_hash": df.props.get("content_hash")}
+            for file in p["files"] for df in g.find("DataFile", name=file)]
+
+
+@statement("ingest_metadata", "DATAFILE_STATE")
+def _h_datafile_state(g, p):
+    rows = []
+    for file in p["files"]:
+        for df in g.find("DataFile", name=file):
+            rows.append({
+                "file": _name(df),
+                "type": df.props.get("type"),
+                "datasets": [_name(ds) for ds in g.sources(df, "CONTAINS", "Dataset")],
+                "assets": [_name(a) for a in g.targets(df, "linked_asset", "Asset")],
+                "storages": [{"type": s.props.get("type"), "path": s.props.get("path"),
+                              "url": s.props.get("storage_url"), "name": s.props.get("storage_name")}
+                             for s in g.targets(df, "is_stored_in", "Storage")],
+                "features": [{"name": _name(rel.end), "column": rel.props.get("column")}
+                             for rel in g.outgoing(df, "HAS_FEATURE") if "Feature" in rel.end.labels],
+            })
+    return rows
+
+
+@statement("ingest_metadata", "UPDATE_DATAFILES")
+def _h_update_datafiles(g, p):
+    for row in p["files"]:
+        for df in g.find("DataFile", name=row["file"]):
+            g.set_property(df, "type", row["type"])
+            g.set_property(df, "content_hash", row["content_hash"])
+    return []
+
+
+def _delete_links(g, file, rel_type, label, **props):
+    """DELETE the rel_type edges from DataFile `file` to `label` nodes matching props; returns their ends."""
+    ends = []
+    for df in g.find("DataFile", name=file):
+        for rel in g.outgoing(df, rel_type):
+            end = rel.end
+            if label in end.labels and all(end.props.get(k) == v for k, v in props.items()):
+                g.delete_relationship(rel)
+                ends.append(end)
+    return ends
+
+
+@statement("ingest_metadata", "REMOVE_CONTAINS")
+def _h_remove_contains(g, p):
+    for row in p["rows"]:
+        for ds in g.find("Dataset", name=row["dataset"]):
+            for rel in g.outgoing(ds, "CONTAINS"):
+                if "DataFile" in rel.end.labels and _name(rel.end) == row["file"]:
+                    g.delete_relationship(rel)
+    return []
+
+
+@statement("ingest_metadata", "SET_HAS_FEATURE")
+def _h_set_has_feature(g, p):
+    for row in p["rows"]:
+        df = g.find_one("DataFile", name=row["file"])
+        f = g.find_one("Feature", name=row["feature"])
+        if df is not None and f is not None:
+            _merge_has_feature(g, df, f, row["column"])
+    return []
+
+
+@statement("ingest_metadata", "REMOVE_HAS_FEATURE")
+def _h_remove_has_feature(g, p):
+    for row in p["rows"]:
+        _delete_links(g, row["file"], "HAS_FEATURE", "Feature", name=row["feature"])
+    return []
+
+
+@statement("ingest_metadata", "REMOVE_ASSET_LINKS")
+def _h_remove_asset_links(g, p):
+    for row in p["rows"]:
+        _delete_links(g, row["file"], "linked_asset", "Asset", name=row["name"])
+    return []
+
+
+@statement("ingest_metadata", "REMOVE_STORAGE_LINKS")
+def _h_remove_storage_links(g, p):
+    for row in p["rows"]:
+        for s in _delete_links(g, row["file"], "is_stored_in", "Storage", type=row["type"], path=row["path"],
+                               storage_url=row["url"], storage_name=row["name"]):
+            if s.element_id in g.nodes and not g.incoming(s, "is_stored_in"):
+                g.delete_node(s)
+    return []
+
+
+# -- parallel_ingest.py ----------------------------------------------------------
+
+@statement("parallel_ingest", "MERGE_DATASETS")
+def _h_merge_datasets(g, p):
+    for name in p["datasets"]:
+        g.merge_node("Dataset", {"name": name})
+    return []
+
+
+@statement("parallel_ingest", "MERGE_ASSET_NODES")
+def _h_merge_asset_nodes(g, p):
+    for row in p["assets"]:
+        g.merge_node("Asset", {"name": row["name"]},
+                     on_create={"asset_id": row["asset_id"], "asset_type": "turbofan_engine"},
+                     on_match={"asset_type": "turbofan_engine"})
+    return []
+
+
+def _storage_key(row):
+    return {"type": row["type"], "path": row["path"], "storage_url": row["url"], "storage_name": row["name"]}
+
+
+@statement("parallel_ingest", "MERGE_STORAGE_NODES")
+def _h_merge_storage_nodes(g, p):
+    for row in p["storages"]:
+        g.merge_node("Storage", _storage_key(row))
+    return []
+
+
+@statement("parallel_ingest", "MERGE_DATAFILE_NODES")
+def _h_merge_datafile_nodes(g, p):
+    for row in p["files"]:
+        df = g.merge_node("DataFile", {"name": row["file"]})
+        g.set_property(df, "type", row["type"])
+        g.set_property(df, "content_hash", row["content_hash"])
+    return []
+
+
+def _link_matched(g, rows, label, key_of, rel_type, outgoing, props_of=None):
+    """MATCH (x:label {key}) MATCH (df:DataFile {name: row.file}) MERGE the rel_type edge."""
+    for row in rows:
+        for node in g.find(label, **key_of(row)):
+            for df in g.find("DataFile", name=row["file"]):
+                start, end = (df, node) if outgoing else (node, df)
+                rel = g.merge_relationship(start, rel_type, end)
+                for key, value in (props_of(row) if props_of else {}).items():
+                    g.set_property(rel, key, value)
+
+
+@statement("parallel_ingest", "LINK_DATASETS")
+def _h_link_datasets(g, p):
+    _link_matched(g, p["rows"], "Dataset", lambda row: {"name": row["dataset"]}, "CONTAINS", False)
+    return []
+
+
+@statement("parallel_ingest", "LINK_FEATURES")
+def _h_link_features(g, p):
+    _link_matched(g, p["rows"], "Feature", lambda row: {"name": row["feature"]}, "HAS_FEATURE", True,
+                  lambda row: {"column": row["column"]})
+    return []
+
+
+@statement("parallel_ingest", "LINK_ASSETS")
+def _h_link_assets(g, p):
+    _link_matched(g, p["rows"], "Asset", lambda row: {"name": row["asset"]}, "linked_asset", True)
+    return []
+
+
+@statement("parallel_ingest", "LINK_STORAGES")
+def _h_link_storages(g, p):
+    _link_matched(g, p["rows"], "Storage", _storage_key, "is_stored_in", True)
+    return []
+
+
+# -- query_metadata.py ----------------------------------------------------------
+
+def _feature_rows(g, df):
+    for f in g.targets(df, "HAS_FEATURE", "Feature"):
+        for c in _optional(g.targets(f, "BELONGS_TO", "Category")):
+            for u in _optional(g.targets(f, "MEASURED_IN", "Unit")):
+                yield {
+                    "feature": _name(f), "category": _name(c), "unit": _name(u),
+                    "unit_description": u.props.get("description") if u is not None else None,
+                }
+
+
+@statement("query_metadata", "ALL_DATASETS_AND_FILES")
+def _h_all_datasets_and_files(g, p):
+    return [{"dataset": _name(ds), "file": _name(df), "type": df.props.get("type")}
+            for ds in g.find("Dataset")
+            for df in g.targets(ds, "CONTAINS", "DataFile")]
+
+
+@statement("query_metadata", "FEATURES_FOR_FILE")
+def _h_features_for_file(g, p):
+    return [row for df in g.find("DataFile", name=p["file_name"]) for row in _feature_rows(g, df)]
+
+
+@statement("query_metadata", "FEATURES_FOR_FILES")
+def _h_features_for_files(g, p):
+    return [{"file": file_name, **row}
+            for file_name in p["file_names"]
+            for df in g.find("DataFile", name=file_name)
+            for row in _feature_rows(g, df)]
+
+
+@statement("query_metadata", "FILES_BY_TYPE")
+def _h_files_by_type(g, p):
+    return [{"file": _name(df)} for df in g.find("DataFile", type=p["file_type"])]
+
+
+@statement("query_metadata", "ALL_UNITS")
+def _h_all_units(g, p):
+    return [{"unit": _name(u), "description": u.props.get("description")} for u in g.find("Unit")]
+
+
+# -- kg_loader.py ---------------------------------------------------------------
+
+_STORAGE_KEYS = ("type", "path", "storage_url", "storage_name")
+
+
+@statement("kg_loader", "LOAD_PLAN")
+def _h_load_plan(g, p):
+    rows = []
+    for df in g.find("DataFile", name=p["file"]):
+        storages = [{key: s.props.get(key) for key in _STORAGE_KEYS}
+                    for s in g.targets(df, "is_stored_in", "Storage")]
+        features = []
+        for rel in g.outgoing(df, "HAS_FEATURE"):
+            if "Feature" not in rel.end.labels:
+                continue
+            for c in _optional(g.targets(rel.end, "BELONGS_TO", "Category")):
+                features.append({"feature": _name(rel.end), "category": _name(c),
+                                 "column": rel.props.get("column")})
+        # ORDER BY r.column: nulls last
+        features.sort(key=lambda row: (row["column"] is None, row["column"] or 0))
+        rows.append({"file": _name(df), "type": df.props.get("type"),
+                     "storages": storages, "features": features})
+    return rows
+
+
+# -- feature_profile.py ----------------------------------------------------------
+
+_PROFILE_KEYS = ("count", "nulls", "min", "max", "mean", "std", "histogram", "histogram_edges", "profiled_at")
+
+
+@statement("feature_profile", "WRITE_PROFILES")
+def _h_write_profiles(g, p):
+    for row in p["rows"]:
+        for df in g.find("DataFile", name=row["file"]):
+            for rel in g.outgoing(df, "HAS_FEATURE"):
+                if "Feature" in rel.end.labels and _name(rel.end) == row["feature"]:
+                    for key, value in row["stats"].items():
+                        g.set_property(rel, key, value)
+    return []
+
+
+@statement("feature_profile", "READ_PROFILES")
+def _h_read_profiles(g, p):
+    rows = []
+    for df in g.find("DataFile", name=p["file"]):
+        for rel in g.outgoing(df, "HAS_FEATURE"):
+            if "Feature" in rel.end.labels:
+                rows.append({"feature": _name(rel.end), "column": rel.props.get("column"),
+                             **{key: rel.props.get(key) for key in _PROFILE_KEYS}})
+    rows.sort(key=lambda row: (row["column"] is None, row["column"] or 0))
+    return rows
+
+
+# -- schema (metadata_schema.py, nas/1_nas_kg_create_schema.py, cleanup) ----------
+
+@pattern(r"^CREATE (CONSTRAINT|(?:RANGE )?INDEX) (\w+) IF NOT EXISTS FOR \(\w+:(\w+)\) "
+         r"(?:REQUIRE|ON) \(?(.+?)\)?(?: IS UNIQUE)?$")
+def _h_create_schema(g, p, m):
+    kind, name, label, keys = m.groups()
+    props = tuple(key.strip().split(".", 1)[1] for key in keys.split(","))
+    g.schema.setdefault(name, ("constraint" if kind == "CONSTRAINT" else "index", label, props))
+    return []
+
+
+@pattern(r"^DROP (?:CONSTRAINT|INDEX) (\w+) IF EXISTS$")
+def _h_drop_schema(g, p, m):
+    g.schema.pop(m.group(1), None)
+    return []
+
+
+@statement("metadata_schema", "SHOW_NODE_INDEXES")
+def _h_show_node_indexes(g, p):
+    # Constraints are backed by an index, as on the server
+    return [{"labels": [label], "properties": list(props), "state": "ONLINE"}
+            for _, label, props in g.schema.values()]
+
+
+# -- clean_metadata.py ----------------------------------------------------------
+
+@pattern(r"^MATCH \(n:(\w+)\) RETURN count\(n\) AS count$")
+def _h_count_label(g, p, m):
+    return [{"count": len(g.find(m.group(1)))}]
+
+
+@pattern(r"^MATCH \(n:(\w+)\) WITH n LIMIT \$limit DETACH DELETE n RETURN count\(\*\) AS deleted$")
+def _h_delete_label_batch(g, p, m):
+    nodes = g.find(m.group(1))[:p["limit"]]
+    for node in nodes:
+        g.delete_node(node)
+    return [{"deleted": len(nodes)}]
+
+
+@statement("clean_metadata", "DELETE_METADATA")
+def _h_delete_metadata(g, p):
+    for node in [n for n in g.nodes.values() if n.labels & set(p["labels"])]:
+        g.delete_node(node)
+    return []
+
+
+@statement("clean_metadata", "DATASET_SCOPE")
+def _h_dataset_scope(g, p):
+    rows = []
+    for ds in g.find("Dataset", name=p["dataset"]):
+        files = [df.element_id for df in g.targets(ds, "CONTAINS", "DataFile")
+                 if all(other is ds for other in g.sources(df, "CONTAINS", "Dataset"))]
+        rows.append({"dataset": ds.element_id, "files": files})
+    return rows
+
+
+@pattern(r"^UNWIND \$doomed AS id MATCH \(m\)-\[:(\w+)\]->\(n:(\w+)\) WHERE elementId\(m\) = id "
+         r"WITH DISTINCT n WHERE NOT EXISTS \{ MATCH \(other\)-\[:(\w+)\]->\(n\) "
+         r"WHERE NOT elementId\(other\) IN \$doomed \} RETURN collect\(elementId\(n\)\) AS ids$")
+def _h_orphaned_by(g, p, m):
+    rel_type, label, _ = m.groups()
+    doomed = set(p["doomed"])
+    ids = {}
+    for element_id in p["doomed"]:
+        source = g.node(element_id)
+        if source is None:
+            continue
+        for n in g.targets(source, rel_type, label):
+            if all(rel.start.element_id in doomed for rel in g.incoming(n, rel_type)):
+                ids[n.element_id] = None
+    return [{"ids": list(ids)}]
+
+
+@pattern(r"^UNWIND \$ids AS id MATCH \(n\) WHERE elementId\(n\) = id(?: AND NOT \(\)-\[:(\w+)\]->\(n\))? "
+         r"DETACH DELETE n RETURN count\(\*\) AS deleted$")
+def _h_delete_ids(g, p, m):
+    guard = m.group(1)
+    deleted = 0
+    for element_id in p["ids"]:
+        node = g.node(element_id)
+        if node is None or (guard and g.incoming(node, guard)):
+            continue
+        g.delete_node(node)
+        deleted += 1
+    return [{"deleted": deleted}]
+
+
+# -- nas/nas_cleanup_data.py ----------------------------------------------------
+
+_COMPARISONS = {
+    "=": lambda a, b: a == b, "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+}
+
+
+def _literal(text, params):
+    if text.startswith("$"):
+        return params[text[1:]]
+    if text[0] in "'\"":
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    return float(text) if "." in text else int(text)
+
+
+def where_predicate(g, where, params):
+    """Predicate for the WHERE clauses nas_cleanup_data builds (joined by AND)."""
+    if not where:
+        return lambda node: True
+    checks = []
+    for term in re.split(r"\s+AND\s+", where):
+        if term == "NOT (n)--()":
+            checks.append(lambda node: not g.relationships_of(node))
+            continue
+        m = re.match(r"^n\.(\w+) IS (NOT )?NULL$", term)
+        if m:
+            key, negated = m.group(1), bool(m.group(2))
+            checks.append(lambda node, key=key, negated=negated: (node.props.get(key) is not None) == negated)
+            continue
+        m = re.match(r"^n\.(\w+) (<>|<=|>=|=|<|>) (.+)$", term)
+        if m:
+            key, op, value = m.group(1), _COMPARISONS[m.group(2)], _literal(m.group(3), params)
+
+            def compare(node, key=key, op=op, value=value):
+                current = node.props.get(key)
+                return current is not None and op(current, value)
+            checks.append(compare)
+            continue
+        raise NotImplementedError(f"No in-memory support for WHERE term: {term}")
+    return lambda node: all(check(node) for check in checks)
+
+
+def _matching(g, label, where, params):
+    predicate = where_predicate(g, where, params)
+    return [node for node in g.find(label or None) if predicate(node)]
+
+
+@pattern(r"^MATCH \(n(?::(\w+))?\)(?: WHERE (.+?))? RETURN count\(n\) AS cnt$")
+def _h_count_nodes(g, p, m):
+    label, where = m.groups()
+    return [{"cnt": len(_matching(g, label, where, p))}]
+
+
+@pattern(r"^MATCH \(n(?::(\w+))?\)(?: WHERE (.+?))? WITH n LIMIT \$limit "
+         r"(?:CALL \{ WITH n (.+?) \} IN (?:\d+ CONCURRENT )?TRANSACTIONS OF \$batch ROWS|(.+?)) "
+         r"RETURN count\(\*\) AS affected$")
+def _h_cleanup_batch(g, p, m):
+    label, where, server_action, client_action = m.groups()
+    action = server_action or client_action
+    nodes = _matching(g, label, where, p)[:p["limit"]]
+    if action == "DETACH DELETE n":
+        for node in nodes:
+            g.delete_node(node)
+    else:
+        prop = re.match(r"^SET n\.(\w+) = NULL$", action)
+        if prop is None:
+            raise NotImplementedError(f"No in-memory support for batch action: {action}")
+        for node in nodes:
+            g.set_property(node, prop.group(1), None)
+    return [{"affected": len(nodes)}]
+
+
+# -- nas/ ---------------------------------------------------------------------------
+
+def fold_arch_stats(g, a, s):
+    """nas_arch_stats.MERGE_ARCH_STATS for partial aggregate `s` on architecture `a`."""
+    props = a.props
+    g.set_property(a, "exp_count", (props.get("exp_count") or 0) + s["count"])
+    g.set_property(a, "acc_sum", _add(props.get("acc_sum", 0.0), s["acc_sum"]))
+    g.set_property(a, "acc_min", _min(props.get("acc_min"), s["acc_min"]))
+    g.set_property(a, "acc_max", _max(props.get("acc_max"), s["acc_max"]))
+    g.set_property(a, "lat_sum", _add(props.get("lat_sum", 0.0), s["lat_sum"]))
+    g.set_property(a, "lat_min", _min(props.get("lat_min"), s["lat_min"]))
+    g.set_property(a, "lat_max", _max(props.get("lat_max"), s["lat_max"]))
+    g.set_property(a, "last_timestamp", _max(props.get("last_timestamp"), s["last_time"]))
+
+
+def _create_experiment(g, a, name, accuracy, latency, time):
+    e = g.create_node(["Experiment"], {
+        "name": name, "accuracy": accuracy, "latencyMs": latency, "timestamp": _to_datetime(time),
+    })
+    g.create_relationship(a, "HAS_EXPERIMENT", e)
+    return e
+
+
+def _experiment_stats(e):
+    return {
+        "count": 1,
+        "acc_sum": e.props.get("accuracy"), "acc_min": e.props.get("accuracy"), "acc_max": e.props.get("accuracy"),
+        "lat_sum": e.props.get("latencyMs"), "lat_min": e.props.get("latencyMs"), "lat_max": e.props.get("latencyMs"),
+        "last_time": e.props.get("timestamp"),
+    }
+
+
+def _merge_architecture(g, name, depth, fingerprint):
+    a = g.merge_node("Architecture", {"name": name})
+    g.set_property(a, "depth", depth)
+    g.set_property(a, "fingerprint", fingerprint if fingerprint is not None else a.props.get("fingerprint"))
+    return a
+
+
+def _ordered_layers(g, a):
+    rels = sorted(g.outgoing(a, "COMPOSED_OF"), key=lambda rel: _sort_key(rel.props.get("order")))
+    return [_name(rel.end) for rel in rels if "Layer" in rel.end.labels]
+
+
+@statement("nas_create_data", "MERGE_DATASET")
+def _h_merge_nas_dataset(g, p):
+    g.merge_node("Dataset", {"name": p["dataset"], "samples": p["samples"], "classes": p["classes"]})
+    return []
+
+
+@statement("nas_create_data", "MERGE_HARDWARE")
+def _h_merge_hardware(g, p):
+    g.merge_node("Hardware", {"name": p["hardware"], "maxMemoryMB": p["memory"], "maxLatencyMs": p["latency"]})
+    return []
+
+
+@statement("nas_create_data", "MERGE_LAYER")
+def _h_merge_layer(g, p):
+    l = g.merge_node("Layer", {"name": p["name"]})
+    for key, value in p["props"].items():
+        g.set_property(l, key, value)
+    return []
+
+
+@statement("nas_create_data", "MERGE_ARCHITECTURE")
+def _h_merge_nas_architecture(g, p):
+    g.merge_node("Architecture", {"name": p["name"], "depth": p["depth"]})
+    return []
+
+
+@statement("nas_create_data", "LINK_ARCHITECTURE_LAYERS")
+def _h_link_architecture_layers(g, p):
+    layers = [g.find("Layer", name=name) for name in ("Conv3x3", "ReLU", "MaxPool2x2")]
+    for a in g.find("Architecture", name=p["arch"]):
+        for l1 in layers[0]:
+            for l2 in layers[1]:
+                for l3 in layers[2]:
+                    for order, l in enumerate((l1, l2, l3), 1):
+                        g.merge_relationship(a, "COMPOSED_OF", l, {"order": order})
+    return []
+
+
+@statement("nas_create_data", "CREATE_EXPERIMENT")
+def _h_create_nas_experiment(g, p):
+    for a in g.find("Architecture", name=p["arch"]):
+        for d in g.find("Dataset", name=p["dataset"]):
+            for h in g.find("Hardware", name=p["hardware"]):
+                e = g.create_node(["Experiment"], {
+                    "accuracy": p["accuracy"], "latencyMs": p["latency"], "flops": p["flops"],
+                    "energy_mJ": p["energy"], "timestamp": _to_datetime(p["time"]),
+                })
+                g.create_relationship(a, "HAS_EXPERIMENT", e)
+                g.merge_relationship(a, "TRAINED_ON", d)
+                g.merge_relationship(a, "EVALUATED_ON", h)
+                fold_arch_stats(g, a, _experiment_stats(e))
+    return []
+
+
+@statement("6_nas_queries", "VALID_ARCHITECTURES")
+def _h_valid_architectures(g, p):
+    rows = []
+    for a in g.find("Architecture"):
+        for e in g.targets(a, "HAS_EXPERIMENT", "Experiment"):
+            acc, lat = e.props.get("accuracy"), e.props.get("latencyMs")
+            if acc is not None and acc > 0.85 and lat is not None and lat < 20:
+                rows.append({"a.name": _name(a), "e.accuracy": acc, "e.latencyMs": lat})
+    return rows
+
+
+@statement("nas_kg_loop", "SHOULD_TRAIN")
+def _h_should_train(g, p):
+    def slow(a):
+        if a.props.get("lat_max") is not None:
+            return a.props["lat_max"] > 20
+        return any(e.props.get("latencyMs") is not None and e.props["latencyMs"] > 20
+                   for e in g.targets(a, "HAS_EXPERIMENT", "Experiment"))
+
+    bad = [a for a in g.find("Architecture", depth=p["depth"]) if slow(a)]
+    return [{"bad_count": len(bad)}]
+
+
+@statement("nas_kg_loop", "STORE_ARCHITECTURE")
+def _h_store_architecture(g, p):
+    _merge_architecture(g, p["name"], p["depth"], p["fingerprint"])
+    return []
+
+
+@statement("nas_kg_loop", "LINK_LAYER")
+def _h_link_layer(g, p):
+    for a in g.find("Architecture", name=p["arch"]):
+        for l in g.find("Layer", name=p["layer"]):
+            g.merge_relationship(a, "COMPOSED_OF", l, {"order": p["order"]})
+    return []
+
+
+@statement("nas_kg_loop", "STORE_EXPERIMENT")
+def _h_store_experiment(g, p):
+    for a in g.find("Architecture", name=p["arch"]):
+        e = _create_experiment(g, a, p["name"], p["acc"], p["lat"], p["time"])
+        fold_arch_stats(g, a, _experiment_stats(e))
+    return []
+
+
+@statement("nas_experiment_sink", "STORE_RESULTS_BATCH")
+def _h_store_results_batch(g, p):
+    for row in p["results"]:
+        a = _merge_architecture(g, row["arch"], len(row["layers"]), row.get("fingerprint"))
+        _create_experiment(g, a, row["name"], row["acc"], row["lat"], row["time"])
+        for i, layer in enumerate(row["layers"]):
+            for l in g.find("Layer", name=layer):
+                g.merge_relationship(a, "COMPOSED_OF", l, {"order": i + 1})
+    return []
+
+
+@statement("nas_arch_stats", "UPDATE_ARCH_STATS_BATCH")
+def _h_update_arch_stats_batch(g, p):
+    for row in p["stats"]:
+        for a in g.find("Architecture", name=row["arch"]):
+            fold_arch_stats(g, a, {**row, "last_time": _to_datetime(row["last_time"])})
+    return []
+
+
+@statement("nas_arch_stats", "REBUILD_ARCH_STATS_BATCH")
+def _h_rebuild_arch_stats_batch(g, p):
+    archs = sorted((a for a in g.find("Architecture")
+                    if a.props.get("name") is not None and a.props["name"] > p["after"]),
+                   key=lambda a: a.props["name"])[:p["limit"]]
+    for a in archs:
+        experiments = g.targets(a, "HAS_EXPERIMENT", "Experiment")
+        acc = [e.props["accuracy"] for e in experiments if e.props.get("accuracy") is not None]
+        lat = [e.props["latencyMs"] for e in experiments if e.props.get("latencyMs") is not None]
+        times = [e.props["timestamp"] for e in experiments if e.props.get("timestamp") is not None]
+        for key, value in (("exp_count", len(experiments)),
+                           ("acc_sum", sum(acc)), ("acc_min", min(acc, default=None)),
+                           ("acc_max", max(acc, default=None)),
+                           ("lat_sum", sum(lat)), ("lat_min", min(lat, default=None)),
+                           ("lat_max", max(lat, default=None)),
+                           ("last_timestamp", max(times, default=None))):
+            g.set_property(a, key, value)
+    return [{"updated": len(archs), "last_name": archs[-1].props["name"] if archs else None}]
+
+
+@statement("nas_arch_stats", "ARCH_STATS")
+def _h_arch_stats(g, p):
+    rows = []
+    for a in g.find("Architecture", name=p["name"]):
+        props = a.props
+        runs = props.get("exp_count")
+        rows.append({
+            "name": props.get("name"), "runs": runs,
+            "best_accuracy": props.get("acc_max"), "worst_accuracy": props.get("acc_min"),
+            "mean_accuracy": props["acc_sum"] / runs if runs and props.get("acc_sum") is not None else None,
+            "min_latency": props.get("lat_min"), "max_latency": props.get("lat_max"),
+            "mean_latency": props["lat_sum"] / runs if runs and props.get("lat_sum") is not None else None,
+            "last_timestamp": _to_string(props.get("last_timestamp")),
+        })
+    return rows
+
+
+@statement("nas_pruning_index", "WARM_INDEX")
+def _h_warm_index(g, p):
+    # One row per Architecture (the query groups by `a`); collect() drops null names
+    rows = []
+    for a in g.find("Architecture"):
+        experiments = g.targets(a, "HAS_EXPERIMENT", "Experiment")
+        if not experiments:
+            continue
+        latencies = [e.props.get("latencyMs") for e in experiments]
+        accuracies = [e.props.get("accuracy") for e in experiments]
+        known_lat = [v for v in latencies if v is not None]
+        known_acc = [v for v in accuracies if v is not None]
+        rows.append({
+            "depth": a.props.get("depth"),
+            "layers": [name for name in _ordered_layers(g, a) if name is not None],
+            "runs": len(experiments),
+            "over_budget": sum(1 for v in known_lat if v > p["budget"]),
+            "min_latency": min(known_lat, default=None), "max_latency": max(known_lat, default=None),
+            "min_accuracy": min(known_acc, default=None), "max_accuracy": max(known_acc, default=None),
+        })
+    return rows
+
+
+@statement("nas_prefix_index", "WARM_PREFIX_INDEX")
+def _h_warm_prefix_index(g, p):
+    rows = []
+    for a in g.find("Architecture"):
+        props = a.props
+        runs = props.get("exp_count")
+        layers = _ordered_layers(g, a)
+        if not runs or runs <= 0 or not layers:
+            continue
+        rows.append({
+            "arch": props.get("name"), "fingerprint": props.get("fingerprint"), "layers": layers,
+            "runs": runs,
+            "accuracy": props["acc_sum"] / runs if props.get("acc_sum") is not None else None,
+            "latency": props["lat_sum"] / runs if props.get("lat_sum") is not None else None,
+            "best_accuracy": props.get("acc_max"),
+        })
+    return rows
+
+
+@statement("nas_fingerprint", "LAYER_PROPERTIES")
+def _h_layer_properties(g, p):
+    return [{"name": _name(l), "props": dict(l.props)} for l in g.find("Layer")]
+
+
+@statement("nas_fingerprint", "KNOWN_RESULTS")
+def _h_known_results(g, p):
+    rows = []
+    for a in g.find("Architecture"):
+        if a.props.get("fingerprint") is None:
+            continue
+        for e in g.targets(a, "HAS_EXPERIMENT", "Experiment") or [None]:
+            props = e.props if e is not None else {}
+            rows.append((props.get("timestamp"), {
+                "fingerprint": a.props["fingerprint"], "arch": _name(a), "evaluated": e is not None,
+                "accuracy": props.get("accuracy"), "latency": props.get("latencyMs"),
+            }))
+    rows.sort(key=lambda item: _sort_key(item[0]))
+    return [row for _, row in rows]
+
+
+@statement("nas_fingerprint", "MISSING_FINGERPRINTS")
+def _h_missing_fingerprints(g, p):
+    archs = sorted((a for a in g.find("Architecture")
+                    if a.props.get("fingerprint") is None and _name(a) is not None and _name(a) > p["after"]),
+                   key=_name)[:p["limit"]]
+    return [{"name": _name(a), "layers": [name for name in _ordered_layers(g, a) if name is not None]}
+            for a in archs]
+
+
+@statement("nas_fingerprint", "SET_FINGERPRINTS")
+def _h_set_fingerprints(g, p):
+    updated = 0
+    for row in p["rows"]:
+        for a in g.find("Architecture", name=row["name"]):
+            if a.props.get("fingerprint") is None and not g.find("Architecture", fingerprint=row["fingerprint"]):
+                g.set_property(a, "fingerprint", row["fingerprint"])
+                updated += 1
+    return [{"updated": updated}]
+
+
+@statement("nas_pareto", "PARETO_CANDIDATES")
+def _h_pareto_candidates(g, p):
+    rows = []
+    for a in g.find("Architecture"):
+        hardware = [h for h in g.targets(a, "EVALUATED_ON", "Hardware") if _name(h) == p["hardware"]]
+        datasets = [d for d in g.targets(a, "TRAINED_ON", "Dataset") if _name(d) == p["dataset"]]
+        for _ in range(len(hardware) * len(datasets)):
+            for e in g.targets(a, "HAS_EXPERIMENT", "Experiment"):
+                acc, lat, energy = e.props.get("accuracy"), e.props.get("latencyMs"), e.props.get("energy_mJ")
+                if acc is None or acc < p["min_accuracy"] or lat is None or lat > p["max_latency"]:
+                    continue
+                if p["use_energy"] and energy is None:
+                    continue
+                rows.append({
+                    "arch": _name(a), "experiment": _name(e), "accuracy": acc, "latency": lat,
+                    "energy": energy, "timestamp": _to_string(e.props.get("timestamp")),
+                })
+    return rows
+
+
+# -- benchmarks/synthetic.py ------------------------------------------------------
+
+@statement("benchmarks.synthetic", "SEED_LAYERS")
+def _h_seed_layers(g, p):
+    for row in p["layers"]:
+        layer = g.merge_node("Layer", {"name": row["name"]})
+        for key, value in row["props"].items():
+            g.set_property(layer, key, value)
+    return []
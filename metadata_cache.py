@@ -0,0 +1,106 @@
+"""In-process LRU/TTL cache for MetadataQuery lookups.
+
+MetadataQuery(..., cache=QueryCache()) serves repeat calls of
+get_features_for_file / get_all_units / get_files_by_type from memory.
+Each call returns a deep copy of the cached rows, so a caller that edits its
+result does not change what other callers get.
+Every live cache registers itself here, and MetadataIngest calls
+invalidate_datafile() after each write so cached feature lists never go stale
+within the process.
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_caches = weakref.WeakSet()
+
+# Returned by QueryCache.get() when the key is absent or expired
+MISSING = object()
+
+
+class QueryCache:
+    def __init__(self, maxsize=1024, ttl=300.0):
+        """maxsize: max cached lookups (LRU eviction); ttl: seconds, None = no expiry."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _caches.add(self)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is not MISSING:
+                value, expires = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is MISSING:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, predicate):
+        """Drop every key for which predicate(key) is true."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _datafile_predicate(datafile_names):
+    names = set(datafile_names)
+
+    def predicate(key):
+        kind = key[0]
+        if kind == "features":
+            return key[1] in names
+        # Any DataFile write can change type listings and the set of units
+        return kind in ("files_by_type", "units")
+    return predicate
+
+
+def invalidate_datafile(*datafile_names):
+    """Drop cached lookups that a write to these DataFiles can change, in every live cache."""
+    predicate = _datafile_predicate(datafile_names)
+    return sum(cache.invalidate(predicate) for cache in list(_caches))
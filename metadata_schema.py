@@ -0,0 +1,156 @@
+"""Constraints and indexes for the metadata graph (Dataset/DataFile/Feature/...).
+
+Mirrors create_constraints in nas/1_nas_kg_create_schema.py for the labels that
+ingest_metadata.py MERGEs on, so every MERGE/MATCH is an index seek instead of a
+label scan. Everything uses IF NOT EXISTS and can be re-run safely.
+
+Usage:
+    python metadata_schema.py            # create schema and print the coverage report
+"""
+from neo4j_connection import get_driver, close_driver
+
+# (name, label, properties) of the uniqueness constraints; each also backs an index
+CONSTRAINTS = [
+    ("dataset_name", "Dataset", ("name",)),
+    ("datafile_name", "DataFile", ("name",)),
+    ("feature_name", "Feature", ("name",)),
+    ("category_name", "Category", ("name",)),
+    ("unit_name", "Unit", ("name",)),
+    ("asset_name", "Asset", ("name",)),
+]
+
+# (name, label, properties) of plain range indexes
+INDEXES = [
+    # Storage is MERGEd on its full property tuple (NODE KEY needs Enterprise)
+    ("storage_location", "Storage", ("type", "path", "storage_url", "storage_name")),
+    ("datafile_type", "DataFile", ("type",)),
+]
+
+# Node lookups issued by ingest_metadata.py / query_metadata.py
+LOOKUP_PATTERNS = [
+    ("MERGE (ds:Dataset {name})", "Dataset", ("name",)),
+    ("MERGE/MATCH (df:DataFile {name})", "DataFile", ("name",)),
+    ("MATCH (df:DataFile) WHERE df.type = $file_type", "DataFile", ("type",)),
+    ("MERGE/MATCH (f:Feature {name})", "Feature", ("name",)),
+    ("MERGE (c:Category {name})", "Category", ("name",)),
+    ("MERGE (u:Unit {name})", "Unit", ("name",)),
+    ("MERGE (a:Asset {name})", "Asset", ("name",)),
+    ("MERGE (s:Storage {type, path, storage_url, storage_name})", "Storage",
+     ("type", "path", "storage_url", "storage_name")),
+]
+
+_bootstrapped = set()
+
+
+SHOW_NODE_INDEXES = """
+    SHOW INDEXES
+    YIELD entityType, labelsOrTypes, properties, state
+    WHERE entityType = 'NODE' AND labelsOrTypes IS NOT NULL
+    RETURN labelsOrTypes AS labels, properties, state
+"""
+
+
+def constraint_statements():
+    for name, label, props in CONSTRAINTS:
+        var = label[0].lower()
+        keys = ", ".join(f"{var}.{p}" for p in props)
+        yield f"""
+        CREATE CONSTRAINT {name} IF NOT EXISTS
+        FOR ({var}:{label})
+        REQUIRE ({keys}) IS UNIQUE
+        """
+
+
+def index_statements():
+    for name, label, props in INDEXES:
+        var = label[0].lower()
+        keys = ", ".join(f"{var}.{p}" for p in props)
+        yield f"""
+        CREATE INDEX {name} IF NOT EXISTS
+        FOR ({var}:{label})
+        ON ({keys})
+        """
+
+
+def create_constraints(tx):
+    for statement in constraint_statements():
+        tx.run(statement)
+
+
+def create_indexes(tx):
+    for statement in index_statements():
+        tx.run(statement)
+
+
+def ensure_schema(driver):
+    """Create constraints and indexes once per driver in this process."""
+    if id(driver) in _bootstrapped:
+        return False
+    # Schema commands cannot share a transaction with each other's data writes,
+    # keep them in their own transactions
+    with driver.session() as session:
+        session.execute_write(create_constraints)
+        session.execute_write(create_indexes)
+    _bootstrapped.add(id(driver))
+    return True
+
+
+def fetch_indexes(tx):
+    """Return [(label, (props...)), ...] for every online node index."""
+    return online_indexes(tx.run(SHOW_NODE_INDEXES))
+
+
+def online_indexes(records):
+    indexes = []
+    for record in records:
+        if record["state"] != "ONLINE":
+            continue
+        for label in record["labels"]:
+            indexes.append((label, tuple(record["properties"])))
+    return indexes
+
+
+def is_covered(label, props, indexes):
+    # A composite index serves a lookup when its properties are all in the MERGE key
+    # (range indexes need every indexed property in the predicate)
+    for idx_label, idx_props in indexes:
+        if idx_label == label and idx_props and set(idx_props) <= set(props):
+            return True
+    return False
+
+
+def unindexed_patterns(indexes):
+    """Return the LOOKUP_PATTERNS entries that no existing index serves."""
+    return [
+        {"pattern": pattern, "label": label, "properties": list(props)}
+        for pattern, label, props in LOOKUP_PATTERNS
+        if not is_covered(label, props, indexes)
+    ]
+
+
+def schema_report(driver):
+    with driver.session() as session:
+        indexes = session.execute_read(fetch_indexes)
+    return build_report(indexes)
+
+
+def build_report(indexes):
+    missing = unindexed_patterns(indexes)
+    return {
+        "indexed": len(LOOKUP_PATTERNS) - len(missing),
+        "total": len(LOOKUP_PATTERNS),
+        "unindexed": missing,
+    }
+
+
+if __name__ == "__main__":
+    driver = get_driver()
+    try:
+        ensure_schema(driver)
+        print("Metadata schema created successfully")
+        report = schema_report(driver)
+        print(f"Indexed lookup patterns: {report['indexed']}/{report['total']}")
+        for item in report["unindexed"]:
+            print("  UNINDEXED:", item["pattern"])
+    finally:
+        close_driver()
@@ -1,4 +1,5 @@
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver
 
 # from neo4j import GraphDatabase
 
@@ -21,6 +22,12 @@ def create_constraints(tx):
     REQUIRE a.name IS UNIQUE
     """)
     
+    tx.run("""
+    CREATE CONSTRAINT arch_fingerprint IF NOT EXISTS
+    FOR (a:Architecture)
+    REQUIRE a.fingerprint IS UNIQUE
+    """)
+
     tx.run("""
     CREATE CONSTRAINT layer_name IF NOT EXISTS
     FOR (l:Layer)
@@ -39,8 +46,26 @@ def create_constraints(tx):
     REQUIRE h.name IS UNIQUE
     """)
 
+# Range indexes on the Experiment metrics used by threshold and Pareto queries
+# (6_nas_queries.py, nas_pareto.py)
+def create_indexes(tx):
+    for prop in ("accuracy", "latencyMs", "flops", "energy_mJ", "timestamp"):
+        tx.run(f"""
+        CREATE RANGE INDEX experiment_{prop.lower()} IF NOT EXISTS
+        FOR (e:Experiment)
+        ON (e.{prop})
+        """)
+
+    # should_train filters architectures by depth
+    tx.run("""
+    CREATE RANGE INDEX architecture_depth IF NOT EXISTS
+    FOR (a:Architecture)
+    ON (a.depth)
+    """)
+
 if __name__ == "__main__":
     with driver.session() as session:
         session.execute_write(create_constraints)
+        session.execute_write(create_indexes)
     close_driver()
     print("Schema created successfully")
@@ -1,21 +1,11 @@
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver
+from nas_create_data import MERGE_DATASET, MERGE_HARDWARE
 
 def create_dataset_and_hardware(tx):
-    tx.run("""
-    MERGE (d:Dataset {
-        name: $dataset,
-        samples: $samples,
-        classes: $classes
-    })
-    """, dataset="CIFAR-10", samples=60000, classes=10)
+    tx.run(MERGE_DATASET, dataset="CIFAR-10", samples=60000, classes=10)
 
-    tx.run("""
-    MERGE (h:Hardware {
-        name: $hardware,
-        maxMemoryMB: $memory,
-        maxLatencyMs: $latency
-    })
-    """, hardware="Jetson-Nano", memory=4096, latency=20)
+    tx.run(MERGE_HARDWARE, hardware="Jetson-Nano", memory=4096, latency=20)
 
 if __name__ == "__main__":
     with driver.session() as session:
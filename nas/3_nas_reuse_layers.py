@@ -1,4 +1,6 @@
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver
+from nas_create_data import MERGE_LAYER
 
 def create_layers(tx):
     layers = [
@@ -8,10 +10,7 @@ def create_layers(tx):
     ]
 
     for layer in layers:
-        tx.run("""
-        MERGE (l:Layer {name: $name})
-        SET l += $props
-        """, name=layer["name"], props=layer)
+        tx.run(MERGE_LAYER, name=layer["name"], props=layer)
 
 if __name__ == "__main__":
     with driver.session() as session:
@@ -1,22 +1,11 @@
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver
+from nas_create_data import LINK_ARCHITECTURE_LAYERS, MERGE_ARCHITECTURE
 
 def create_architecture(tx):
-    tx.run("""
-    MERGE (a:Architecture {
-        name: $name,
-        depth: $depth
-    })
-    """, name="NAS_CNN_v1", depth=5)
+    tx.run(MERGE_ARCHITECTURE, name="NAS_CNN_v1", depth=5)
 
-    tx.run("""
-    MATCH (a:Architecture {name:$arch}),
-          (l1:Layer {name:"Conv3x3"}),
-          (l2:Layer {name:"ReLU"}),
-          (l3:Layer {name:"MaxPool2x2"})
-    MERGE (a)-[:COMPOSED_OF {order:1}]->(l1)
-    MERGE (a)-[:COMPOSED_OF {order:2}]->(l2)
-    MERGE (a)-[:COMPOSED_OF {order:3}]->(l3)
-    """, arch="NAS_CNN_v1")
+    tx.run(LINK_ARCHITECTURE_LAYERS, arch="NAS_CNN_v1")
 
 if __name__ == "__main__":
     with driver.session() as session:
@@ -1,22 +1,10 @@
 from datetime import datetime
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver
+from nas_create_data import CREATE_EXPERIMENT
 
 def create_experiment(tx):
-    tx.run("""
-    MATCH (a:Architecture {name:$arch}),
-          (d:Dataset {name:$dataset}),
-          (h:Hardware {name:$hardware})
-    CREATE (e:Experiment {
-        accuracy: $accuracy,
-        latencyMs: $latency,
-        flops: $flops,
-        energy_mJ: $energy,
-        timestamp: datetime($time)
-    })
-    MERGE (a)-[:HAS_EXPERIMENT]->(e)
-    MERGE (a)-[:TRAINED_ON]->(d)
-    MERGE (a)-[:EVALUATED_ON]->(h)
-    """,
+    tx.run(CREATE_EXPERIMENT,
     arch="NAS_CNN_v1",
     dataset="CIFAR-10",
     hardware="Jetson-Nano",
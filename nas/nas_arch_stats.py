@@ -0,0 +1,150 @@
+"""Running experiment aggregates on Architecture nodes.
+
+Every write path that creates an Experiment (store_result and ExperimentSink
+in the loop, create_experiment in 5_nas_store_exp_results.py) also folds it
+into these properties of its Architecture, in the same transaction:
+
+    exp_count, acc_sum, acc_min, acc_max, lat_sum, lat_min, lat_max, last_timestamp
+
+so best accuracy, mean latency and run counts are property reads instead of
+a scan over all HAS_EXPERIMENT edges. If they drift (e.g. experiments written
+by other tools), rebuild them in batches:
+
+    python nas_arch_stats.py rebuild --batch-size 500
+    python nas_arch_stats.py show --name NAS_CNN_v1
+"""
+import argparse
+import logging
+
+from neo4j_config import driver
+from neo4j_connection import close_driver
+
+logger = logging.getLogger(__name__)
+
+# Fold the partial aggregate `s` into architecture `a`; both must be in scope
+MERGE_ARCH_STATS = """
+SET a.exp_count = coalesce(a.exp_count, 0) + s.count,
+    a.acc_sum = coalesce(a.acc_sum, 0.0) + s.acc_sum,
+    a.acc_min = CASE WHEN a.acc_min IS NULL OR s.acc_min < a.acc_min THEN s.acc_min ELSE a.acc_min END,
+    a.acc_max = CASE WHEN a.acc_max IS NULL OR s.acc_max > a.acc_max THEN s.acc_max ELSE a.acc_max END,
+    a.lat_sum = coalesce(a.lat_sum, 0.0) + s.lat_sum,
+    a.lat_min = CASE WHEN a.lat_min IS NULL OR s.lat_min < a.lat_min THEN s.lat_min ELSE a.lat_min END,
+    a.lat_max = CASE WHEN a.lat_max IS NULL OR s.lat_max > a.lat_max THEN s.lat_max ELSE a.lat_max END,
+    a.last_timestamp = CASE WHEN a.last_timestamp IS NULL OR s.last_time > a.last_timestamp
+                            THEN s.last_time ELSE a.last_timestamp END
+"""
+
+# Append after a statement that has just created Experiment `e` for architecture `a`
+UPDATE_ARCH_STATS_FROM_EXPERIMENT = """
+WITH a, {count: 1,
+         acc_sum: e.accuracy, acc_min: e.accuracy, acc_max: e.accuracy,
+         lat_sum: e.latencyMs, lat_min: e.latencyMs, lat_max: e.latencyMs,
+         last_time: e.timestamp} AS s
+""" + MERGE_ARCH_STATS
+
+# Pre-aggregated rows from aggregate_results(); last_time arrives as an ISO string
+UPDATE_ARCH_STATS_BATCH = """
+UNWIND $stats AS row
+MATCH (a:Architecture {name: row.arch})
+WITH a, row {.*, last_time: datetime(row.last_time)} AS s
+""" + MERGE_ARCH_STATS
+
+REBUILD_ARCH_STATS_BATCH = """
+MATCH (a:Architecture)
+WHERE a.name > $after
+WITH a ORDER BY a.name LIMIT $limit
+OPTIONAL MATCH (a)-[:HAS_EXPERIMENT]->(e:Experiment)
+WITH a, count(e) AS runs,
+     sum(e.accuracy) AS acc_sum, min(e.accuracy) AS acc_min, max(e.accuracy) AS acc_max,
+     sum(e.latencyMs) AS lat_sum, min(e.latencyMs) AS lat_min, max(e.latencyMs) AS lat_max,
+     max(e.timestamp) AS last_time
+SET a.exp_count = runs,
+    a.acc_sum = acc_sum, a.acc_min = acc_min, a.acc_max = acc_max,
+    a.lat_sum = lat_sum, a.lat_min = lat_min, a.lat_max = lat_max,
+    a.last_timestamp = last_time
+RETURN count(a) AS updated, max(a.name) AS last_name
+"""
+
+ARCH_STATS = """
+MATCH (a:Architecture {name: $name})
+RETURN a.name AS name, a.exp_count AS runs,
+       a.acc_max AS best_accuracy, a.acc_min AS worst_accuracy,
+       CASE WHEN a.exp_count > 0 THEN a.acc_sum / a.exp_count END AS mean_accuracy,
+       a.lat_min AS min_latency, a.lat_max AS max_latency,
+       CASE WHEN a.exp_count > 0 THEN a.lat_sum / a.exp_count END AS mean_latency,
+       toString(a.last_timestamp) AS last_timestamp
+"""
+
+
+def aggregate_results(results):
+    """Collapse buffered loop results (ExperimentSink rows) to one stats row per architecture."""
+    stats = {}
+    for row in results:
+        s = stats.get(row["arch"])
+        if s is None:
+            stats[row["arch"]] = {
+                "arch": row["arch"], "count": 1,
+                "acc_sum": row["acc"], "acc_min": row["acc"], "acc_max": row["acc"],
+                "lat_sum": row["lat"], "lat_min": row["lat"], "lat_max": row["lat"],
+                "last_time": row["time"],
+            }
+            continue
+        s["count"] += 1
+        s["acc_sum"] += row["acc"]
+        s["acc_min"] = min(s["acc_min"], row["acc"])
+        s["acc_max"] = max(s["acc_max"], row["acc"])
+        s["lat_sum"] += row["lat"]
+        s["lat_min"] = min(s["lat_min"], row["lat"])
+        s["lat_max"] = max(s["lat_max"], row["lat"])
+        s["last_time"] = max(s["last_time"], row["time"])
+    return list(stats.values())
+
+
+def get_arch_stats(tx, name):
+    record = tx.run(ARCH_STATS, name=name).single()
+    return record.data() if record else None
+
+
+def rebuild_arch_stats(batch_size=500):
+    """Recompute the aggregates of every Architecture, `batch_size` per transaction."""
+    def rebuild_batch(tx, after):
+        record = tx.run(REBUILD_ARCH_STATS_BATCH, after=after, limit=batch_size).single()
+        return record["updated"], record["last_name"]
+
+    total = 0
+    after = ""
+    with driver.session() as session:
+        while True:
+            updated, last_name = session.execute_write(rebuild_batch, after)
+            if not updated:
+                break
+            total += updated
+            after = last_name
+            logger.info("Rebuilt stats for %d architectures (total %d)", updated, total)
+    return total
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Architecture experiment aggregates")
+    sub = parser.add_subparsers(dest="cmd")
+    sp = sub.add_parser("rebuild", help="Recompute aggregates from HAS_EXPERIMENT in batches")
+    sp.add_argument("--batch-size", type=int, default=500)
+    sp = sub.add_parser("show", help="Print the aggregates of one architecture")
+    sp.add_argument("--name", required=True)
+    args = parser.parse_args()
+
+    try:
+        if args.cmd == "rebuild":
+            print(f"Rebuilt stats for {rebuild_arch_stats(args.batch_size)} architectures")
+        elif args.cmd == "show":
+            with driver.session() as session:
+                print(session.execute_read(get_arch_stats, args.name))
+        else:
+            parser.print_help()
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
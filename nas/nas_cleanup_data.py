@@ -1,35 +1,52 @@
-"""nas_cleanup_neo4j_data.py
+"""nas_cleanup_data.py
 
 Utility helpers to safely clean up Neo4j data in batches.
 
 Features:
-- connect to Neo4j using the official `neo4j` python driver (listed in requirements)
+- connection from neo4j_config (NEO4J_* env vars), overridable with --uri/--user/--password
 - dry-run counts
 - batched DETACH DELETE by label and optional WHERE clause
 - batched delete of orphan nodes
 - remove properties in batches
+- optional server-side batching (CALL { ... } IN TRANSACTIONS), so one round
+  trip deletes `--chunk-size` nodes in `--batch-size` transactions
+- progress/ETA logging and a checkpoint file to resume after an interruption
 - small CLI for common actions
 
 Usage examples (from shell):
-  python nas_cleanup_neo4j_data.py --uri bolt://localhost:7687 --user neo4j --password pass dry-count --label OldLabel
-  python nas_cleanup_neo4j_data.py --uri bolt://localhost:7687 --user neo4j --password pass delete-label --label OldLabel --batch-size 500
+  python nas_cleanup_data.py dry-count --label OldLabel
+  python nas_cleanup_data.py --batch-size 500 delete-label --label OldLabel
+  python nas_cleanup_data.py --server-side --batch-size 10000 delete-label --label Experiment
+  python nas_cleanup_data.py --resume delete-label --label Experiment   # after Ctrl-C
+  python nas_cleanup_data.py drop-schema   # NAS constraints and indexes
 
 Be conservative: run dry-count first and back up your DB before destructive actions.
 """
 from __future__ import annotations
 
 import re
+import os
+import sys
+import json
+import time
 import argparse
 import logging
 from typing import Optional, Dict, Any
 
-# from neo4j import GraphDatabase, Driver
-import clean_metadata
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver, configure
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHECKPOINT = ".nas_cleanup_checkpoint.json"
+
+# Created by 1_nas_kg_create_schema.py
+NAS_CONSTRAINTS = ("arch_name", "arch_fingerprint", "layer_name", "dataset_name", "hardware_name")
+NAS_INDEXES = (
+    "experiment_accuracy", "experiment_latencyms", "experiment_flops",
+    "experiment_energy_mj", "experiment_timestamp", "architecture_depth",
+)
+
 
 def sanitize_label(label: str) -> str:
     """Allow only alphanumeric and underscore labels to avoid injection.
@@ -41,209 +58,289 @@ def sanitize_label(label: str) -> str:
     return label
 
 
-# def get_driver(uri: str, user: str, password: str) -> Driver:
-#     return GraphDatabase.driver(uri, auth=(user, password))
-
+def sanitize_name(name: str) -> str:
+    """Same rule as sanitize_label, for property, constraint and index names."""
+    if not re.match(r"^[A-Za-z0-9_]+$", name):
+        raise ValueError(f"Name {name!r} contains invalid characters. Allowed: A-Z a-z 0-9 _")
+    return name
 
-def count_nodes( label: Optional[str] = None, where_cypher: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> int:
-    """Return the number of nodes matching the optional label and where clause."""
-    if label:
-        label = sanitize_label(label)
-        label_clause = f":{label}"
-    else:
-        label_clause = ""
-    where_clause = f"WHERE {where_cypher}" if where_cypher else ""
-    query = f"MATCH (n{label_clause}) {where_clause} RETURN count(n) AS cnt"
-    with driver.session() as session:
-        rec = session.run(query, **(params or {})).single()
-        return int(rec["cnt"]) if rec else 0
-
-
-def delete_nodes_by_label_batch(label: str, where_cypher: Optional[str] = None, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> int:
-    """Delete nodes with a label (and optional WHERE clause) in batches.
 
-    Returns total deleted.
-    """
-    label = sanitize_label(label)
-    total_deleted = 0
-    where_clause = f"WHERE {where_cypher}" if where_cypher else ""
-    query = f"MATCH (n:{label}) {where_clause} WITH n LIMIT $limit DETACH DELETE n RETURN count(n) AS deleted"
-    params = dict(params or {})
+def _match_clause(label: Optional[str], where_cypher: Optional[str]) -> str:
+    label_clause = f":{sanitize_label(label)}" if label else ""
+    where_clause = f" WHERE {where_cypher}" if where_cypher else ""
+    return f"MATCH (n{label_clause}){where_clause}"
 
-    while True:
-        with driver.session() as session:
-            rec = session.run(query, **{**params, "limit": batch_size}).single()
-            deleted = int(rec["deleted"]) if rec else 0
-        total_deleted += deleted
-        logger.info("Deleted %d nodes in this batch (total %d)", deleted, total_deleted)
-        if deleted == 0:
-            break
-    return total_deleted
 
+def batch_query(match: str, action: str, server_side: bool = False, concurrency: int = 1) -> str:
+    """Statement applying `action` to at most $limit nodes of `match`.
 
-def delete_orphan_nodes_batch(batch_size: int = 1000) -> int:
-    """Delete nodes with no relationships in batches. Returns total deleted."""
-    total_deleted = 0
-    query = (
-        "MATCH (n) WHERE size((n)--()) = 0 WITH n LIMIT $limit DETACH DELETE n RETURN count(n) AS deleted"
+    Client-side, the statement is one transaction per call. Server-side it runs
+    in an auto-commit transaction and the server commits every $batch rows;
+    concurrency > 1 uses CONCURRENT TRANSACTIONS (Neo4j 5.21+).
+    """
+    if not server_side:
+        return f"{match} WITH n LIMIT $limit {action} RETURN count(*) AS affected"
+    concurrent = f"{concurrency} CONCURRENT " if concurrency > 1 else ""
+    return (
+        f"{match} WITH n LIMIT $limit "
+        f"CALL {{ WITH n {action} }} IN {concurrent}TRANSACTIONS OF $batch ROWS "
+        f"RETURN count(*) AS affected"
     )
-    while True:
-        with driver.session() as session:
-            rec = session.run(query, limit=batch_size).single()
-            deleted = int(rec["deleted"]) if rec else 0
-        total_deleted += deleted
-        logger.info("Deleted %d orphan nodes in this batch (total %d)", deleted, total_deleted)
-        if deleted == 0:
-            break
-    return total_deleted
 
 
-def remove_property_batch(label: str, prop: str, batch_size: int = 1000) -> int:
-    """Remove a property from nodes of a label in batches. Returns total nodes updated.
-
-    Note: This sets the property to NULL which effectively removes it for Neo4j.
-    """
-    label = sanitize_label(label)
+class Checkpoint:
+    """Progress of interrupted operations, keyed by operation, in a JSON file."""
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def update(self, key: str, **fields: Any) -> None:
+        self.entries.setdefault(key, {}).update(fields)
+        self.save()
+
+    def discard(self, key: str) -> None:
+        if self.entries.pop(key, None) is not None:
+            self.save()
+
+    def save(self) -> None:
+        if not self.entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    """Logs done/total, rate and ETA per batch and mirrors the totals to a Checkpoint."""
+
+    def __init__(self, what: str, total: int, done: int = 0,
+                 checkpoint: Optional[Checkpoint] = None, key: Optional[str] = None):
+        self.what = what
+        self.total = total
+        self.done = done
+        self.checkpoint = checkpoint
+        self.key = key
+        self._start = time.monotonic()
+        self._start_done = done
+        if checkpoint is not None and key is not None:
+            checkpoint.update(key, total=total, done=done)
+
+    def advance(self, n: int) -> None:
+        self.done += n
+        elapsed = time.monotonic() - self._start
+        rate = (self.done - self._start_done) / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.done, 0)
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+        pct = 100.0 * self.done / self.total if self.total else 100.0
+        logger.info("%s: %d/%d (%.1f%%), %.0f/s, ETA %s", self.what, self.done, self.total, pct, rate, eta)
+        if self.checkpoint is not None and self.key is not None:
+            self.checkpoint.update(self.key, done=self.done)
+
+    def finish(self) -> None:
+        if self.checkpoint is not None and self.key is not None:
+            self.checkpoint.discard(self.key)
+
+
+def run_batches(session, query: str, params: Optional[Dict[str, Any]] = None, limit: int = 1000,
+                batch_size: int = 1000, progress: Optional[Progress] = None) -> int:
+    """Re-run a batch_query() statement on one session until it affects no nodes."""
+    params = dict(params or {})
     total = 0
-    query = (
-        f"MATCH (n:{label}) WHERE exists(n.{prop}) WITH n LIMIT $limit SET n.{prop} = NULL RETURN count(n) AS updated"
-    )
     while True:
-        with driver.session() as session:
-            rec = session.run(query, limit=batch_size).single()
-            updated = int(rec["updated"]) if rec else 0
-        total += updated
-        logger.info("Cleared property '%s' on %d nodes in this batch (total %d)", prop, updated, total)
-        if updated == 0:
+        rec = session.run(query, **{**params, "limit": limit, "batch": batch_size}).single()
+        affected = int(rec["affected"]) if rec else 0
+        if affected == 0:
             break
+        total += affected
+        if progress is not None:
+            progress.advance(affected)
+    if progress is not None:
+        progress.finish()
     return total
 
 
-def drop_constraint(name: str) -> None:
-    q = f"DROP CONSTRAINT {name} IF EXISTS"
-    with driver.session() as session:
-        session.run(q)
-    logger.info("Dropped constraint (if existed): %s", name)
+def count_nodes(session, label: Optional[str] = None, where_cypher: Optional[str] = None,
+                params: Optional[Dict[str, Any]] = None) -> int:
+    """Return the number of nodes matching the optional label and where clause."""
+    query = f"{_match_clause(label, where_cypher)} RETURN count(n) AS cnt"
+    rec = session.run(query, **(params or {})).single()
+    return int(rec["cnt"]) if rec else 0
 
-def drop_index(name: str) -> None:
-    q = f"DROP INDEX {name} IF EXISTS"
-    with driver.session() as session:
-        session.run(q)
-    logger.info("Dropped index (if existed): %s", name)
 
-# def try_load_repo_config() -> Optional[Dict[str, str]]:
-#     """Attempt to load `neo4j_config.py` from the repo root or `nas/`.
-
-#     It's optional helper to pre-fill connection details. The function will
-#     import the module if present and attempt to read attributes `NEO4J_URI`,
-#     `NEO4J_USER`, `NEO4J_PASSWORD` or similar names.
-#     """
-#     import importlib.util
-#     import os
-
-#     candidates = ["neo4j_config.py", os.path.join("nas", "neo4j_config.py")]
-#     for c in candidates:
-#         if os.path.exists(c):
-#             spec = importlib.util.spec_from_file_location("repo_neo4j_config", c)
-#             mod = importlib.util.module_from_spec(spec)
-#             try:
-#                 spec.loader.exec_module(mod)  # type: ignore
-#             except Exception as e:
-#                 logger.warning("Failed to import %s: %s", c, e)
-#                 return None
-#             cfg = {}
-#             for name in ("NEO4J_URI", "URI", "URL"):
-#                 if hasattr(mod, name):
-#                     cfg["uri"] = getattr(mod, name)
-#                     break
-#             for name in ("NEO4J_USER", "USER"):
-#                 if hasattr(mod, name):
-#                     cfg["user"] = getattr(mod, name)
-#                     break
-#             for name in ("NEO4J_PASSWORD", "PASSWORD", "PASS"):
-#                 if hasattr(mod, name):
-#                     cfg["password"] = getattr(mod, name)
-#                     break
-#             return cfg
-#     return None
+def delete_nodes_by_label_batch(session, label: str, where_cypher: Optional[str] = None,
+                                params: Optional[Dict[str, Any]] = None, batch_size: int = 1000,
+                                server_side: bool = False, chunk_size: Optional[int] = None,
+                                concurrency: int = 1, progress: Optional[Progress] = None) -> int:
+    """Delete nodes with a label (and optional WHERE clause) in batches.
 
+    Returns total deleted.
+    """
+    match = _match_clause(label, where_cypher)
+    query = batch_query(match, "DETACH DELETE n", server_side, concurrency)
+    limit = (chunk_size or batch_size * 100) if server_side else batch_size
+    return run_batches(session, query, params, limit, batch_size, progress)
 
-def main() -> None:
-    # parser = argparse.ArgumentParser(description="Safe Neo4j cleanup helpers (batched operations)")
-    # parser.add_argument("--uri", required=False, help="Neo4j URI like bolt://localhost:7687")
-    # parser.add_argument("--user", required=False, help="Neo4j user")
-    # parser.add_argument("--password", required=False, help="Neo4j password")
-    # parser.add_argument("--batch-size", type=int, default=1000, help="Batch size for deletions")
 
-    # sub = parser.add_subparsers(dest="cmd")
+def delete_orphan_nodes_batch(session, batch_size: int = 1000, server_side: bool = False,
+                              chunk_size: Optional[int] = None, concurrency: int = 1,
+                              progress: Optional[Progress] = None) -> int:
+    """Delete nodes with no relationships in batches. Returns total deleted."""
+    query = batch_query(_match_clause(None, "NOT (n)--()"), "DETACH DELETE n", server_side, concurrency)
+    limit = (chunk_size or batch_size * 100) if server_side else batch_size
+    return run_batches(session, query, None, limit, batch_size, progress)
+
 
-    # sp = sub.add_parser("dry-count", help="Count nodes matching label/where")
-    # sp.add_argument("--label", required=False)
-    # sp.add_argument("--where", required=False)
+def remove_property_batch(session, label: str, prop: str, batch_size: int = 1000,
+                          server_side: bool = False, chunk_size: Optional[int] = None,
+                          concurrency: int = 1, progress: Optional[Progress] = None) -> int:
+    """Remove a property from nodes of a label in batches. Returns total nodes updated.
 
-    # sp = sub.add_parser("delete-label", help="Delete nodes by label (batched)")
-    # sp.add_argument("--label", required=True)
-    # sp.add_argument("--where", required=False)
+    Note: This sets the property to NULL which effectively removes it for Neo4j.
+    """
+    prop = sanitize_name(prop)
+    match = _match_clause(label, f"n.{prop} IS NOT NULL")
+    query = batch_query(match, f"SET n.{prop} = NULL", server_side, concurrency)
+    limit = (chunk_size or batch_size * 100) if server_side else batch_size
+    return run_batches(session, query, None, limit, batch_size, progress)
 
-    # sp = sub.add_parser("delete-orphans", help="Delete nodes with no relationships")
 
-    # sp = sub.add_parser("remove-property", help="Remove a property from nodes of a label")
-    # sp.add_argument("--label", required=True)
-    # sp.add_argument("--prop", required=True)
+def drop_constraint(session, name: str) -> None:
+    session.run(f"DROP CONSTRAINT {sanitize_name(name)} IF EXISTS").consume()
+    logger.info("Dropped constraint (if existed): %s", name)
 
-    # sp = sub.add_parser("drop-constraint", help="Drop a constraint by name")
-    # sp.add_argument("--name", required=True)
 
-    # sp = sub.add_parser("drop-index", help="Drop an index by name")
-    # sp.add_argument("--name", required=True)
+def drop_index(session, name: str) -> None:
+    session.run(f"DROP INDEX {sanitize_name(name)} IF EXISTS").consume()
+    logger.info("Dropped index (if existed): %s", name)
+
 
-    # args = parser.parse_args()
+def drop_nas_schema(session) -> None:
+    """Drop the constraints and indexes created by 1_nas_kg_create_schema.py."""
+    for name in NAS_CONSTRAINTS:
+        drop_constraint(session, name)
+    for name in NAS_INDEXES:
+        drop_index(session, name)
 
-    # cfg = try_load_repo_config() or {}
-    # uri = args.uri or cfg.get("uri") or "bolt://localhost:7687"
-    # user = args.user or cfg.get("user") or "neo4j"
-    # password = args.password or cfg.get("password") or "neo4j"
 
-    # driver = get_driver(uri, user, password)
+def _progress_for(args, checkpoint: Checkpoint, key: str, what: str, count) -> Progress:
+    """Resume the checkpointed totals of `key` with --resume, else count from scratch."""
+    entry = checkpoint.get(key) if args.resume else None
+    if entry:
+        logger.info("Resuming %s: %d of %d already done", what, entry["done"], entry["total"])
+        return Progress(what, entry["total"], entry["done"], checkpoint, key)
+    return Progress(what, count(), 0, checkpoint, key)
 
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Safe Neo4j cleanup helpers (batched operations)")
+    parser.add_argument("--uri", required=False, help="Neo4j URI like bolt://localhost:7687")
+    parser.add_argument("--user", required=False, help="Neo4j user")
+    parser.add_argument("--password", required=False, help="Neo4j password")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Nodes per transaction")
+    parser.add_argument("--server-side", action="store_true",
+                        help="Batch on the server with CALL { ... } IN TRANSACTIONS")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Nodes per round trip with --server-side (default 100 x batch size)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Concurrent server-side transactions (Neo4j 5.21+)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Progress file for --resume")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted operation")
+
+    sub = parser.add_subparsers(dest="cmd")
+
+    sp = sub.add_parser("dry-count", help="Count nodes matching label/where")
+    sp.add_argument("--label", required=False)
+    sp.add_argument("--where", required=False)
+
+    sp = sub.add_parser("delete-label", help="Delete nodes by label (batched)")
+    sp.add_argument("--label", required=True)
+    sp.add_argument("--where", required=False)
+
+    sp = sub.add_parser("delete-orphans", help="Delete nodes with no relationships")
+
+    sp = sub.add_parser("remove-property", help="Remove a property from nodes of a label")
+    sp.add_argument("--label", required=True)
+    sp.add_argument("--prop", required=True)
+
+    sp = sub.add_parser("drop-constraint", help="Drop a constraint by name")
+    sp.add_argument("--name", required=True)
+
+    sp = sub.add_parser("drop-index", help="Drop an index by name")
+    sp.add_argument("--name", required=True)
+
+    sp = sub.add_parser("drop-schema", help="Drop the NAS constraints and indexes")
+
+    args = parser.parse_args()
+    configure(uri=args.uri, user=args.user, password=args.password)
+    checkpoint = Checkpoint(args.checkpoint)
+    batching = {
+        "batch_size": args.batch_size,
+        "server_side": args.server_side,
+        "chunk_size": args.chunk_size,
+        "concurrency": args.concurrency,
+    }
+
+    session = driver.session()
     try:
-        session=driver.session()
-        session.execute_write(drop_constraint, "arch_name")
-        session.execute_write(drop_constraint, "layer_name")
-        session.execute_write(drop_constraint, "dataset_name")
-        session.execute_write(drop_constraint, "hardware_name")
-        print("constraints dropped successfully")
-
-        # session.execute_write(delete_nodes_by_label_batch, label="Architecture")
-        
-        # if args.cmd == "dry-count":
-        #     cnt = count_nodes(driver, label=args.label, where_cypher=args.where)
-        #     print(f"Count: {cnt}")
-
-        # elif args.cmd == "delete-label":
-        #     deleted = delete_nodes_by_label_batch(driver, args.label, where_cypher=args.where, batch_size=args.batch_size)
-        #     print(f"Total deleted: {deleted}")
-
-        # elif args.cmd == "delete-orphans":
-        #     deleted = delete_orphan_nodes_batch(driver, batch_size=args.batch_size)
-        #     print(f"Total orphan nodes deleted: {deleted}")
-
-        # elif args.cmd == "remove-property":
-        #     updated = remove_property_batch(driver, args.label, args.prop, batch_size=args.batch_size)
-        #     print(f"Total nodes updated (property cleared): {updated}")
-
-        # elif args.cmd == "drop-constraint":
-        #     drop_constraint(driver, args.name)
-        #     print("Constraint dropped (if existed)")
-
-        # elif args.cmd == "drop-index":
-        #     drop_index(driver, args.name)
-        #     print("Index dropped (if existed)")
-
-        # else:
-        #     parser.print_help()
+        if args.cmd == "dry-count":
+            cnt = count_nodes(session, label=args.label, where_cypher=args.where)
+            print(f"Count: {cnt}")
+
+        elif args.cmd == "delete-label":
+            key = f"delete-label:{args.label}:{args.where or ''}"
+            progress = _progress_for(args, checkpoint, key, f"delete {args.label}",
+                                     lambda: count_nodes(session, args.label, args.where))
+            deleted = delete_nodes_by_label_batch(session, args.label, where_cypher=args.where,
+                                                  progress=progress, **batching)
+            print(f"Total deleted: {deleted}")
+
+        elif args.cmd == "delete-orphans":
+            progress = _progress_for(args, checkpoint, "delete-orphans", "delete orphans",
+                                     lambda: count_nodes(session, where_cypher="NOT (n)--()"))
+            deleted = delete_orphan_nodes_batch(session, progress=progress, **batching)
+            print(f"Total orphan nodes deleted: {deleted}")
+
+        elif args.cmd == "remove-property":
+            prop = sanitize_name(args.prop)
+            key = f"remove-property:{args.label}:{prop}"
+            progress = _progress_for(args, checkpoint, key, f"clear {args.label}.{prop}",
+                                     lambda: count_nodes(session, args.label, f"n.{prop} IS NOT NULL"))
+            updated = remove_property_batch(session, args.label, prop, progress=progress, **batching)
+            print(f"Total nodes updated (property cleared): {updated}")
+
+        elif args.cmd == "drop-constraint":
+            drop_constraint(session, args.name)
+            print("Constraint dropped (if existed)")
+
+        elif args.cmd == "drop-index":
+            drop_index(session, args.name)
+            print("Index dropped (if existed)")
+
+        elif args.cmd == "drop-schema":
+            drop_nas_schema(session)
+            print("constraints and indexes dropped successfully")
+
+        else:
+            parser.print_help()
+    except KeyboardInterrupt:
+        # Progress is checkpointed after every batch; deleted nodes stay deleted
+        checkpoint.save()
+        print(f"Interrupted; progress saved to {args.checkpoint}, rerun with --resume", file=sys.stderr)
+        sys.exit(130)
     finally:
-        driver.close()
+        session.close()
+        close_driver()
 
 
 if __name__ == "__main__":
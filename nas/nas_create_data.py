@@ -1,6 +1,64 @@
-from neo4j_config import driver, close_driver
+from neo4j_config import driver
+from neo4j_connection import close_driver
+from nas_arch_stats import UPDATE_ARCH_STATS_FROM_EXPERIMENT
 from datetime import datetime
 
+# Shared with the step-by-step scripts (2_ ... 5_nas_*.py)
+MERGE_DATASET = """
+MERGE (d:Dataset {
+    name: $dataset,
+    samples: $samples,
+    classes: $classes
+})
+"""
+
+MERGE_HARDWARE = """
+MERGE (h:Hardware {
+    name: $hardware,
+    maxMemoryMB: $memory,
+    maxLatencyMs: $latency
+})
+"""
+
+MERGE_LAYER = """
+MERGE (l:Layer {name: $name})
+SET l += $props
+"""
+
+MERGE_ARCHITECTURE = """
+MERGE (a:Architecture {
+    name: $name,
+    depth: $depth
+})
+"""
+
+LINK_ARCHITECTURE_LAYERS = """
+MATCH (a:Architecture {name:$arch}),
+      (l1:Layer {name:"Conv3x3"}),
+      (l2:Layer {name:"ReLU"}),
+      (l3:Layer {name:"MaxPool2x2"})
+MERGE (a)-[:COMPOSED_OF {order:1}]->(l1)
+MERGE (a)-[:COMPOSED_OF {order:2}]->(l2)
+MERGE (a)-[:COMPOSED_OF {order:3}]->(l3)
+"""
+
+CREATE_EXPERIMENT = """
+MATCH (a:Architecture {name:$arch}),
+      (d:Dataset {name:$dataset}),
+      (h:Hardware {name:$hardware})
+CREATE (e:Experiment {
+    accuracy: $accuracy,
+    latencyMs: $latency,
+    flops: $flops,
+    energy_mJ: $energy,
+    timestamp: datetime($time)
+})
+MERGE (a)-[:HAS_EXPERIMENT]->(e)
+MERGE (a)-[:TRAINED_ON]->(d)
+MERGE (a)-[:EVALUATED_ON]->(h)
+WITH a, e
+""" + UPDATE_ARCH_STATS_FROM_EXPERIMENT
+
 def create_constraints(tx):
     tx.run("""
     CREATE CONSTRAINT arch_name IF NOT EXISTS
@@ -8,6 +66,12 @@ def create_constraints(tx):
     REQUIRE a.name IS UNIQUE
     """)
     
+    tx.run("""
+    CREATE CONSTRAINT arch_fingerprint IF NOT EXISTS
+    FOR (a:Architecture)
+    REQUIRE a.fingerprint IS UNIQUE
+    """)
+
     tx.run("""
     CREATE CONSTRAINT layer_name IF NOT EXISTS
     FOR (l:Layer)
@@ -27,39 +91,14 @@ def create_constraints(tx):
     """)
 
 def create_dataset_and_hardware(tx):
-    tx.run("""
-    MERGE (d:Dataset {
-        name: $dataset,
-        samples: $samples,
-        classes: $classes
-    })
-    """, dataset="CIFAR-10", samples=60000, classes=10)
+    tx.run(MERGE_DATASET, dataset="CIFAR-10", samples=60000, classes=10)
 
-    tx.run("""
-    MERGE (h:Hardware {
-        name: $hardware,
-        maxMemoryMB: $memory,
-        maxLatencyMs: $latency
-    })
-    """, hardware="Jetson-Nano", memory=4096, latency=20)   
+    tx.run(MERGE_HARDWARE, hardware="Jetson-Nano", memory=4096, latency=20)
 
 def create_architecture(tx):
-    tx.run("""
-    MERGE (a:Architecture {
-        name: $name,
-        depth: $depth
-    })
-    """, name="NAS_CNN_v1", depth=5)
+    tx.run(MERGE_ARCHITECTURE, name="NAS_CNN_v1", depth=5)
 
-    tx.run("""
-    MATCH (a:Architecture {name:$arch}),
-          (l1:Layer {name:"Conv3x3"}),
-          (l2:Layer {name:"ReLU"}),
-          (l3:Layer {name:"MaxPool2x2"})
-    MERGE (a)-[:COMPOSED_OF {order:1}]->(l1)
-    MERGE (a)-[:COMPOSED_OF {order:2}]->(l2)
-    MERGE (a)-[:COMPOSED_OF {order:3}]->(l3)
-    """, arch="NAS_CNN_v1") 
+    tx.run(LINK_ARCHITECTURE_LAYERS, arch="NAS_CNN_v1")
 
 def create_layers(tx):
     layers = [
@@ -69,27 +108,10 @@ def create_layers(tx):
     ]
 
     for layer in layers:
-        tx.run("""
-        MERGE (l:Layer {name: $name})
-        SET l += $props
-        """, name=layer["name"], props=layer)
+        tx.run(MERGE_LAYER, name=layer["name"], props=layer)
 
 def create_experiment(tx):
-    tx.run("""
-    MATCH (a:Architecture {name:$arch}),
-          (d:Dataset {name:$dataset}),
-          (h:Hardware {name:$hardware})
-    CREATE (e:Experiment {
-        accuracy: $accuracy,
-        latencyMs: $latency,
-        flops: $flops,
-        energy_mJ: $energy,
-        timestamp: datetime($time)
-    })
-    MERGE (a)-[:HAS_EXPERIMENT]->(e)
-    MERGE (a)-[:TRAINED_ON]->(d)
-    MERGE (a)-[:EVALUATED_ON]->(h)
-    """,
+    tx.run(CREATE_EXPERIMENT,
     arch="NAS_CNN_v1",
     dataset="CIFAR-10",
     hardware="Jetson-Nano",
@@ -0,0 +1,127 @@
+"""Buffered writer for NAS loop results.
+
+store_result (nas_kg_loop.py) costs 2 + len(layers) statements and a commit per
+candidate. ExperimentSink collects the architecture, layer-sequence and
+experiment records in memory and writes them every `flush_every` results or
+`flush_interval` seconds as one UNWIND statement in one transaction, and
+flushes whatever is left on close().
+
+The sink has no timer thread: the interval is checked by add() and
+flush_if_due(), so a loop that can go a while without adding (long
+evaluations, runs of pruned candidates) should call flush_if_due() as well.
+
+    with ExperimentSink(flush_every=200) as sink:
+        sink.add(exp_name, arch_name, layers, accuracy, latency)
+"""
+import logging
+import time
+from datetime import datetime
+
+from neo4j_config import driver
+from nas_arch_stats import UPDATE_ARCH_STATS_BATCH, aggregate_results
+
+logger = logging.getLogger(__name__)
+
+
+# Same graph shape as store_result: Architecture {depth}, ordered COMPOSED_OF edges
+# to existing Layer nodes and one Experiment per result
+STORE_RESULTS_BATCH = """
+UNWIND $results AS row
+MERGE (a:Architecture {name: row.arch})
+SET a.depth = size(row.layers), a.fingerprint = coalesce(row.fingerprint, a.fingerprint)
+CREATE (e:Experiment {
+    name: row.name,
+    accuracy: row.acc,
+    latencyMs: row.lat,
+    timestamp: datetime(row.time)
+})
+MERGE (a)-[:HAS_EXPERIMENT]->(e)
+WITH a, row
+UNWIND range(0, size(row.layers) - 1) AS i
+MATCH (l:Layer {name: row.layers[i]})
+MERGE (a)-[:COMPOSED_OF {order: i + 1}]->(l)
+"""
+
+
+def store_results_batch(tx, results):
+    tx.run(STORE_RESULTS_BATCH, results=results)
+    # Running aggregates on Architecture, one pre-aggregated row per architecture
+    tx.run(UPDATE_ARCH_STATS_BATCH, stats=aggregate_results(results))
+
+
+class ExperimentSink:
+    def __init__(self, flush_every=100, flush_interval=5.0, session=None):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        # One session for the lifetime of the sink unless the caller shares theirs
+        self._own_session = session is None
+        self.session = session or driver.session()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self.flushes = 0
+        self.written = 0
+        self.flush_seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, exp_name, arch_name, layers, accuracy, latency, fingerprint=None):
+        self._buffer.append({
+            "name": exp_name,
+            "arch": arch_name,
+            "fingerprint": fingerprint,
+            "layers": list(layers),
+            "acc": accuracy,
+            "lat": latency,
+            "time": datetime.utcnow().isoformat(),
+        })
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush if results are buffered and `flush_interval` has passed; returns how many."""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def pending(self):
+        return len(self._buffer)
+
+    def flush(self):
+        """Write all buffered results in one transaction; returns how many."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer, []
+        start = time.perf_counter()
+        try:
+            self.session.execute_write(store_results_batch, batch)
+        except Exception:
+            # Keep the results so a retry (or close()) can still write them
+            self._buffer = batch + self._buffer
+            raise
+        self.flush_seconds += time.perf_counter() - start
+        self.flushes += 1
+        self.written += len(batch)
+        logger.info("Flushed %d experiment results (total %d)", len(batch), self.written)
+        return len(batch)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._own_session:
+                self.session.close()
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "flushes": self.flushes,
+            "pending": len(self._buffer),
+            "flush_seconds": round(self.flush_seconds, 6),
+        }
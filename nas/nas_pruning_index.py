@@ -0,0 +1,125 @@
+"""In-memory pruning index for the NAS loop.
+
+should_train (nas_kg_loop.py) scans every Architecture/Experiment pair of a
+depth per candidate. PruningIndex keeps per-depth and per-(depth, layer
+signature) counts plus min/max latency and accuracy, warmed from the KG with a
+single read at loop start and updated as results are stored, so pruning
+decisions are dict lookups.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same rule as should_train: any run slower than this prunes the depth
+LATENCY_BUDGET_MS = 20
+
+WARM_INDEX = """
+MATCH (a:Architecture)-[:HAS_EXPERIMENT]->(e:Experiment)
+WITH a, count(e) AS runs,
+     sum(CASE WHEN e.latencyMs > $budget THEN 1 ELSE 0 END) AS over_budget,
+     min(e.latencyMs) AS min_latency, max(e.latencyMs) AS max_latency,
+     min(e.accuracy) AS min_accuracy, max(e.accuracy) AS max_accuracy
+OPTIONAL MATCH (a)-[c:COMPOSED_OF]->(l:Layer)
+WITH a, runs, over_budget, min_latency, max_latency, min_accuracy, max_accuracy, c, l
+ORDER BY c.order
+// Group by the architecture itself, not just its stats, so two architectures
+// with equal depth and stats stay separate rows
+WITH a, collect(l.name) AS layers, runs, over_budget,
+     min_latency, max_latency, min_accuracy, max_accuracy
+RETURN a.depth AS depth, layers, runs, over_budget,
+       min_latency, max_latency, min_accuracy, max_accuracy
+"""
+
+
+def layer_signature(layers):
+    return "|".join(layers)
+
+
+class LayerStats:
+    __slots__ = ("runs", "over_budget", "min_latency", "max_latency", "min_accuracy", "max_accuracy")
+
+    def __init__(self):
+        self.runs = 0
+        self.over_budget = 0
+        self.min_latency = self.max_latency = None
+        self.min_accuracy = self.max_accuracy = None
+
+    def merge(self, runs, over_budget, min_latency, max_latency, min_accuracy, max_accuracy):
+        self.runs += runs
+        self.over_budget += over_budget
+        self.min_latency = _min(self.min_latency, min_latency)
+        self.max_latency = _max(self.max_latency, max_latency)
+        self.min_accuracy = _min(self.min_accuracy, min_accuracy)
+        self.max_accuracy = _max(self.max_accuracy, max_accuracy)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+class PruningIndex:
+    def __init__(self, latency_budget=LATENCY_BUDGET_MS):
+        self.latency_budget = latency_budget
+        self.by_depth = {}
+        self.by_signature = {}
+        self.mismatches = 0
+
+    def _stats(self, depth, signature):
+        depth_stats = self.by_depth.get(depth)
+        if depth_stats is None:
+            depth_stats = self.by_depth[depth] = LayerStats()
+        key = (depth, signature)
+        sig_stats = self.by_signature.get(key)
+        if sig_stats is None:
+            sig_stats = self.by_signature[key] = LayerStats()
+        return depth_stats, sig_stats
+
+    def warm(self, session):
+        """Load the aggregates of all stored experiments with one read."""
+        def read(tx):
+            return [record.data() for record in tx.run(WARM_INDEX, budget=self.latency_budget)]
+
+        self.by_depth.clear()
+        self.by_signature.clear()
+        rows = session.execute_read(read)
+        for row in rows:
+            for stats in self._stats(row["depth"], layer_signature(row["layers"])):
+                stats.merge(row["runs"], row["over_budget"], row["min_latency"], row["max_latency"],
+                            row["min_accuracy"], row["max_accuracy"])
+        logger.info("Pruning index warmed: %d depths, %d layer signatures",
+                    len(self.by_depth), len(self.by_signature))
+        return len(rows)
+
+    def record(self, layers, accuracy, latency, depth=None):
+        """Account for a stored result (depth defaults to len(layers), as store_result)."""
+        depth = len(layers) if depth is None else depth
+        over = 1 if latency > self.latency_budget else 0
+        for stats in self._stats(depth, layer_signature(layers)):
+            stats.merge(1, over, latency, latency, accuracy, accuracy)
+
+    def should_train(self, layer_count):
+        """O(1) equivalent of nas_kg_loop.should_train."""
+        stats = self.by_depth.get(layer_count)
+        return stats is None or stats.over_budget == 0
+
+    def stats_for(self, layers, depth=None):
+        depth = len(layers) if depth is None else depth
+        stats = self.by_signature.get((depth, layer_signature(layers)))
+        return stats.as_dict() if stats else None
+
+    def cross_check(self, session, layer_count, kg_should_train):
+        """Compare the index decision with the KG query; returns True when they agree."""
+        expected = session.execute_read(kg_should_train, layer_count)
+        actual = self.should_train(layer_count)
+        if expected != actual:
+            self.mismatches += 1
+            logger.warning("Pruning index disagrees with KG for depth %d (index=%s, kg=%s)",
+                           layer_count, actual, expected)
+        return expected == actual
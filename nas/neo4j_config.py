@@ -1,14 +1,15 @@
-from neo4j import GraphDatabase
+import os
+import sys
 
+# The pooled, process-wide driver lives in the repo root (neo4j_connection.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "cool@1983"  # change if needed
+from neo4j_connection import LazyDriver, load_settings
 
-driver = GraphDatabase.driver(
-    NEO4J_URI,
-    auth=(NEO4J_USER, NEO4J_PASSWORD)
-)
+_settings = load_settings()
+NEO4J_URI = _settings["uri"]
+NEO4J_USER = _settings["user"]
+NEO4J_PASSWORD = _settings["password"]  # set NEO4J_PASSWORD to change
 
-def close_driver():
-    driver.close()
+# Created on first use, so importing a NAS helper no longer opens a connection
+driver = LazyDriver()
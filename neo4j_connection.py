@@ -0,0 +1,326 @@
+"""Single, lazily created, process-wide Neo4j driver shared by every script.
+
+Connection and pool settings come from the environment (defaults match
+docker-compose.yml) and can be overridden with configure() before first use:
+
+    NEO4J_URI                     bolt://localhost:7687
+    NEO4J_USER                    neo4j
+    NEO4J_PASSWORD                cool@1983
+    NEO4J_DATABASE                (server default)
+    NEO4J_MAX_POOL_SIZE           100
+    NEO4J_ACQUISITION_TIMEOUT     60      seconds to wait for a pooled connection
+    NEO4J_MAX_CONNECTION_LIFETIME 3600    seconds before a connection is recycled
+    NEO4J_FETCH_SIZE              1000    records per PULL
+    NEO4J_KEEP_ALIVE              true    TCP keep-alive
+    NEO4J_BACKEND                 neo4j   "memory" for the in-process graph in memory_graph.py
+    NEO4J_INSTRUMENT              false   per-statement timing/counters (instrumentation.py)
+    NEO4J_INSTRUMENT_OUT          (none)  JSON report path at exit; default prints a table to stderr
+
+Backends: anything with the driver API (session() with run/execute_read/
+execute_write) can stand in for Neo4j. NEO4J_BACKEND=memory (or
+configure(backend="memory")) gives the scripts whose statements memory_graph.py
+has handlers for an in-memory graph (see its docstring for what it covers), and
+set_driver() installs a specific driver object, e.g. a benchmark's
+MemoryGraphBackend or recording fake, as the shared one. With
+NEO4J_INSTRUMENT=1 both are wrapped by instrumentation.instrument().
+
+Nothing connects (or even imports the neo4j package) until the first
+get_driver()/session() call.
+"""
+import atexit
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+
+def normalize_cypher(query):
+    """Collapse whitespace so the same statement template always maps to one key."""
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+_ENV = {
+    "uri": ("NEO4J_URI", str, "bolt://localhost:7687"),
+    "user": ("NEO4J_USER", str, "neo4j"),
+    "password": ("NEO4J_PASSWORD", str, "cool@1983"),
+    "database": ("NEO4J_DATABASE", str, None),
+    "max_pool_size": ("NEO4J_MAX_POOL_SIZE", int, 100),
+    "acquisition_timeout": ("NEO4J_ACQUISITION_TIMEOUT", float, 60.0),
+    "max_connection_lifetime": ("NEO4J_MAX_CONNECTION_LIFETIME", float, 3600.0),
+    "fetch_size": ("NEO4J_FETCH_SIZE", int, 1000),
+    "keep_alive": ("NEO4J_KEEP_ALIVE", _flag, True),
+    "backend": ("NEO4J_BACKEND", str, "neo4j"),
+    "instrument": ("NEO4J_INSTRUMENT", _flag, False),
+    "instrument_out": ("NEO4J_INSTRUMENT_OUT", str, None),
+}
+
+BACKENDS = ("neo4j", "memory")
+
+_overrides = {}
+_drivers = {}
+_lock = threading.Lock()
+_reporting = False
+
+
+def load_settings():
+    """Return the effective settings: configure() overrides > environment > defaults."""
+    settings = {}
+    for key, (env, cast, default) in _ENV.items():
+        raw = os.environ.get(env)
+        settings[key] = cast(raw) if raw not in (None, "") else default
+    settings.update(_overrides)
+    return settings
+
+
+def configure(**overrides):
+    """Override settings for drivers created after this call (e.g. from a CLI)."""
+    unknown = set(overrides) - set(_ENV)
+    if unknown:
+        raise ValueError(f"Unknown connection settings: {', '.join(sorted(unknown))}")
+    _overrides.update({k: v for k, v in overrides.items() if v is not None})
+
+
+class SharedDriver:
+    """Wraps the real driver: applies session defaults and tracks pool usage."""
+
+    def __init__(self, driver, settings):
+        self._driver = driver
+        self.settings = settings
+        self.refs = 0
+        self._stats_lock = threading.Lock()
+        self.sessions_opened = 0
+        self.sessions_active = 0
+        self.sessions_peak = 0
+
+    def session(self, **kwargs):
+        kwargs.setdefault("fetch_size", self.settings["fetch_size"])
+        if self.settings["database"]:
+            kwargs.setdefault("database", self.settings["database"])
+        return _TrackedSession(self, self._driver.session(**kwargs))
+
+    def _opened(self):
+        with self._stats_lock:
+            self.sessions_opened += 1
+            self.sessions_active += 1
+            self.sessions_peak = max(self.sessions_peak, self.sessions_active)
+
+    def _closed(self):
+        with self._stats_lock:
+            self.sessions_active -= 1
+
+    def close(self):
+        self._driver.close()
+
+    def __getattr__(self, name):
+        # verify_connectivity, execute_query, ... go straight to the real driver
+        return getattr(self._driver, name)
+
+    def metrics(self):
+        metrics = {
+            "max_pool_size": self.settings["max_pool_size"],
+            "sessions_opened": self.sessions_opened,
+            "sessions_active": self.sessions_active,
+            "sessions_peak": self.sessions_peak,
+            "connections_in_use": None,
+            "connections_idle": None,
+            "utilisation": None,
+        }
+        # The driver does not publish pool stats; read them best-effort from the pool
+        try:
+            in_use = idle = 0
+            for connections in self._driver._pool.connections.values():
+                for connection in connections:
+                    if connection.in_use:
+                        in_use += 1
+                    else:
+                        idle += 1
+            metrics["connections_in_use"] = in_use
+            metrics["connections_idle"] = idle
+            metrics["utilisation"] = in_use / self.settings["max_pool_size"]
+        except Exception:
+            pass
+        return metrics
+
+
+class _TrackedSession:
+    def __init__(self, owner, session):
+        self._owner = owner
+        self._session = session
+        self._open = True
+        owner._opened()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self._owner._closed()
+        self._session.close()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def _create_driver(settings):
+    if settings["backend"] == "memory":
+        from memory_graph import MemoryGraphBackend
+
+        return MemoryGraphBackend()
+    if settings["backend"] != "neo4j":
+        raise ValueError(f"NEO4J_BACKEND must be one of {BACKENDS}, got {settings['backend']!r}")
+
+    from neo4j import GraphDatabase
+
+    return GraphDatabase.driver(
+        settings["uri"],
+        auth=(settings["user"], settings["password"]),
+        max_connection_pool_size=settings["max_pool_size"],
+        connection_acquisition_timeout=settings["acquisition_timeout"],
+        max_connection_lifetime=settings["max_connection_lifetime"],
+        keep_alive=settings["keep_alive"],
+    )
+
+
+def _instrumented(driver, settings):
+    global _reporting
+    if not settings["instrument"]:
+        return driver
+    from instrumentation import instrument, report_at_exit
+
+    if not _reporting:
+        _reporting = True
+        report_at_exit(settings["instrument_out"])
+    return instrument(driver)
+
+
+def _settings_with(uri, user, password):
+    settings = load_settings()
+    for key, value in (("uri", uri), ("user", user), ("password", password)):
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+def create_async_driver(uri=None, user=None, password=None):
+    """New AsyncDriver with the shared pool settings.
+
+    Async drivers are bound to the event loop that uses them, so they are not
+    shared process-wide; the caller owns it and must `await driver.close()`.
+    """
+    settings = _settings_with(uri, user, password)
+    if settings["backend"] != "neo4j":
+        raise ValueError(f"No async driver for NEO4J_BACKEND={settings['backend']!r}")
+
+    from neo4j import AsyncGraphDatabase
+
+    return AsyncGraphDatabase.driver(
+        settings["uri"],
+        auth=(settings["user"], settings["password"]),
+        max_connection_pool_size=settings["max_pool_size"],
+        connection_acquisition_timeout=settings["acquisition_timeout"],
+        max_connection_lifetime=settings["max_connection_lifetime"],
+        keep_alive=settings["keep_alive"],
+    )
+
+
+def get_driver(uri=None, user=None, password=None):
+    """Return the shared driver, creating it on first use.
+
+    Explicit uri/user/password (as the MetadataIngest/MetadataQuery constructors
+    accept) select or create the shared driver for that server/user instead.
+    """
+    settings = _settings_with(uri, user, password)
+    key = (settings["uri"], settings["user"])
+    with _lock:
+        driver = _drivers.get(key)
+        if driver is None:
+            driver = SharedDriver(_instrumented(_create_driver(settings), settings), settings)
+            _drivers[key] = driver
+        return driver
+
+
+def set_driver(driver, uri=None, user=None, password=None):
+    """Install `driver` as the shared driver (for the current or given uri/user).
+
+    Any object with the driver API works (memory_graph.MemoryGraphBackend, a
+    recording fake); it is closed by close_driver() like a created one.
+    """
+    settings = _settings_with(uri, user, password)
+    shared = SharedDriver(_instrumented(driver, settings), settings)
+    with _lock:
+        previous = _drivers.get((settings["uri"], settings["user"]))
+        _drivers[(settings["uri"], settings["user"])] = shared
+    if previous is not None:
+        previous.close()
+    return shared
+
+
+def acquire_driver(uri=None, user=None, password=None):
+    """get_driver() for objects with a close(): pair with release_driver()."""
+    driver = get_driver(uri, user, password)
+    with _lock:
+        driver.refs += 1
+    return driver
+
+
+def release_driver(driver):
+    """Drop one reference; the last holder closes the pooled driver."""
+    with _lock:
+        driver.refs -= 1
+        if driver.refs > 0:
+            return
+        for key, shared in list(_drivers.items()):
+            if shared is driver:
+                del _drivers[key]
+    driver.close()
+
+
+def close_driver():
+    """Close every shared driver (end of a script / process shutdown)."""
+    with _lock:
+        drivers = list(_drivers.values())
+        _drivers.clear()
+    for driver in drivers:
+        driver.close()
+
+
+atexit.register(close_driver)
+
+
+@contextmanager
+def session(**kwargs):
+    """Session on the shared driver: `with session() as s: s.run(...)`."""
+    with get_driver().session(**kwargs) as s:
+        yield s
+
+
+def pool_metrics():
+    """Pool/session utilisation of every shared driver that has been created."""
+    with _lock:
+        drivers = dict(_drivers)
+    return {f"{user}@{uri}": driver.metrics() for (uri, user), driver in drivers.items()}
+
+
+class LazyDriver:
+    """Module-level stand-in for `driver = GraphDatabase.driver(...)`.
+
+    Resolves the shared driver on first attribute access, so importing a module
+    that exposes one does not create a driver or open a connection.
+    """
+
+    def session(self, **kwargs):
+        return get_driver().session(**kwargs)
+
+    def close(self):
+        close_driver()
+
+    def __getattr__(self, name):
+        return getattr(get_driver(), name)
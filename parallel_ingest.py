@@ -0,0 +1,313 @@
+"""Multi-threaded catalog ingest without fighting over the shared dimension nodes.
+
+Every DataFile links to the same few Category/Unit/Feature and Dataset nodes,
+so running MetadataIngest from many threads queues all writers on those node
+locks and produces transient deadlocks. ingest_catalog_parallel() avoids that
+in two phases:
+
+1. One transaction per chunk MERGEs everything that is shared: Feature,
+   Category and Unit nodes with their BELONGS_TO/MEASURED_IN edges, Datasets,
+   Assets and Storage locations. File tasks never write these nodes again.
+2. Files are sorted by (dataset, asset, file) and cut into tasks of
+   `files_per_tx`, so the files sharing a Dataset/Asset mostly land in the
+   same task. A thread pool runs the tasks, one managed transaction each. A
+   task creates its own DataFiles, then links them to the shared nodes with
+   MATCH + MERGE, in one global order: Datasets, then Features, then Assets,
+   then Storage, each sorted by name. Every transaction takes the shared
+   locks in the same order, so no lock cycle (deadlock) can form.
+
+Transient errors (deadlocks, lock timeouts, leader switches) are retried with
+capped exponential backoff and full jitter. The report has the wall time,
+the speed-up over running the same tasks one after another (sum of task
+times / wall time), and the attempt and retry counts.
+
+Usage:
+    python parallel_ingest.py cmapss_catalog.json --workers 8 --files-per-tx 10
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ingest_metadata import (
+    MERGE_FEATURES_BULK,
+    MERGE_UNITS_BULK,
+    build_feature_sets,
+    content_hash,
+    entry_feature_set,
+    load_manifest,
+)
+from metadata_cache import invalidate_datafile
+from metadata_schema import ensure_schema
+from neo4j_connection import acquire_driver, close_driver, configure, release_driver
+
+# -- phase 1: shared nodes --
+
+MERGE_DATASETS = """
+    UNWIND $datasets AS name
+    MERGE (:Dataset {name: name})
+"""
+
+MERGE_ASSET_NODES = """
+    UNWIND $assets AS row
+    MERGE (a:Asset {name: row.name})
+    ON CREATE SET a.asset_id = row.asset_id, a.asset_type = 'turbofan_engine'
+    ON MATCH SET a.asset_type = 'turbofan_engine'
+"""
+
+MERGE_STORAGE_NODES = """
+    UNWIND $storages AS row
+    MERGE (:Storage {type: row.type, path: row.path, storage_url: row.url, storage_name: row.name})
+"""
+
+# -- phase 2: per-file work, shared nodes are only MATCHed --
+
+MERGE_DATAFILE_NODES = """
+    UNWIND $files AS row
+    MERGE (df:DataFile {name: row.file})
+    SET df.type = row.type, df.content_hash = row.content_hash
+"""
+
+LINK_DATASETS = """
+    UNWIND $rows AS row
+    MATCH (ds:Dataset {name: row.dataset})
+    MATCH (df:DataFile {name: row.file})
+    MERGE (ds)-[:CONTAINS]->(df)
+"""
+
+LINK_FEATURES = """
+    UNWIND $rows AS row
+    MATCH (f:Feature {name: row.feature})
+    MATCH (df:DataFile {name: row.file})
+    MERGE (df)-[r:HAS_FEATURE]->(f)
+    SET r.column = row.column
+"""
+
+LINK_ASSETS = """
+    UNWIND $rows AS row
+    MATCH (a:Asset {name: row.asset})
+    MATCH (df:DataFile {name: row.file})
+    MERGE (df)-[:linked_asset]->(a)
+"""
+
+LINK_STORAGES = """
+    UNWIND $rows AS row
+    MATCH (s:Storage {type: row.type, path: row.path, storage_url: row.url, storage_name: row.name})
+    MATCH (df:DataFile {name: row.file})
+    MERGE (df)-[:is_stored_in]->(s)
+"""
+
+DIMENSION_CHUNK = 1000
+
+
+def is_transient(error):
+    """Neo.TransientError.* (DeadlockDetected, LockClient.*, ...) or a driver-flagged retryable error."""
+    code = getattr(error, "code", None) or ""
+    if code.startswith("Neo.TransientError."):
+        return True
+    is_retryable = getattr(error, "is_retryable", None)
+    if callable(is_retryable):
+        try:
+            return bool(is_retryable())
+        except Exception:
+            return False
+    return type(error).__name__ in ("TransientError", "DeadlockDetected")
+
+
+class RetryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.retries = 0
+        self.errors = {}
+
+    def attempt(self):
+        with self._lock:
+            self.attempts += 1
+
+    def retry(self, error):
+        key = getattr(error, "code", None) or type(error).__name__
+        with self._lock:
+            self.retries += 1
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def write_with_retry(session, work, *args, stats=None, max_retries=5, base_delay=0.05, max_delay=2.0):
+    """session.execute_write(work, *args), retrying transient errors with jittered backoff.
+
+    The driver retries transient errors inside execute_write as well; `stats`
+    counts every run of `work`, so those retries show up in its attempts too.
+    """
+    stats = stats or RetryStats()
+
+    def counted(tx, *args):
+        stats.attempt()
+        return work(tx, *args)
+
+    for retry in range(max_retries + 1):
+        try:
+            return session.execute_write(counted, *args)
+        except Exception as e:
+            if retry == max_retries or not is_transient(e):
+                raise
+            stats.retry(e)
+            # Full jitter: anywhere up to the capped exponential delay
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** retry)))
+
+
+def dimension_rows(entries):
+    """Shared-node parameters for phase 1: features/units, datasets, assets, storages."""
+    feature_sets = build_feature_sets()
+    used = {entry_feature_set(entry) for entry in entries}
+    features = [feat for name in sorted(used) for feat in feature_sets[name]]
+    assets = sorted({entry["asset"] for entry in entries if entry.get("asset")})
+    storages = {}
+    for entry in entries:
+        storage = entry.get("storage")
+        if storage:
+            location = {key: storage[key] for key in ("type", "path", "url", "name")}
+            storages[tuple(location.values())] = location
+    return {
+        "features": features,
+        "units": [feat for feat in features if feat["unit"]],
+        "datasets": sorted({entry["dataset"] for entry in entries}),
+        "assets": [{"name": name, "asset_id": random.randint(100000, 999999)} for name in assets],
+        "storages": [storages[key] for key in sorted(storages)],
+    }
+
+
+def merge_dimensions_tx(tx, features, units, datasets, assets, storages):
+    # Same order as the file tasks: Category/Unit via Features, Datasets, Assets, Storage
+    if features:
+        tx.run(MERGE_FEATURES_BULK, features=features)
+    if units:
+        tx.run(MERGE_UNITS_BULK, units=units)
+    if datasets:
+        tx.run(MERGE_DATASETS, datasets=datasets)
+    if assets:
+        tx.run(MERGE_ASSET_NODES, assets=assets)
+    if storages:
+        tx.run(MERGE_STORAGE_NODES, storages=storages)
+
+
+def file_task_rows(entries, feature_sets):
+    """Phase 2 parameters for one task, every list sorted by the shared node it locks."""
+    files, datasets, features, assets, storages = [], [], [], [], []
+    for entry in entries:
+        name = entry["file"]
+        rows = feature_sets[entry_feature_set(entry)]
+        files.append({"file": name, "type": entry["type"], "content_hash": content_hash(entry, rows)})
+        datasets.append({"dataset": entry["dataset"], "file": name})
+        features.extend({"feature": feat["name"], "file": name, "column": column}
+                        for column, feat in enumerate(rows))
+        if entry.get("asset"):
+            assets.append({"asset": entry["asset"], "file": name})
+        storage = entry.get("storage")
+        if storage:
+            storages.append({"file": name, **{key: storage[key] for key in ("type", "path", "url", "name")}})
+    return {
+        "files": sorted(files, key=lambda row: row["file"]),
+        "datasets": sorted(datasets, key=lambda row: (row["dataset"], row["file"])),
+        "features": sorted(features, key=lambda row: (row["feature"], row["file"])),
+        "assets": sorted(assets, key=lambda row: (row["asset"], row["file"])),
+        "storages": sorted(storages, key=lambda row: (row["type"], row["path"], row["url"], row["name"], row["file"])),
+    }
+
+
+def link_files_tx(tx, files, datasets, features, assets, storages):
+    tx.run(MERGE_DATAFILE_NODES, files=files)
+    tx.run(LINK_DATASETS, rows=datasets)
+    tx.run(LINK_FEATURES, rows=features)
+    if assets:
+        tx.run(LINK_ASSETS, rows=assets)
+    if storages:
+        tx.run(LINK_STORAGES, rows=storages)
+
+
+def ingest_catalog_parallel(manifest, workers=8, files_per_tx=10, driver=None, max_retries=5,
+                            base_delay=0.05, max_delay=2.0):
+    """Ingest `manifest` (see ingest_metadata.load_manifest) with `workers` threads.
+
+    Writes the same graph as MetadataIngest.ingest_catalog and returns a report.
+    """
+    shared = driver is None
+    driver = driver or acquire_driver()
+    entries = list({entry["file"]: entry for entry in load_manifest(manifest)}.values())
+    entries.sort(key=lambda entry: (entry["dataset"], entry.get("asset") or "", entry["file"]))
+    stats = RetryStats()
+    retry = {"stats": stats, "max_retries": max_retries, "base_delay": base_delay, "max_delay": max_delay}
+    try:
+        ensure_schema(driver)
+
+        started = time.perf_counter()
+        dimensions = dimension_rows(entries)
+        with driver.session() as session:
+            write_with_retry(session, merge_dimensions_tx, dimensions["features"], dimensions["units"],
+                             dimensions["datasets"], dimensions["assets"], [], **retry)
+            storages = dimensions["storages"]
+            for start in range(0, len(storages), DIMENSION_CHUNK):
+                write_with_retry(session, merge_dimensions_tx, [], [], [], [],
+                                 storages[start:start + DIMENSION_CHUNK], **retry)
+        dimension_seconds = time.perf_counter() - started
+
+        feature_sets = build_feature_sets()
+        tasks = [entries[start:start + files_per_tx] for start in range(0, len(entries), files_per_tx)]
+
+        def run_task(task):
+            t0 = time.perf_counter()
+            params = file_task_rows(task, feature_sets)
+            # Sessions are not thread-safe: one per task, connections come from the pool
+            with driver.session() as session:
+                write_with_retry(session, link_files_tx, params["files"], params["datasets"],
+                                 params["features"], params["assets"], params["storages"], **retry)
+            return time.perf_counter() - t0
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            task_seconds = list(pool.map(run_task, tasks))
+        files_seconds = time.perf_counter() - started
+    finally:
+        if shared:
+            release_driver(driver)
+
+    invalidate_datafile(*(entry["file"] for entry in entries))
+    total = dimension_seconds + files_seconds
+    return {
+        "files": len(entries),
+        "tasks": len(tasks),
+        "workers": workers,
+        "dimension_seconds": round(dimension_seconds, 4),
+        "files_seconds": round(files_seconds, 4),
+        "seconds": round(total, 4),
+        "files_per_sec": round(len(entries) / total, 2) if total > 0 else None,
+        # Serial time of the same tasks over their parallel wall time
+        "speedup": round(sum(task_seconds) / files_seconds, 2) if files_seconds > 0 else None,
+        "attempts": stats.attempts,
+        "retries": stats.retries,
+        "transient_errors": dict(stats.errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel catalog ingest with ordered locking and retries")
+    parser.add_argument("manifest", help="JSON/YAML catalog manifest")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--files-per-tx", type=int, default=10)
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--uri")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+    configure(uri=args.uri, user=args.user, password=args.password)
+    try:
+        report = ingest_catalog_parallel(args.manifest, args.workers, args.files_per_tx,
+                                         max_retries=args.max_retries)
+        print(json.dumps(report, indent=2))
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
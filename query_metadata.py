@@ -1,56 +1,170 @@
-from neo4j import GraphDatabase
+import copy
+from collections import namedtuple
+
+from neo4j_connection import acquire_driver, release_driver
+from metadata_cache import MISSING, QueryCache
+from metadata_schema import schema_report
+
+# Cypher statements, shared with async_metadata.py
+ALL_DATASETS_AND_FILES = """
+    MATCH (ds:Dataset)-[:CONTAINS]->(df:DataFile)
+    RETURN ds.name AS dataset, df.name AS file, df.type AS type
+"""
+
+FEATURES_FOR_FILE = """
+    MATCH (df:DataFile {name: $file_name})-[:HAS_FEATURE]->(f:Feature)
+    OPTIONAL MATCH (f)-[:BELONGS_TO]->(c:Category)
+    OPTIONAL MATCH (f)-[:MEASURED_IN]->(u:Unit)
+    RETURN f.name AS feature, c.name AS category, u.name AS unit, u.description AS unit_description
+"""
+
+# Same shape as FEATURES_FOR_FILE for a whole list of files in one round trip
+FEATURES_FOR_FILES = """
+    UNWIND $file_names AS file_name
+    MATCH (df:DataFile {name: file_name})-[:HAS_FEATURE]->(f:Feature)
+    OPTIONAL MATCH (f)-[:BELONGS_TO]->(c:Category)
+    OPTIONAL MATCH (f)-[:MEASURED_IN]->(u:Unit)
+    RETURN file_name AS file, f.name AS feature, c.name AS category, u.name AS unit, u.description AS unit_description
+"""
+
+FILES_BY_TYPE = """
+    MATCH (df:DataFile)
+    WHERE df.type = $file_type
+    RETURN df.name AS file
+"""
+
+ALL_UNITS = """
+    MATCH (u:Unit)
+    RETURN u.name AS unit, u.description AS description
+"""
+
+ROW_FORMATS = ("dict", "tuple", "namedtuple")
+
+def row_converter(row_format):
+    """Record -> row function for the iter_* methods ("dict", "tuple" or "namedtuple")."""
+    if row_format == "dict":
+        return lambda record: record.data()
+    if row_format == "tuple":
+        return lambda record: tuple(record.values())
+    if row_format == "namedtuple":
+        row_types = {}
+
+        def convert(record):
+            keys = tuple(record.keys())
+            row_type = row_types.get(keys)
+            if row_type is None:
+                row_type = row_types[keys] = namedtuple("Row", keys)
+            return row_type(*record.values())
+        return convert
+    raise ValueError(f"row_format must be one of {ROW_FORMATS}, got {row_format!r}")
 
 class MetadataQuery:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None, driver=None, cache=None):
+        self._shared = driver is None
+        self.driver = driver or acquire_driver(uri, user, password)
+        # Optional metadata_cache.QueryCache in front of the per-file/unit/type lookups
+        self.cache = cache
+
+    def _cached(self, key, loader):
+        # Callers get their own copy: the cached rows are shared by every later hit
+        if self.cache is None:
+            return loader()
+        return copy.deepcopy(self.cache.get_or_load(key, loader))
 
     def close(self):
-        self.driver.close()
+        if self._shared:
+            release_driver(self.driver)
+        else:
+            self.driver.close()
+
+    def iter_records(self, query, fetch_size=None, row_format="dict", **params):
+        """Lazily yield the rows of `query` while holding its session open.
+
+        Records are pulled from the server `fetch_size` at a time (default: the
+        driver's NEO4J_FETCH_SIZE), so memory stays constant however large the
+        result is. The session closes when the iterator is exhausted or closed.
+        """
+        convert = row_converter(row_format)
+        session_kwargs = {"fetch_size": fetch_size} if fetch_size else {}
+
+        def rows():
+            with self.driver.session(**session_kwargs) as session:
+                for record in session.run(query, **params):
+                    yield convert(record)
+        return rows()
+
+    def iter_all_datasets_and_files(self, fetch_size=None, row_format="dict"):
+        return self.iter_records(ALL_DATASETS_AND_FILES, fetch_size, row_format)
+
+    def iter_features_for_file(self, file_name, fetch_size=None, row_format="dict"):
+        return self.iter_records(FEATURES_FOR_FILE, fetch_size, row_format, file_name=file_name)
+
+    def iter_files_by_type(self, file_type, fetch_size=None):
+        """Yield the names of the DataFiles of `file_type`."""
+        return (row[0] for row in self.iter_records(FILES_BY_TYPE, fetch_size, "tuple", file_type=file_type))
+
+    def iter_all_units(self, fetch_size=None, row_format="dict"):
+        return self.iter_records(ALL_UNITS, fetch_size, row_format)
 
     def get_all_datasets_and_files(self):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (ds:Dataset)-[:CONTAINS]->(df:DataFile)
-                RETURN ds.name AS dataset, df.name AS file, df.type AS type
-            """)
-            return [record.data() for record in result]
+        return list(self.iter_all_datasets_and_files())
 
     def get_features_for_file(self, file_name):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (df:DataFile {name: $file_name})-[:HAS_FEATURE]->(f:Feature)
-                OPTIONAL MATCH (f)-[:BELONGS_TO]->(c:Category)
-                OPTIONAL MATCH (f)-[:MEASURED_IN]->(u:Unit)
-                RETURN f.name AS feature, c.name AS category, u.name AS unit, u.description AS unit_description
-            """, file_name=file_name)
-            return [record.data() for record in result]
+        return self._cached(("features", file_name), lambda: self._get_features_for_file(file_name))
+
+    def _get_features_for_file(self, file_name):
+        return list(self.iter_features_for_file(file_name))
+
+    def get_features_for_files(self, file_names):
+        """Return {file: [features...]} for many files with a single UNWIND query.
+
+        Records are streamed into the result as they arrive; files without
+        features map to an empty list. With a cache only the misses are queried.
+        """
+        file_names = list(dict.fromkeys(file_names))
+        features = {name: [] for name in file_names}
+        missing = file_names
+        if self.cache is not None:
+            missing = []
+            for name in file_names:
+                cached = self.cache.get(("features", name))
+                if cached is MISSING:
+                    missing.append(name)
+                else:
+                    features[name] = copy.deepcopy(cached)
+        if missing:
+            with self.driver.session() as session:
+                result = session.run(FEATURES_FOR_FILES, file_names=missing)
+                for record in result:
+                    row = record.data()
+                    features[row.pop("file")].append(row)
+            if self.cache is not None:
+                for name in missing:
+                    self.cache.put(("features", name), copy.deepcopy(features[name]))
+        return features
 
     def get_files_by_type(self, file_type):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (df:DataFile)
-                WHERE df.type = $file_type
-                RETURN df.name AS file
-            """, file_type=file_type)
-            return [record["file"] for record in result]
+        return self._cached(("files_by_type", file_type), lambda: self._get_files_by_type(file_type))
+
+    def _get_files_by_type(self, file_type):
+        return list(self.iter_files_by_type(file_type))
 
     def get_all_units(self):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (u:Unit)
-                RETURN u.name AS unit, u.description AS description
-            """)
-            return [record.data() for record in result]
+        return self._cached(("units",), self._get_all_units)
 
-if __name__ == "__main__":
-    URI = "bolt://localhost:7687"
-    USER = "neo4j"
-    PASSWORD = "cool@1983"  # Match this with password in docker compose yaml
+    def _get_all_units(self):
+        return list(self.iter_all_units())
+
+    def verify_schema(self):
+        """Report which metadata lookup patterns are (not) backed by an index."""
+        return schema_report(self.driver)
 
-    query = MetadataQuery(URI, USER, PASSWORD)
+if __name__ == "__main__":
+    # Connection settings come from NEO4J_* env vars (see neo4j_connection.py)
+    query = MetadataQuery(cache=QueryCache(maxsize=256, ttl=60))
 
     print(" All Datasets and Files:")
-    for record in query.get_all_datasets_and_files():
+    for record in query.iter_all_datasets_and_files(row_format="namedtuple"):
         print(record)
 
     print("\n Features for File 'train_FD001':")
@@ -65,8 +179,19 @@ if __name__ == "__main__":
     for record in query.get_features_for_file("RUL_FD001"):
         print(record)
 
+    print("\n Features for train/test/RUL FD001 in one query:")
+    for file_name, features in query.get_features_for_files(["train_FD001", "test_FD001", "RUL_FD001"]).items():
+        print(file_name, len(features), "features")
+
     print("\n All Units:")
     for unit in query.get_all_units():
         print(unit)
 
+    report = query.verify_schema()
+    print(f"\n Indexed lookup patterns: {report['indexed']}/{report['total']}")
+    for item in report["unindexed"]:
+        print("  UNINDEXED:", item["pattern"])
+
+    print("\n Cache:", query.cache.stats())
+
     query.close()
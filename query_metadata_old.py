@@ -1,16 +1,13 @@
-from neo4j import GraphDatabase
+from neo4j_connection import acquire_driver, release_driver
 
-# Neo4j DB config
-uri = "bolt://localhost:7687"
-username = "neo4j"
-password = "cool@1983"  # Match this with password in  docker compose yaml
+# Neo4j DB config comes from NEO4J_* env vars (see neo4j_connection.py)
 
 class MetadataQuery:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None):
+        self.driver = acquire_driver(uri, user, password)
 
     def close(self):
-        self.driver.close()
+        release_driver(self.driver)
 
     def list_all_datasets_and_files(self):
         with self.driver.session() as session:
@@ -43,7 +40,7 @@ class MetadataQuery:
 if __name__ == "__main__":
     mq = None
     try:
-        mq = MetadataQuery(uri, username, password)
+        mq = MetadataQuery()
 
         print("\nAll Datasets and Files:")
         for record in mq.list_all_datasets_and_files():
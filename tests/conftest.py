@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Flat scripts: the repo root and nas/ are import roots, as when run from there
+for path in (ROOT, os.path.join(ROOT, "nas")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
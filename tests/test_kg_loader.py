@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from ingest_metadata import MetadataIngest
+from kg_loader import KGDataLoader
+from memory_graph import MemoryGraphBackend
+
+
+def _loader(tmp_path):
+    backend = MemoryGraphBackend()
+    ingest = MetadataIngest(driver=backend)
+    ingest.ingest_metadata("FD001", "train_FD001", "train")
+    width = len(_has_feature(backend))
+    source = tmp_path / "train_FD001.txt"
+    # Row r, column c holds 100 * r + c
+    source.write_text("".join(" ".join(str(100 * r + c) for c in range(width)) + "\n" for r in range(3)))
+    ingest.create_storage_and_link_to_datafile("train_FD001", "local", str(source), "", "train")
+    return backend, KGDataLoader(driver=backend, cache_dir=str(tmp_path / "cache"))
+
+
+def _has_feature(backend):
+    return [rel for rel in backend.graph.relationships.values() if rel.type == "HAS_FEATURE"]
+
+
+def test_columns_follow_has_feature_column(tmp_path):
+    backend, loader = _loader(tmp_path)
+    rels = _has_feature(backend)
+    # Reverse the stored column order; the loader must follow it, not the result order
+    width = len(rels)
+    for rel in rels:
+        backend.graph.set_property(rel, "column", width - 1 - rel.props["column"])
+    _, names = loader.load("train_FD001")
+    by_column = {rel.props["column"]: rel.end.props["name"] for rel in rels}
+    assert names == [by_column[i] for i in range(width)]
+    columns = loader.load_columns("train_FD001")
+    for rel in rels:
+        expected = [100 * r + rel.props["column"] for r in range(3)]
+        np.testing.assert_array_equal(columns[rel.end.props["name"]], expected)
+
+
+@pytest.mark.parametrize("broken", [None, 5])
+def test_missing_or_gapped_column_raises(tmp_path, broken):
+    backend, loader = _loader(tmp_path)
+    backend.graph.set_property(_has_feature(backend)[0], "column", broken)
+    with pytest.raises(ValueError):
+        loader.plan("train_FD001")
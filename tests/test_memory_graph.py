@@ -0,0 +1,391 @@
+"""memory_graph handlers against the Cypher they stand in for.
+
+The handlers are hand-written Python versions of the repo's statements, so
+they can drift from the Cypher. These tests
+
+- check that every Cypher constant of the covered modules has a handler and
+  that the fixture scenarios and nas/ scripts run on the memory backend;
+- with NEO4J_TEST_URI set, build the same fixture graphs through the repo's
+  own code on the memory backend and on that server, then compare the
+  resulting graphs and the answers of every read statement. The database is
+  wiped before each scenario, so point it at a disposable one
+  (NEO4J_TEST_USER / NEO4J_TEST_PASSWORD, default neo4j / password).
+"""
+import importlib
+import json
+import os
+import re
+from datetime import date, datetime
+
+import pytest
+
+from benchmarks.synthetic import SEED_LAYERS, synthetic_catalog, synthetic_nas_history
+from memory_graph import ConstraintError, MemoryGraphBackend, _name, resolve
+from neo4j_connection import normalize_cypher
+
+COVERED_MODULES = [
+    "ingest_metadata", "parallel_ingest", "query_metadata", "metadata_schema", "clean_metadata",
+    "kg_loader", "feature_profile", "benchmarks.synthetic",
+    "nas_create_data", "6_nas_queries", "nas_kg_loop", "nas_experiment_sink", "nas_arch_stats",
+    "nas_pruning_index", "nas_prefix_index", "nas_fingerprint", "nas_pareto",
+]
+
+# Constants that are pieces of other statements, not statements of their own
+FRAGMENTS = {
+    ("nas_arch_stats", "MERGE_ARCH_STATS"),
+    ("nas_arch_stats", "UPDATE_ARCH_STATS_FROM_EXPERIMENT"),
+}
+
+CYPHER_START = re.compile(r"^(MATCH|OPTIONAL MATCH|MERGE|UNWIND|CREATE|WITH|CALL|SHOW|RETURN|DROP)\b")
+# str.format templates ({label}, {rel}) are matched by @pattern handlers once filled in
+FORMAT_FIELD = re.compile(r"\{[a-z_]+\}")
+
+MANIFEST = synthetic_catalog(datasets=2, files_per_dataset=4, seed=1)
+FILES = [entry["file"] for entry in MANIFEST]
+LAYERS, HISTORY = synthetic_nas_history(architectures=12, experiments_per_arch=2, min_depth=2, max_depth=5)
+
+# Properties that are random or wall-clock dependent
+VOLATILE = {"asset_id", "timestamp", "last_timestamp", "profiled_at"}
+# List values whose order is part of the answer (others are compared as sets)
+ORDERED = {"layers", "features", "histogram", "histogram_edges"}
+
+
+def cypher_constants():
+    # By value, so a fragment imported into another module is skipped there too
+    fragments = {getattr(importlib.import_module(module), name) for module, name in FRAGMENTS}
+    for module_name in COVERED_MODULES:
+        module = importlib.import_module(module_name)
+        for name, value in vars(module).items():
+            if not name.isupper() or not isinstance(value, str):
+                continue
+            if value in fragments or FORMAT_FIELD.search(value):
+                continue
+            if CYPHER_START.match(normalize_cypher(value)):
+                yield module_name, name, value
+
+
+@pytest.mark.parametrize("module_name,name,value", list(cypher_constants()),
+                         ids=lambda item: item if isinstance(item, str) and "\n" not in item else "")
+def test_constant_has_handler(module_name, name, value):
+    handler, _ = resolve(normalize_cypher(value))
+    assert handler is not None
+
+
+# -- fixture scenarios: the same repo code on any driver --------------------------------
+
+def _catalog(driver):
+    from ingest_metadata import MetadataIngest
+    MetadataIngest(driver=driver).ingest_catalog(MANIFEST, batch_size=3)
+
+
+def scenario_catalog(driver):
+    _catalog(driver)
+
+
+def scenario_per_file(driver):
+    from ingest_metadata import MetadataIngest
+    ingest = MetadataIngest(driver=driver)
+    ingest.ingest_metadata("FD001", "train_FD001", "train")
+    ingest.ingest_metadata("FD001", "test_FD001", "test", bulk=True)
+    ingest.ingest_rul_metadata("FD001", "RUL_FD001")
+    ingest.ingest_rul_metadata("FD001", "RUL_FD002", bulk=True)
+    ingest.create_asset_and_link_to_datafile("FD001-engine", "train_FD001")
+    ingest.create_storage_and_link_to_datafile("train_FD001", "local", "/data/train_FD001.txt", "", "train")
+
+
+def scenario_sync(driver):
+    from ingest_metadata import MetadataIngest
+    _catalog(driver)
+    edited = [dict(entry) for entry in MANIFEST[1:]]
+    edited[0]["dataset"] = "SYN-NEW"
+    edited[1]["type"] = "RUL" if edited[1]["type"] != "RUL" else "train"
+    edited[2]["storage"] = {**edited[2]["storage"], "path": "/moved/file.txt"}
+    edited[3].pop("asset")
+    edited.append({"dataset": "SYN-000", "file": "train_SYN-000_extra", "type": "train"})
+    MetadataIngest(driver=driver).sync_catalog(edited, batch_size=3)
+
+
+def scenario_parallel(driver):
+    from parallel_ingest import ingest_catalog_parallel
+    ingest_catalog_parallel(MANIFEST, workers=2, files_per_tx=3, driver=driver)
+
+
+def scenario_profiles(driver):
+    from feature_profile import write_profiles_tx
+    from query_metadata import FEATURES_FOR_FILE
+    _catalog(driver)
+    with driver.session() as session:
+        features = [record["feature"] for record in session.run(FEATURES_FOR_FILE, file_name=FILES[0])]
+        rows = [{"file": FILES[0], "feature": feature,
+                 "stats": {"count": 10, "nulls": i % 2, "min": 0.0, "max": float(i), "mean": i / 2,
+                           "std": 1.5, "histogram": [5, 5], "histogram_edges": [0.0, i / 2, float(i)]}}
+                for i, feature in enumerate(features)]
+        session.execute_write(write_profiles_tx, rows)
+
+
+def scenario_clean(driver):
+    from clean_metadata import clean_dataset
+    _catalog(driver)
+    with driver.session() as session:
+        clean_dataset(session, "SYN-000", batch_size=2)
+
+
+def scenario_clean_labels(driver):
+    from clean_metadata import clean_metadata, clean_metadata_batched
+    _catalog(driver)
+    with driver.session() as session:
+        session.execute_write(clean_metadata, ["Unit", "Asset"])
+        clean_metadata_batched(session, ["Storage"], batch_size=2)
+
+
+def scenario_nas(driver):
+    import nas_create_data
+    from nas_arch_stats import REBUILD_ARCH_STATS_BATCH
+    from nas_experiment_sink import store_results_batch
+    from nas_kg_loop import store_result
+
+    with driver.session() as session:
+        session.execute_write(nas_create_data.create_constraints)
+        session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=LAYERS).consume())
+        for start in range(0, len(HISTORY), 7):
+            session.execute_write(store_results_batch, HISTORY[start:start + 7])
+        session.execute_write(store_result, "exp_single", "NAS_CNN_single", ["Conv3x3", "ReLU"], 0.81, 11.0)
+        session.execute_write(nas_create_data.create_dataset_and_hardware)
+        session.execute_write(nas_create_data.create_layers)
+        session.execute_write(nas_create_data.create_architecture)
+        session.execute_write(nas_create_data.create_experiment)
+        session.execute_write(lambda tx: tx.run(REBUILD_ARCH_STATS_BATCH, after="", limit=5).consume())
+
+
+def scenario_nas_cleanup(driver):
+    import nas_cleanup_data
+    scenario_nas(driver)
+    with driver.session() as session:
+        nas_cleanup_data.delete_nodes_by_label_batch(session, "Experiment", batch_size=4)
+        nas_cleanup_data.delete_orphan_nodes_batch(session, batch_size=4)
+
+
+def scenario_nas_backfill(driver):
+    from nas_fingerprint import backfill_fingerprints
+    from nas_kg_loop import store_result
+    scenario_nas(driver)
+    with driver.session() as session:
+        # Stored without fingerprints, two of them with the same layers
+        for i, layers in enumerate([["Conv3x3", "ReLU"], ["Conv3x3", "ReLU"], ["ReLU"], []]):
+            session.execute_write(store_result, f"exp_legacy_{i}", f"legacy_{i}", layers, 0.5 + i / 10, 5.0 + i)
+        backfill_fingerprints(session, batch_size=2)
+
+
+SCENARIOS = {name[len("scenario_"):]: fn for name, fn in globals().items() if name.startswith("scenario_")}
+
+READS = [
+    ("query_metadata", "ALL_DATASETS_AND_FILES", {}),
+    ("query_metadata", "FEATURES_FOR_FILE", {"file_name": FILES[0]}),
+    ("query_metadata", "FEATURES_FOR_FILES", {"file_names": FILES[:3] + ["train_FD001", "RUL_FD002"]}),
+    ("query_metadata", "FILES_BY_TYPE", {"file_type": "train"}),
+    ("query_metadata", "ALL_UNITS", {}),
+    ("ingest_metadata", "CONTENT_HASHES", {"files": FILES + ["train_SYN-000_extra"]}),
+    ("ingest_metadata", "DATAFILE_STATE", {"files": FILES + ["train_SYN-000_extra"]}),
+    ("kg_loader", "LOAD_PLAN", {"file": FILES[0]}),
+    ("kg_loader", "LOAD_PLAN", {"file": "train_FD001"}),
+    ("feature_profile", "READ_PROFILES", {"file": FILES[0]}),
+    ("nas_kg_loop", "SHOULD_TRAIN", {"depth": 3}),
+    ("nas_arch_stats", "ARCH_STATS", {"name": HISTORY[0]["arch"]}),
+    ("nas_pruning_index", "WARM_INDEX", {"budget": 20}),
+    ("nas_prefix_index", "WARM_PREFIX_INDEX", {}),
+    ("nas_fingerprint", "LAYER_PROPERTIES", {}),
+    ("nas_fingerprint", "KNOWN_RESULTS", {}),
+    ("nas_fingerprint", "MISSING_FINGERPRINTS", {"after": "", "limit": 3}),
+    ("nas_pareto", "PARETO_CANDIDATES", {"hardware": "Jetson-Nano", "dataset": "CIFAR-10", "use_energy": False,
+                                         "min_accuracy": 0.0, "max_latency": 1000}),
+    ("6_nas_queries", "VALID_ARCHITECTURES", {}),
+]
+
+
+def normalise(value, key=None):
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {k: normalise(v, k) for k, v in sorted(value.items()) if k not in VOLATILE}
+    if isinstance(value, (list, tuple)):
+        items = [normalise(v) for v in value]
+        return items if key in ORDERED else sorted(items, key=_canonical)
+    return value
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def read_all(driver):
+    answers = {}
+    with driver.session() as session:
+        for module_name, name, params in READS:
+            query = getattr(importlib.import_module(module_name), name)
+            rows = [normalise(record.data()) for record in session.run(query, params)]
+            answers[f"{module_name}.{name}({_canonical(params)})"] = sorted(rows, key=_canonical)
+    return answers
+
+
+def memory_snapshot(backend):
+    g = backend.graph
+    nodes = {node.element_id: normalise({"labels": sorted(node.labels), "props": node.props})
+             for node in g.nodes.values()}
+    rels = [{"type": rel.type, "start": nodes[rel.start.element_id], "end": nodes[rel.end.element_id],
+             "props": normalise(rel.props)} for rel in g.relationships.values()]
+    return sorted(map(_canonical, nodes.values())), sorted(map(_canonical, rels))
+
+
+def server_snapshot(driver):
+    with driver.session() as session:
+        nodes = {record["id"]: normalise({"labels": sorted(record["labels"]), "props": record["props"]})
+                 for record in session.run("MATCH (n) RETURN elementId(n) AS id, labels(n) AS labels, "
+                                           "properties(n) AS props")}
+        rels = [{"type": record["type"], "start": nodes[record["start"]], "end": nodes[record["end"]],
+                 "props": normalise(record["props"])}
+                for record in session.run("MATCH (a)-[r]->(b) RETURN elementId(a) AS start, type(r) AS type, "
+                                          "properties(r) AS props, elementId(b) AS end")]
+    return sorted(map(_canonical, nodes.values())), sorted(map(_canonical, rels))
+
+
+@pytest.mark.parametrize("name", SCENARIOS)
+def test_scenario_runs_on_memory(name):
+    backend = MemoryGraphBackend()
+    SCENARIOS[name](backend)
+    nodes, _ = memory_snapshot(backend)
+    assert nodes
+    read_all(backend)
+
+
+def test_nas_scripts_run_on_memory():
+    step2 = importlib.import_module("2_nas_loaddata")
+    step3 = importlib.import_module("3_nas_reuse_layers")
+    step4 = importlib.import_module("4_nas_create_arch_relation")
+    step5 = importlib.import_module("5_nas_store_exp_results")
+    step6 = importlib.import_module("6_nas_queries")
+    backend = MemoryGraphBackend()
+    with backend.session() as session:
+        for step in (step2.create_dataset_and_hardware, step3.create_layers, step4.create_architecture,
+                     step5.create_experiment):
+            session.execute_write(step)
+        rows = session.execute_read(step6.find_valid_architectures)
+    assert rows == [{"a.name": "NAS_CNN_v1", "e.accuracy": 0.87, "e.latencyMs": 18}]
+
+
+def test_warm_backfills_missing_fingerprints():
+    from nas_fingerprint import FingerprintRegistry, backfill_fingerprints
+    from nas_kg_loop import store_result
+    backend = MemoryGraphBackend()
+    with backend.session() as session:
+        session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=LAYERS).consume())
+        session.execute_write(store_result, "exp_a", "arch_a", ["Conv3x3", "ReLU"], 0.8, 10.0)
+        session.execute_write(store_result, "exp_b", "arch_b", ["Conv3x3", "ReLU"], 0.7, 12.0)
+        session.execute_write(store_result, "exp_c", "arch_c", ["ReLU", "Conv3x3"], 0.6, 9.0)
+        registry = FingerprintRegistry()
+        registry.warm(session)
+        # arch_b repeats arch_a's layers: the unique fingerprint goes to arch_a only
+        assert registry.lookup(registry.fingerprint(["Conv3x3", "ReLU"]))[0] == "arch_a"
+        assert registry.lookup(registry.fingerprint(["ReLU", "Conv3x3"]))[0] == "arch_c"
+        assert [a.props.get("fingerprint") is None for a in backend.graph.find("Architecture")].count(True) == 1
+        assert backfill_fingerprints(session) == (0, 1)
+
+
+def test_unique_constraint_rejects_duplicate_fingerprint():
+    import nas_create_data
+    from nas_kg_loop import store_result
+    backend = MemoryGraphBackend()
+    with backend.session() as session:
+        session.execute_write(nas_create_data.create_constraints)
+        session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=LAYERS).consume())
+        session.execute_write(store_result, "exp_a", "arch_a", ["Conv3x3"], 0.8, 10.0, "f" * 64)
+        with pytest.raises(ConstraintError, match="arch_fingerprint"):
+            session.execute_write(store_result, "exp_b", "arch_b", ["Conv3x3"], 0.7, 12.0, "f" * 64)
+        with pytest.raises(ConstraintError, match="arch_name"):
+            session.execute_write(lambda tx: backend.graph.create_node(["Architecture"], {"name": "arch_a"}))
+    # Both failed transactions were rolled back
+    assert sorted(_name(a) for a in backend.graph.find("Architecture")) == ["arch_a"]
+    assert len(backend.graph.find("Experiment")) == 1
+
+
+def test_should_train_without_arch_stats():
+    from nas_kg_loop import should_train
+    backend = MemoryGraphBackend()
+    g = backend.graph
+    # Stored before the nas_arch_stats aggregates existed: no lat_max
+    legacy = g.create_node(["Architecture"], {"name": "legacy", "depth": 3})
+    g.create_relationship(legacy, "HAS_EXPERIMENT", g.create_node(["Experiment"], {"latencyMs": 25}))
+    g.create_relationship(g.create_node(["Architecture"], {"name": "fast", "depth": 2}), "HAS_EXPERIMENT",
+                          g.create_node(["Experiment"], {"latencyMs": 12}))
+    with backend.session() as session:
+        assert session.execute_read(should_train, 3) is False
+        assert session.execute_read(should_train, 2) is True
+
+
+@pytest.mark.parametrize("dedup", [True, False])
+def test_parallel_loop_random_space(monkeypatch, dedup):
+    import nas_experiment_sink
+    import nas_parallel_loop
+    from nas_kg_loop import propose_random_architecture
+    backend = MemoryGraphBackend()
+    with backend.session() as session:
+        session.execute_write(lambda tx: tx.run(SEED_LAYERS, layers=LAYERS).consume())
+    monkeypatch.setattr(nas_parallel_loop, "driver", backend)
+    monkeypatch.setattr(nas_experiment_sink, "driver", backend)
+    report = nas_parallel_loop.parallel_nas_loop(iterations=40, workers=1, propose=propose_random_architecture,
+                                                 dedup=dedup)
+    # Far more distinct candidates than the 3-entry SEARCH_SPACE
+    assert report["evaluated"] + report["pruned"] + report["reused"] == 40
+    assert report["evaluated"] > 3
+    assert report["sink"]["written"] == report["evaluated"]
+    assert len(backend.graph.find("Experiment")) == report["evaluated"]
+    if not dedup:
+        assert report["reused"] == 0
+
+
+def test_loop_reuses_stored_architecture_name(monkeypatch):
+    import nas_create_data
+    import nas_kg_loop
+    backend = MemoryGraphBackend()
+    with backend.session() as session:
+        session.execute_write(nas_create_data.create_constraints)
+        session.execute_write(nas_create_data.create_dataset_and_hardware)
+        session.execute_write(nas_create_data.create_layers)
+        session.execute_write(nas_create_data.create_architecture)
+    # NAS_CNN_v1 has SEARCH_SPACE[0]'s layers but no fingerprint and no experiment yet
+    monkeypatch.setattr(nas_kg_loop, "SEARCH_SPACE", nas_kg_loop.SEARCH_SPACE[:1])
+    monkeypatch.setattr(nas_kg_loop, "driver", backend)
+    nas_kg_loop.nas_loop(iterations=3, flush_every=1)
+    archs = backend.graph.find("Architecture")
+    assert [_name(a) for a in archs] == ["NAS_CNN_v1"]
+    assert archs[0].props["fingerprint"] is not None
+    assert len(backend.graph.targets(archs[0], "HAS_EXPERIMENT", "Experiment")) == 1
+
+
+@pytest.fixture(scope="module")
+def server():
+    uri = os.environ.get("NEO4J_TEST_URI")
+    if not uri:
+        pytest.skip("NEO4J_TEST_URI not set")
+    neo4j = pytest.importorskip("neo4j")
+    driver = neo4j.GraphDatabase.driver(uri, auth=(os.environ.get("NEO4J_TEST_USER", "neo4j"),
+                                                   os.environ.get("NEO4J_TEST_PASSWORD", "password")))
+    yield driver
+    driver.close()
+
+
+@pytest.mark.parametrize("name", SCENARIOS)
+def test_handlers_match_server(server, name):
+    with server.session() as session:
+        session.run("MATCH (n) DETACH DELETE n").consume()
+    SCENARIOS[name](server)
+    backend = MemoryGraphBackend()
+    SCENARIOS[name](backend)
+
+    assert memory_snapshot(backend) == server_snapshot(server)
+    memory_answers, server_answers = read_all(backend), read_all(server)
+    for key in server_answers:
+        assert memory_answers[key] == server_answers[key], key
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from nas_prefix_index import PrefixIndex
+
+
+def edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (x != y))
+    return row[-1]
+
+
+def _index(architectures):
+    index = PrefixIndex()
+    for n, layers in enumerate(architectures):
+        index.record(f"arch_{n}", layers, 0.5 + n / 1000, 10.0)
+    return index
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2])
+def test_neighbours_match_brute_force(max_distance):
+    rng = random.Random(max_distance)
+    names = ["Conv3x3", "ReLU", "MaxPool2x2", "Linear"]
+    architectures = [[]] + [[rng.choice(names) for _ in range(rng.randint(1, 5))] for _ in range(200)]
+    index = _index(architectures)
+    queries = [[], ["ReLU"], ["Conv3x3", "ReLU"]] + [[rng.choice(names) for _ in range(rng.randint(1, 5))]
+                                                     for _ in range(50)]
+    for query in queries:
+        expected = {(edit_distance(layers, query), f"arch_{n}") for n, layers in enumerate(architectures)
+                    if edit_distance(layers, query) <= max_distance}
+        found = {(distance, run.arch) for distance, run in index.neighbours(query, max_distance)}
+        assert found == expected, query
+
+
+def test_empty_architecture_is_a_neighbour():
+    index = _index([[], ["Conv3x3", "ReLU"]])
+    assert [(d, run.arch) for d, run in index.neighbours(["Linear"], 1)] == [(1, "arch_0")]
+    assert [(d, run.arch) for d, run in index.neighbours([], 0)] == [(0, "arch_0")]
+    assert index.neighbours(["ReLU", "ReLU"], 1) == [(1, index.by_arch["arch_1"])]
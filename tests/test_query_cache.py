@@ -0,0 +1,34 @@
+from ingest_metadata import MetadataIngest
+from memory_graph import MemoryGraphBackend
+from metadata_cache import QueryCache
+from query_metadata import MetadataQuery
+
+
+def _query():
+    backend = MemoryGraphBackend()
+    MetadataIngest(driver=backend).ingest_metadata("FD001", "train_FD001", "train")
+    return MetadataQuery(driver=backend, cache=QueryCache())
+
+
+def test_cached_rows_are_not_shared():
+    query = _query()
+    first = query.get_features_for_file("train_FD001")
+    expected = [dict(row) for row in first]
+    first[0]["feature"] = "edited"
+    first.append({"feature": "extra"})
+    assert query.get_features_for_file("train_FD001") == expected
+    units = query.get_all_units()
+    units[0]["unit"] = "edited"
+    assert query.get_all_units()[0]["unit"] != "edited"
+    assert query.cache.hits == 2
+
+
+def test_batched_lookup_copies_both_ways():
+    query = _query()
+    loaded = query.get_features_for_files(["train_FD001"])["train_FD001"]
+    expected = [dict(row) for row in loaded]
+    loaded[0]["feature"] = "edited"
+    hit = query.get_features_for_files(["train_FD001"])["train_FD001"]
+    assert hit == expected
+    hit[0]["feature"] = "edited again"
+    assert query.get_features_for_file("train_FD001") == expected